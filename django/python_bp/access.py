@@ -0,0 +1,114 @@
+from django.conf import settings
+from django.core.cache import DEFAULT_CACHE_ALIAS, cache
+from django.db.models import Value
+
+from .cache import is_shared_cache
+from .models import Project, ProjectTeacher
+
+
+ACCESS_CACHE_KEY = 'project-access:{user_id}'
+
+
+def get_access_cache_timeout():
+    """
+    Cache se zapne jen nad sdíleným backendem - v LocMemCache by invalidace
+    po změně přiřazení učitele neplatila pro ostatní workery.
+    """
+    if not is_shared_cache(DEFAULT_CACHE_ALIAS):
+        return 0
+    return getattr(settings, 'PROJECT_ACCESS_CACHE_TIMEOUT', 0)
+
+
+def parse_project_id(value):
+    """
+    Převede id projektu z request.data na int, neplatná hodnota vrací None.
+    """
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def load_project_ids(user):
+    """
+    Jedním dotazem načte id projektů, kde je uživatel přiřazeným učitelem ('teacher')
+    nebo autorem ('student'). Se sdílenou výchozí cache lze výsledek krátce cachovat
+    (PROJECT_ACCESS_CACHE_TIMEOUT).
+    """
+    if not user.is_authenticated:
+        return {'teacher': frozenset(), 'student': frozenset()}
+
+    timeout = get_access_cache_timeout()
+    cache_key = ACCESS_CACHE_KEY.format(user_id=user.pk)
+    if timeout:
+        cached = cache.get(cache_key)
+        if cached is not None:
+            return cached
+
+    teacher_rows = ProjectTeacher.objects.filter(teacher=user).annotate(
+        kind=Value('teacher')
+    ).values_list('project_id', 'kind')
+    student_rows = Project.objects.filter(student=user).annotate(
+        kind=Value('student')
+    ).values_list('id', 'kind')
+
+    project_ids = {'teacher': set(), 'student': set()}
+    for project_id, kind in teacher_rows.union(student_rows, all=True):
+        project_ids[kind].add(project_id)
+    project_ids = {kind: frozenset(ids) for kind, ids in project_ids.items()}
+
+    if timeout:
+        cache.set(cache_key, project_ids, timeout)
+    return project_ids
+
+
+def invalidate_project_access(*user_ids):
+    cache.delete_many([ACCESS_CACHE_KEY.format(user_id=user_id) for user_id in user_ids if user_id])
+
+
+class ProjectAccess:
+    """
+    Projekty, ke kterým má uživatel přístup. Množina se načte nejvýše jednou za request.
+    Neobsahuje veřejné projekty - ty se filtrují podle public_visibility přímo v dotazu.
+    """
+    def __init__(self, user):
+        self.user = user
+        self.is_admin = getattr(user, 'role', None) == 'admin'
+        self._project_ids = None
+
+    def _load(self):
+        if self._project_ids is None:
+            self._project_ids = load_project_ids(self.user)
+        return self._project_ids
+
+    @property
+    def teacher_project_ids(self):
+        return self._load()['teacher']
+
+    @property
+    def student_project_ids(self):
+        return self._load()['student']
+
+    @property
+    def project_ids(self):
+        return self.teacher_project_ids | self.student_project_ids
+
+    def is_teacher_of(self, project_id):
+        return parse_project_id(project_id) in self.teacher_project_ids
+
+    def is_student_of(self, project_id):
+        return parse_project_id(project_id) in self.student_project_ids
+
+    def can_access(self, project_id):
+        return self.is_admin or parse_project_id(project_id) in self.project_ids
+
+
+def get_project_access(request):
+    """
+    Vrací ProjectAccess uložený na requestu, aby ho views i permission třídy sdílely.
+    """
+    access = getattr(request, '_project_access', None)
+    if access is None or access.user != request.user:
+        access = ProjectAccess(request.user)
+        request._project_access = access
+    return access
@@ -0,0 +1,10 @@
+from django.apps import AppConfig
+
+
+class PythonBpConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'python_bp'
+
+    def ready(self):
+        # Registrace signálů
+        from . import signals  # noqa: F401
@@ -0,0 +1,125 @@
+from asgiref.sync import sync_to_async
+from django.http import HttpResponse
+from django.views.decorators.http import require_GET
+from rest_framework.exceptions import APIException
+from rest_framework.request import Request
+
+from .cache import acache_public_response
+from .conditional import alist_validators, aproject_validators, not_modified_response, set_validators
+from .facets import project_facets
+from .fast_serializers import list_serializer_class
+from .fieldsets import requested_fields
+from .models import Project
+from .pagination import ProjectPagination
+from .renderers import FastJSONRenderer
+from .serializer import ProjectDetailSerializer, ProjectListSerializer, SimilarProjectSerializer
+from .similarity import SHOWN_SIMILAR_PROJECTS, asimilar_projects
+from .views import filter_public_projects
+
+
+def render_json(data, headers=None, status=200):
+    """
+    JSON odpověď se stejným výstupem jako DRF views (FastJSONRenderer), bez APIView.
+    """
+    response = HttpResponse(content_type='application/json', status=status)
+    response.content = FastJSONRenderer().render(data, renderer_context={'response': response})
+    for name, value in (headers or {}).items():
+        response[name] = value
+    return response
+
+
+def public_request(request):
+    """
+    DRF Request kvůli query_params a build_absolute_uri. Bez autentizace -
+    veřejné endpointy uživatele nepotřebují a JWT by vyžadoval synchronní dotaz.
+    """
+    return Request(request, authenticators=())
+
+
+@require_GET
+@acache_public_response('list', render_json)
+async def public_projects_list(request):
+    """
+    Async varianta views.public_projects_list (ASYNC_PUBLIC_VIEWS)
+    """
+    request = public_request(request)
+    serializer_class = list_serializer_class(ProjectListSerializer)
+    try:
+        projects = serializer_class.setup_eager_loading(filter_public_projects(request))
+    except APIException as e:
+        return render_json({'detail': e.detail}, status=e.status_code)
+    search = request.query_params.get('search', '').strip()
+
+    ordering = request.query_params.get('ordering', '-search_rank,-year,title' if search else '-year,title')
+    if ordering:
+        projects = projects.order_by(*ordering.split(','))
+
+    etag, last_modified = await alist_validators(request, projects)
+    not_modified = not_modified_response(request, etag, last_modified)
+    if not_modified is not None:
+        return not_modified
+
+    paginator = ProjectPagination()
+    try:
+        result_page = await paginator.apaginate_queryset(projects, request)
+    except APIException as e:
+        return render_json({'detail': e.detail}, status=e.status_code)
+
+    serializer = serializer_class(result_page, many=True)
+    data = paginator.get_paginated_response(serializer.data).data
+    return data, set_validators({}, etag, last_modified)
+
+
+@require_GET
+@acache_public_response('facets', render_json)
+async def public_projects_facets(request):
+    """
+    Async varianta views.public_projects_facets. Dotaz s GROUPING SETS používá přímo kurzor,
+    který nemá async API, proto běží přes sync_to_async.
+    """
+    request = public_request(request)
+    try:
+        projects = filter_public_projects(request)
+    except APIException as e:
+        return render_json({'detail': e.detail}, status=e.status_code)
+
+    etag, last_modified = await alist_validators(request, projects)
+    not_modified = not_modified_response(request, etag, last_modified)
+    if not_modified is not None:
+        return not_modified
+
+    return await sync_to_async(project_facets)(projects), set_validators({}, etag, last_modified)
+
+
+@require_GET
+@acache_public_response('detail', render_json)
+async def public_project_detail(request, pk):
+    """
+    Async varianta views.public_project_detail
+    """
+    request = public_request(request)
+    projects = Project.objects.filter(public_visibility=True, deleted=False)
+    not_found = {'detail': 'Project not found or not public.'}
+    try:
+        fields = requested_fields(request, ProjectDetailSerializer, extra_expandable=('similar_projects',))
+    except APIException as e:
+        return render_json({'detail': e.detail}, status=e.status_code)
+
+    etag, last_modified = await aproject_validators(request, projects, pk)
+    if etag is None:
+        return render_json(not_found, status=404)
+    not_modified = not_modified_response(request, etag, last_modified)
+    if not_modified is not None:
+        return not_modified
+
+    try:
+        project = await ProjectDetailSerializer.setup_eager_loading(projects, fields=fields).aget(pk=pk)
+    except Project.DoesNotExist:
+        return render_json(not_found, status=404)
+
+    data = ProjectDetailSerializer(project, fields=fields).data
+    if fields is None or 'similar_projects' in fields:
+        data['similar_projects'] = SimilarProjectSerializer(
+            await asimilar_projects(project.pk, SHOWN_SIMILAR_PROJECTS), many=True
+        ).data
+    return data, set_validators({}, etag, last_modified)
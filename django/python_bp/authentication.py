@@ -0,0 +1,76 @@
+from datetime import timedelta
+
+from django.conf import settings
+from drf_yasg.utils import swagger_auto_schema
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
+from rest_framework_simplejwt.tokens import Token
+
+
+class MediaToken(Token):
+    """
+    Krátkodobý token jen pro zdroje, které prohlížeč načítá sám (<video>, <img>, EventSource).
+    Jiný token_type než přístupový JWT - v URL (logy, historie, Referer) tak neunikne
+    token použitelný pro API a přístupový JWT naopak nejde poslat jako ?token=.
+    """
+    token_type = 'media'
+    lifetime = timedelta(seconds=settings.MEDIA_TOKEN_LIFETIME)
+
+
+class QueryParamJWTAuthentication(JWTAuthentication):
+    """
+    JWT z hlavičky Authorization, případně MediaToken z parametru ?token=.
+    """
+    query_param = 'token'
+
+    def authenticate(self, request):
+        result = super().authenticate(request)
+        if result is not None:
+            return result
+
+        params = getattr(request, 'query_params', request.GET)
+        raw_token = params.get(self.query_param)
+        if not raw_token:
+            return None
+        try:
+            validated_token = MediaToken(raw_token)
+        except TokenError as e:
+            raise InvalidToken({'detail': str(e)})
+        return self.get_user(validated_token), validated_token
+
+
+def authenticate_request(request):
+    """
+    Vrací přihlášeného uživatele pro obyčejné Django view, nebo None.
+    Neplatný token se chová jako nepřihlášený uživatel.
+    """
+    user = getattr(request, 'user', None)
+    if user is not None and user.is_authenticated:
+        return user
+    try:
+        result = QueryParamJWTAuthentication().authenticate(request)
+    except AuthenticationFailed:
+        return None
+    return result[0] if result else None
+
+
+@swagger_auto_schema(
+    method='post',
+    operation_description="Short-lived token for media files and project events, passed as ?token= "
+                          "where the browser cannot send the Authorization header.",
+    responses={200: "{token, expires_in}"}
+)
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def media_token(request):
+    """
+    Issue a MediaToken for the current user
+    """
+    return Response({
+        'token': str(MediaToken.for_user(request.user)),
+        'expires_in': settings.MEDIA_TOKEN_LIFETIME,
+    })
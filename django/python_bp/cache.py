@@ -0,0 +1,195 @@
+import hashlib
+import uuid
+from functools import wraps
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.cache import get_conditional_response
+from django.utils.http import parse_http_date_safe
+from rest_framework.response import Response
+
+from .metrics import PUBLIC_CACHE_REQUESTS
+
+
+# Alias z settings.CACHES
+PUBLIC_CACHE_ALIAS = 'public'
+
+# Hlavičky uložené společně s daty odpovědi
+CACHED_HEADERS = ('ETag', 'Last-Modified')
+
+LIST_GENERATION_KEY = 'public-projects:list:generation'
+DETAIL_GENERATION_KEY = 'public-projects:detail:{pk}:generation'
+
+
+# Backendy, jejichž obsah vidí jen jeden proces - invalidace z jiného workeru se do nich nedostane
+PROCESS_LOCAL_BACKENDS = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+
+def get_public_cache():
+    return caches[PUBLIC_CACHE_ALIAS]
+
+
+def is_shared_cache(alias):
+    """
+    True, pokud cache sdílí všechny procesy (Redis, Memcached, databáze, soubory).
+    """
+    return settings.CACHES[alias]['BACKEND'] not in PROCESS_LOCAL_BACKENDS
+
+
+def normalize_query(query_params):
+    """
+    Seřadí parametry a vynechá prázdné hodnoty, aby ?a=1&b=2 a ?b=2&a=1 sdílely záznam.
+    """
+    items = sorted(
+        (key, value)
+        for key in query_params
+        for value in query_params.getlist(key)
+        if value != ''
+    )
+    return urlencode(items)
+
+
+def _get_generation(key):
+    """
+    Generace je náhodný token. Při vyřazení klíče z cache (LRU) vznikne nový,
+    takže se nikdy nevrátí k hodnotě, pod kterou jsou uložené staré odpovědi.
+    """
+    cache = get_public_cache()
+    generation = cache.get(key)
+    if generation is None:
+        cache.add(key, uuid.uuid4().hex, timeout=None)
+        generation = cache.get(key)
+    return generation
+
+
+async def _aget_generation(key):
+    cache = get_public_cache()
+    generation = await cache.aget(key)
+    if generation is None:
+        await cache.aadd(key, uuid.uuid4().hex, timeout=None)
+        generation = await cache.aget(key)
+    return generation
+
+
+def _bump_generation(key):
+    get_public_cache().set(key, uuid.uuid4().hex, timeout=None)
+
+
+def _query_hash(request):
+    # Async views dostávají obyčejný HttpRequest bez query_params
+    query_params = getattr(request, 'query_params', request.GET)
+    return hashlib.sha1(normalize_query(query_params).encode('utf-8')).hexdigest()
+
+
+def list_cache_key(request, kind='list'):
+    """
+    Klíč pro odpovědi odvozené ze seznamu veřejných projektů (seznam, facety),
+    všechny sdílejí generaci seznamu.
+    """
+    return f'public-projects:{kind}:{_get_generation(LIST_GENERATION_KEY)}:{_query_hash(request)}'
+
+
+def detail_cache_key(request, pk):
+    generation = _get_generation(DETAIL_GENERATION_KEY.format(pk=pk))
+    return f'public-projects:detail:{pk}:{generation}:{_query_hash(request)}'
+
+
+async def alist_cache_key(request, kind='list'):
+    return f'public-projects:{kind}:{await _aget_generation(LIST_GENERATION_KEY)}:{_query_hash(request)}'
+
+
+async def adetail_cache_key(request, pk):
+    generation = await _aget_generation(DETAIL_GENERATION_KEY.format(pk=pk))
+    return f'public-projects:detail:{pk}:{generation}:{_query_hash(request)}'
+
+
+def invalidate_public_list():
+    _bump_generation(LIST_GENERATION_KEY)
+
+
+def invalidate_public_detail(pk):
+    _bump_generation(DETAIL_GENERATION_KEY.format(pk=pk))
+
+
+def cache_public_response(kind):
+    """
+    Dekorátor pro veřejné function-based views. Ukládá data úspěšných odpovědí
+    (status 200) i jejich validátory pod klíčem z normalizovaného query stringu,
+    u detailu i podle pk. kind je 'detail', 'list' nebo jiný pohled nad seznamem
+    (např. 'facets'). Invalidace probíhá signály v signals.py.
+    """
+    def decorator(view_func):
+        @wraps(view_func)
+        def wrapper(request, *args, **kwargs):
+            if kind == 'detail':
+                cache_key = detail_cache_key(request, kwargs['pk'])
+            else:
+                cache_key = list_cache_key(request, kind)
+
+            cache = get_public_cache()
+            cached = cache.get(cache_key)
+            PUBLIC_CACHE_REQUESTS.inc(kind=kind, result='miss' if cached is None else 'hit')
+            if cached is not None:
+                data, headers = cached
+                not_modified = get_conditional_response(
+                    request,
+                    etag=headers.get('ETag'),
+                    last_modified=parse_http_date_safe(headers.get('Last-Modified')),
+                )
+                if not_modified is not None:
+                    for name, value in headers.items():
+                        not_modified[name] = value
+                    return not_modified
+                return Response(data, headers=headers)
+
+            response = view_func(request, *args, **kwargs)
+            if response.status_code == 200:
+                headers = {name: response[name] for name in CACHED_HEADERS if response.has_header(name)}
+                cache.set(cache_key, (response.data, headers))
+            return response
+        return wrapper
+    return decorator
+
+
+def acache_public_response(kind, render):
+    """
+    Async varianta cache_public_response pro async views (async_views.py).
+    View vrací dvojici (data, headers) nebo hotovou odpověď (304, 404), render
+    z dat vytvoří HTTP odpověď. Záznamy cache jsou stejné jako u sync views.
+    """
+    def decorator(view_func):
+        @wraps(view_func)
+        async def wrapper(request, *args, **kwargs):
+            if kind == 'detail':
+                cache_key = await adetail_cache_key(request, kwargs['pk'])
+            else:
+                cache_key = await alist_cache_key(request, kind)
+
+            cache = get_public_cache()
+            cached = await cache.aget(cache_key)
+            PUBLIC_CACHE_REQUESTS.inc(kind=kind, result='miss' if cached is None else 'hit')
+            if cached is not None:
+                data, headers = cached
+                not_modified = get_conditional_response(
+                    request,
+                    etag=headers.get('ETag'),
+                    last_modified=parse_http_date_safe(headers.get('Last-Modified')),
+                )
+                if not_modified is not None:
+                    for name, value in headers.items():
+                        not_modified[name] = value
+                    return not_modified
+                return render(data, headers)
+
+            result = await view_func(request, *args, **kwargs)
+            if not isinstance(result, tuple):
+                return result
+            data, headers = result
+            await cache.aset(cache_key, (data, headers))
+            return render(data, headers)
+        return wrapper
+    return decorator
@@ -0,0 +1,123 @@
+import hashlib
+
+from django.contrib.postgres.expressions import ArraySubquery
+from django.db.models import CharField, Count, IntegerField, Max, OuterRef, Subquery, Value
+from django.db.models.functions import Concat
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+
+from .cache import normalize_query
+from .models import Project, ProjectSimilarity
+from .similarity import SHOWN_SIMILAR_PROJECTS
+
+
+# Vnořené kolekce, které vrací ProjectDetailSerializer
+PROJECT_CHILD_RELATIONS = ('teachers', 'milestones', 'comments', 'consultations', 'evaluations')
+LIST_AGGREGATES = {'last_modified': Max('updated_at'), 'count': Count('pk')}
+
+
+def _make_etag(request, *parts):
+    """
+    ETag závisí na URL a uživateli (viditelnost se liší podle role).
+    """
+    user = getattr(request, 'user', None)
+    user_id = user.pk if user is not None and user.is_authenticated else ''
+    values = [request.path, normalize_query(request.query_params), user_id, *parts]
+    digest = hashlib.sha1('|'.join(str(value) for value in values).encode('utf-8')).hexdigest()
+    return quote_etag(digest)
+
+
+def list_validators(request, queryset):
+    """
+    Validátory pro seznam: jeden agregační dotaz max(updated_at) a počet řádků
+    nad vyfiltrovaným querysetem (před stránkováním).
+    Seznam má jen ETag - po skrytí nebo smazání projektu max(updated_at) neroste,
+    takže Last-Modified by klientům s If-Modified-Since vracel chybně 304.
+    """
+    return _list_result(request, _list_stats_queryset(queryset).aggregate(**LIST_AGGREGATES))
+
+
+async def alist_validators(request, queryset):
+    return _list_result(request, await _list_stats_queryset(queryset).aaggregate(**LIST_AGGREGATES))
+
+
+def _list_stats_queryset(queryset):
+    return queryset.prefetch_related(None).order_by()
+
+
+def _list_result(request, stats):
+    last_modified = stats['last_modified']
+    etag = _make_etag(request, stats['count'], last_modified.isoformat() if last_modified else '')
+    return etag, None
+
+
+def project_validators(request, queryset, pk):
+    """
+    Validátory detailu projektu: ETag z času změny, časů a počtů všech vnořených kolekcí
+    a zobrazených podobných projektů. Detail má jen ETag - smazání komentáře, učitele či milníku
+    ani přepočet podobných projektů max(updated_at) neposune, Last-Modified by tak vracel chybně 304.
+    Vrací (None, None), pokud projekt v querysetu není.
+    """
+    try:
+        row = _project_row_queryset(queryset, pk).first()
+    except (TypeError, ValueError):
+        return None, None
+    return _project_result(request, pk, row)
+
+
+async def aproject_validators(request, queryset, pk):
+    try:
+        row = await _project_row_queryset(queryset, pk).afirst()
+    except (TypeError, ValueError):
+        return None, None
+    return _project_result(request, pk, row)
+
+
+def _project_row_queryset(queryset, pk):
+    annotations = {}
+    for relation in PROJECT_CHILD_RELATIONS:
+        related_model = Project._meta.get_field(relation).related_model
+        children = related_model.objects.filter(project=OuterRef('pk')).order_by().values('project')
+        annotations[f'{relation}_modified'] = Subquery(children.annotate(value=Max('updated_at')).values('value'))
+        annotations[f'{relation}_count'] = Subquery(
+            children.annotate(value=Count('pk')).values('value'), output_field=IntegerField()
+        )
+    # Zobrazené podobné projekty (id a čas změny) - přepočet sousedů mění detail bez změny projektu
+    annotations['similar_projects'] = ArraySubquery(
+        ProjectSimilarity.objects.filter(
+            project=OuterRef('pk'), similar__public_visibility=True, similar__deleted=False,
+        ).order_by('rank').annotate(
+            version=Concat('similar_id', Value('@'), 'similar__updated_at', output_field=CharField())
+        ).values('version')[:SHOWN_SIMILAR_PROJECTS]
+    )
+    return queryset.prefetch_related(None).order_by().filter(pk=pk).values('updated_at', **annotations)
+
+
+def _project_result(request, pk, row):
+    if row is None:
+        return None, None
+
+    etag = _make_etag(request, pk, *(
+        value.isoformat() if hasattr(value, 'isoformat') else value
+        for value in row.values()
+    ))
+    return etag, None
+
+
+def not_modified_response(request, etag, last_modified):
+    """
+    Vrátí odpověď 304, pokud klient má aktuální verzi (If-None-Match / If-Modified-Since).
+    """
+    timestamp = int(last_modified.timestamp()) if last_modified else None
+    response = get_conditional_response(request, etag=etag, last_modified=timestamp)
+    if response is not None:
+        set_validators(response, etag, last_modified)
+    return response
+
+
+def set_validators(response, etag, last_modified):
+    if etag:
+        response['ETag'] = etag
+    if last_modified:
+        response['Last-Modified'] = http_date(last_modified.timestamp())
+    return response
@@ -0,0 +1,171 @@
+import os
+import shutil
+import uuid
+
+from django.conf import settings
+from django.db.models import Exists, OuterRef, Q
+from django.utils import timezone
+from PIL import Image, ImageOps
+
+from .cache import invalidate_public_detail, invalidate_public_list
+from .models import MediaBlob, Project
+from .tasks import submit
+
+
+DERIVATIVE_DIR = 'derivatives'
+DERIVATIVE_FIELDS = ('thumbnail', 'poster')
+IMAGE_EXTENSIONS = ('jpg', 'jpeg', 'png', 'gif')
+
+# Název varianty -> maximální rozměry (šířka, výška); card pro seznamy, detail pro detail projektu
+VARIANTS = {
+    'card': (480, 360),
+    'detail': (1280, 960),
+}
+# Přípona -> (formát Pillow, parametry ukládání)
+FORMATS = {
+    'webp': ('WEBP', {'quality': 80, 'method': 4}),
+    'jpeg': ('JPEG', {'quality': 82, 'optimize': True, 'progressive': True}),
+}
+
+
+def is_image(path):
+    return bool(path) and path.split('.')[-1].lower() in IMAGE_EXTENSIONS
+
+
+def get_derivative_dir(source_path):
+    """
+    Adresář variant obrázku, např. derivatives/blobs/ab/<sha256>/
+    """
+    return os.path.join(DERIVATIVE_DIR, os.path.splitext(source_path)[0])
+
+
+def get_derivative_path(source_path, variant, fmt):
+    return os.path.join(get_derivative_dir(source_path), f'{variant}.{fmt}')
+
+
+def variants_ready_name(field):
+    """
+    Název anotace s připraveností variant pole, např. thumbnail_variants_ready.
+    """
+    return f'{field}_variants_ready'
+
+
+def variants_ready(field):
+    """
+    Anotace: blob, na který pole projektu odkazuje, má vygenerované varianty.
+    field může vést přes relaci (např. 'similar__thumbnail').
+    """
+    return Exists(MediaBlob.objects.filter(path=OuterRef(field), derivatives_ready=True))
+
+
+def is_variants_ready(source_path):
+    """
+    Připravenost variant jednoho souboru dotazem do DB - pro instance načtené bez anotace.
+    """
+    if not is_image(source_path):
+        return False
+    return MediaBlob.objects.filter(path=source_path, derivatives_ready=True).exists()
+
+
+def get_variant_urls(source_path, ready):
+    """
+    URL všech variant obrázku {varianta: {formát: url}}, nebo None,
+    pokud soubor není obrázek nebo varianty ještě nejsou vygenerované (ready z DB).
+    """
+    from .file_upload import get_file_url
+
+    if not ready or not is_image(source_path):
+        return None
+    return {
+        variant: {fmt: get_file_url(get_derivative_path(source_path, variant, fmt)) for fmt in FORMATS}
+        for variant in VARIANTS
+    }
+
+
+def render_derivatives(media_root, source_path, force=False):
+    """
+    Vygeneruje zmenšené a překomprimované varianty obrázku. Běží v procesu poolu,
+    proto dostává MEDIA_ROOT jako argument. Vrací počet zapsaných souborů.
+    """
+    with Image.open(os.path.join(media_root, source_path)) as original:
+        original.seek(0)
+        image = ImageOps.exif_transpose(original)
+        image = image.convert('RGBA' if image.mode in ('RGBA', 'LA', 'P') else 'RGB')
+
+        written = 0
+        for variant, size in VARIANTS.items():
+            resized = None
+            for fmt, (pil_format, save_options) in FORMATS.items():
+                target = os.path.join(media_root, get_derivative_path(source_path, variant, fmt))
+                if not force and os.path.exists(target):
+                    continue
+                if resized is None:
+                    resized = image.copy()
+                    resized.thumbnail(size, Image.LANCZOS)
+
+                output = resized
+                if pil_format == 'JPEG' and resized.mode == 'RGBA':
+                    # JPEG nemá průhlednost - podklad bude bílý
+                    output = Image.new('RGB', resized.size, (255, 255, 255))
+                    output.paste(resized, mask=resized.getchannel('A'))
+
+                # Zápis přes dočasný soubor, aby se nikdy neservíroval rozepsaný obrázek
+                os.makedirs(os.path.dirname(target), exist_ok=True)
+                temporary = f'{target}.{uuid.uuid4().hex}.tmp'
+                try:
+                    output.save(temporary, pil_format, **save_options)
+                    os.replace(temporary, target)
+                except BaseException:
+                    if os.path.exists(temporary):
+                        os.remove(temporary)
+                    raise
+                written += 1
+    return written
+
+
+def mark_derivatives_ready(source_path):
+    """
+    Zaznamená hotové varianty u blobu a posune updated_at projektů, které na něj odkazují -
+    změní se jejich JSON (thumbnail_variants), takže musí i ETag a synchronizace.
+    Vrací id dotčených projektů.
+    """
+    MediaBlob.objects.filter(path=source_path).update(derivatives_ready=True)
+    projects = Project.objects.filter(Q(thumbnail=source_path) | Q(poster=source_path))
+    project_ids = list(projects.values_list('pk', flat=True))
+    projects.update(updated_at=timezone.now())
+    return project_ids
+
+
+def generate_derivatives(media_root, source_path, force=False):
+    """
+    Úloha poolu: vygeneruje varianty a zapíše jejich připravenost do DB.
+    Vrací (počet zapsaných souborů, id dotčených projektů).
+    """
+    written = render_derivatives(media_root, source_path, force)
+    return written, mark_derivatives_ready(source_path)
+
+
+def _derivatives_done(future):
+    # Callback běží ve webovém procesu - invalidace tak dosáhne i na jeho LocMem cache
+    if future.cancelled() or future.exception() is not None:
+        return
+    _, project_ids = future.result()
+    invalidate_public_list()
+    for project_id in project_ids:
+        invalidate_public_detail(project_id)
+
+
+def schedule_derivatives(source_path):
+    """
+    Naplánuje generování variant do poolu procesů mimo request.
+    """
+    if not is_image(source_path):
+        return None
+    future = submit(generate_derivatives, settings.MEDIA_ROOT, source_path)
+    if future is not None:
+        future.add_done_callback(_derivatives_done)
+    return future
+
+
+def delete_derivatives(source_path):
+    shutil.rmtree(os.path.join(settings.MEDIA_ROOT, get_derivative_dir(source_path)), ignore_errors=True)
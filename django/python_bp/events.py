@@ -0,0 +1,259 @@
+import asyncio
+import itertools
+import json
+import logging
+import select
+import threading
+import time
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connection, connections, transaction
+from django.http import JsonResponse, StreamingHttpResponse
+from django.views.decorators.http import require_GET
+
+from .access import ProjectAccess
+from .authentication import authenticate_request
+from .models import Project, User
+
+
+logger = logging.getLogger(__name__)
+
+# Limit pg_notify je 8000 bajtů, větší událost se pošle bez dat (klient si je dočte)
+NOTIFY_MAX_PAYLOAD = 7900
+LISTEN_RECONNECT_SECONDS = 5
+
+
+class Subscription:
+    """
+    Odběr událostí jednoho projektu pro jedno SSE spojení. Fronta patří event loopu
+    spojení, publikovat do ní lze z libovolného vlákna (call_soon_threadsafe).
+    """
+    def __init__(self, project_id, maxsize):
+        self.project_id = project_id
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(maxsize=maxsize)
+        # Při zahlcení fronty se události zahazují a klient dostane pokyn k resynchronizaci
+        self.overflowed = False
+
+    def _put(self, event):
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            self.overflowed = True
+
+    def deliver(self, event):
+        try:
+            self.loop.call_soon_threadsafe(self._put, event)
+        except RuntimeError:
+            # Event loop spojení už skončil
+            pass
+
+
+class EventBroker:
+    """
+    Pub/sub v paměti procesu: id projektu -> odběry.
+    """
+    def __init__(self):
+        self._subscriptions = {}
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+
+    def subscribe(self, project_id):
+        subscription = Subscription(project_id, settings.SSE_QUEUE_SIZE)
+        with self._lock:
+            self._subscriptions.setdefault(project_id, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            subscriptions = self._subscriptions.get(subscription.project_id)
+            if subscriptions is not None:
+                subscriptions.discard(subscription)
+                if not subscriptions:
+                    del self._subscriptions[subscription.project_id]
+
+    def deliver(self, event):
+        with self._lock:
+            subscriptions = list(self._subscriptions.get(event['project'], ()))
+        if subscriptions:
+            event = {**event, 'id': next(self._ids)}
+            for subscription in subscriptions:
+                subscription.deliver(event)
+
+
+broker = EventBroker()
+
+
+def publish_event(project_id, event_type, data):
+    """
+    Publikuje událost projektu po commitu transakce. S EVENTS_BACKEND='postgres'
+    jde přes NOTIFY, takže ji dostanou odběratelé ve všech workerech.
+    """
+    event = {'project': project_id, 'type': event_type, 'data': data}
+    if settings.EVENTS_BACKEND == 'postgres':
+        transaction.on_commit(lambda: notify_event(event))
+    else:
+        transaction.on_commit(lambda: broker.deliver(event))
+
+
+def notify_event(event):
+    payload = json.dumps(event, cls=DjangoJSONEncoder)
+    if len(payload.encode('utf-8')) > NOTIFY_MAX_PAYLOAD:
+        payload = json.dumps({**event, 'data': {'id': event['data'].get('id'), 'truncated': True}},
+                             cls=DjangoJSONEncoder)
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT pg_notify(%s, %s)', [settings.EVENTS_CHANNEL, payload])
+
+
+_listener = None
+_listener_lock = threading.Lock()
+
+
+def ensure_listener():
+    """
+    S EVENTS_BACKEND='postgres' spustí (jednou za proces) vlákno s LISTEN,
+    které předává notifikace lokálnímu brokeru.
+    """
+    global _listener
+    if settings.EVENTS_BACKEND != 'postgres':
+        return
+    with _listener_lock:
+        if _listener is None or not _listener.is_alive():
+            _listener = threading.Thread(target=_listen, name='project-events-listener', daemon=True)
+            _listener.start()
+
+
+def _listen():
+    wrapper = connections['default']
+    while True:
+        raw_connection = None
+        try:
+            # Vlastní spojení mimo správu Djanga - drží LISTEN po celou dobu běhu procesu
+            raw_connection = wrapper.get_new_connection(wrapper.get_connection_params())
+            raw_connection.autocommit = True
+            with raw_connection.cursor() as cursor:
+                cursor.execute(f'LISTEN "{settings.EVENTS_CHANNEL}"')
+            while True:
+                if select.select([raw_connection], [], [], 60) == ([], [], []):
+                    continue
+                raw_connection.poll()
+                while raw_connection.notifies:
+                    notification = raw_connection.notifies.pop(0)
+                    try:
+                        broker.deliver(json.loads(notification.payload))
+                    except (ValueError, KeyError):
+                        logger.warning('Neplatná notifikace události: %s', notification.payload)
+        except Exception as e:
+            logger.warning('LISTEN na kanálu %s selhal (%s), nové připojení za %s s.',
+                           settings.EVENTS_CHANNEL, e, LISTEN_RECONNECT_SECONDS)
+            time.sleep(LISTEN_RECONNECT_SECONDS)
+        finally:
+            if raw_connection is not None:
+                raw_connection.close()
+
+
+def format_sse(event_type, data, event_id=None):
+    lines = []
+    if event_id is not None:
+        lines.append(f'id: {event_id}')
+    lines.append(f'event: {event_type}')
+    lines.append(f'data: {json.dumps(data, cls=DjangoJSONEncoder)}')
+    return '\n'.join(lines) + '\n\n'
+
+
+async def event_stream(project_id, user):
+    """
+    Nekonečný SSE stream událostí projektu. Při nečinnosti posílá komentář (keepalive),
+    po zahlcení fronty pošle událost reset a skončí - klient dočte změny přes changes/.
+    Přístup se ověřuje znovu nejvýše po SSE_HEARTBEAT_SECONDS; po jeho ztrátě (skrytí,
+    smazání projektu, odebrání učitele, deaktivace účtu) pošle událost revoked a skončí.
+    Odběr se zruší i při odpojení klienta (zrušení generátoru).
+    """
+    ensure_listener()
+    subscription = broker.subscribe(project_id)
+    checked_at = time.monotonic()
+    try:
+        yield f'retry: {settings.SSE_RETRY_MS}\n\n'
+        while True:
+            try:
+                event = await asyncio.wait_for(subscription.queue.get(), timeout=settings.SSE_HEARTBEAT_SECONDS)
+            except asyncio.TimeoutError:
+                event = None
+            # Kontrola i při souvislém proudu událostí, kdy timeout nenastane
+            if time.monotonic() - checked_at >= settings.SSE_HEARTBEAT_SECONDS:
+                status_code, _ = await sync_to_async(recheck_subscription)(user.pk, project_id)
+                if status_code != 200:
+                    yield format_sse('revoked', {'project': project_id})
+                    return
+                checked_at = time.monotonic()
+            if event is None:
+                yield ': keepalive\n\n'
+                continue
+            yield format_sse(event['type'], event['data'], event['id'])
+            if subscription.overflowed and subscription.queue.empty():
+                yield format_sse('reset', {'project': project_id})
+                return
+    finally:
+        broker.unsubscribe(subscription)
+
+
+def check_subscription(user, project_id):
+    """
+    Vrací (status, detail) - odebírat smí uživatel s přístupem k projektu
+    a u veřejného projektu každý přihlášený.
+    """
+    public_visibility = Project.objects.filter(pk=project_id, deleted=False).values_list(
+        'public_visibility', flat=True
+    ).first()
+    if public_visibility is None:
+        return 404, 'Project not found.'
+    if not public_visibility and not ProjectAccess(user).can_access(project_id):
+        return 403, 'You do not have access to this project.'
+    return 200, None
+
+
+def recheck_subscription(user_id, project_id):
+    """
+    Opakovaná kontrola za běhu streamu - uživatel se načte znovu,
+    aby se projevila deaktivace účtu nebo změna role.
+    """
+    user = User.objects.filter(pk=user_id, is_active=True).first()
+    if user is None:
+        return 401, 'User is inactive or deleted.'
+    return check_subscription(user, project_id)
+
+
+def can_subscribe(request, project_id):
+    """
+    Vrací (user, status, detail) pro otevření streamu.
+    """
+    user = authenticate_request(request)
+    if user is None:
+        return None, 401, 'Authentication credentials were not provided.'
+    return (user, *check_subscription(user, project_id))
+
+
+@require_GET
+async def project_events(request, pk):
+    """
+    Server-Sent Events: new comments, milestone progress and teacher accept/decline of a project.
+    Access is re-checked periodically; when it is lost, a 'revoked' event is sent and the stream ends.
+    EventSource cannot send headers, so a media token (auth/media-token/) may be passed as ?token=.
+    Requires an ASGI server (ASGI_APPLICATION); under WSGI the endpoint answers 501.
+    """
+    # WSGI handler by nekonečný async stream nejdřív celý načetl do paměti a worker by už neuvolnil
+    if not isinstance(request, ASGIRequest):
+        return JsonResponse({'detail': 'Project events require an ASGI server.'}, status=501)
+
+    user, status_code, detail = await sync_to_async(can_subscribe)(request, pk)
+    if status_code != 200:
+        return JsonResponse({'detail': detail}, status=status_code)
+
+    response = StreamingHttpResponse(event_stream(pk, user), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    # nginx nesmí odpověď bufferovat
+    response['X-Accel-Buffering'] = 'no'
+    return response
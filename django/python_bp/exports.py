@@ -0,0 +1,258 @@
+import csv
+import io
+import json
+import os
+import zipfile
+from datetime import datetime
+
+from django.conf import settings
+from django.contrib.postgres.aggregates import ArrayAgg
+from django.core.exceptions import SuspiciousFileOperation
+from django.db.models import Avg, Count, F, IntegerField, OuterRef, Subquery, Value
+from django.db.models.functions import Concat
+from django.http import StreamingHttpResponse
+from django.utils._os import safe_join
+from django.utils.text import slugify
+from rest_framework.utils.encoders import JSONEncoder
+
+from .models import MediaBlob, ProjectEvaluation, ProjectTeacher
+from .serializer import ProjectDetailSerializer
+
+
+# Soubory projektu, které se přidávají do exportu
+EXPORT_FILE_FIELDS = ('document', 'poster', 'video')
+FILE_CHUNK_SIZE = 1024 * 1024
+
+EXPORT_FORMATS = ('csv', 'ndjson')
+# Velikost dávky serverového kurzoru při tabulkovém exportu
+EXPORT_CHUNK_SIZE = 2000
+# Sloupce tabulkového exportu projektů
+PROJECT_EXPORT_FIELDS = (
+    'id', 'title', 'year', 'field', 'type_of_work', 'status', 'public_visibility',
+    'student', 'keywords', 'teachers', 'evaluation_count', 'average_score',
+    'created_at', 'updated_at',
+)
+# Znaky, kterými tabulkové procesory začínají vzorec
+CSV_FORMULA_PREFIXES = ('=', '+', '-', '@', '\t', '\r')
+
+
+class ZipStreamBuffer(io.RawIOBase):
+    """
+    Nepřevíjitelný výstup pro zipfile. Zapsaná data se po každém kroku vyzvednou
+    přes pop(), v paměti je tak nejvýše jeden chunk souboru.
+    """
+    def __init__(self):
+        self._chunks = []
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def pop(self):
+        data = b''.join(self._chunks)
+        self._chunks = []
+        return data
+
+
+def iter_zip(entries):
+    """
+    Generátor ZIP archivu. entries jsou dvojice (cesta v archivu, bytes nebo absolutní cesta k souboru).
+    Soubory se kopírují po FILE_CHUNK_SIZE a neukládají se komprimované (videa a PDF už komprimovaná jsou).
+    """
+    buffer = ZipStreamBuffer()
+    with zipfile.ZipFile(buffer, 'w', allowZip64=True) as archive:
+        for name, source in entries:
+            if isinstance(source, bytes):
+                info = zipfile.ZipInfo(name, date_time=datetime.now().timetuple()[:6])
+                info.compress_type = zipfile.ZIP_DEFLATED
+                archive.writestr(info, source)
+            else:
+                info = zipfile.ZipInfo.from_file(source, name)
+                info.compress_type = zipfile.ZIP_STORED
+                force_zip64 = info.file_size > zipfile.ZIP64_LIMIT
+                with open(source, 'rb') as src, archive.open(info, 'w', force_zip64=force_zip64) as dst:
+                    for chunk in iter(lambda: src.read(FILE_CHUNK_SIZE), b''):
+                        dst.write(chunk)
+                        yield buffer.pop()
+            yield buffer.pop()
+    # Centrální adresář se zapíše až při uzavření archivu
+    yield buffer.pop()
+
+
+def project_folder(project):
+    return f'{project.pk}-{slugify(project.title)[:50] or "projekt"}'
+
+
+def project_markdown(data):
+    """
+    Čitelný souhrn projektu (milníky, konzultace, hodnocení) z dat ProjectDetailSerializer.
+    """
+    lines = [
+        f"# {data['title']}",
+        '',
+        f"- Rok: {data['year']}",
+        f"- Obor: {data['field']}",
+        f"- Typ práce: {data['type_display']}",
+        # ReadOnlyField(source='student.username') u projektu bez studenta chybí
+        f"- Student: {data.get('student_name') or '-'}",
+        f"- Stav: {data['status_display']}",
+        f"- Klíčová slova: {', '.join(data['keywords'])}",
+        '',
+        '## Popis',
+        '',
+        data['description'],
+        '',
+        '## Učitelé',
+        '',
+    ]
+    lines += [f"- {teacher['teacher_name']} ({teacher['role_display']})" for teacher in data['teachers']] or ['-']
+    lines += ['', '## Milníky', '']
+    lines += [
+        f"- {milestone['title']} - termín {milestone['deadline']}, {milestone['status_display']}, "
+        f"splněno {milestone['completion']} %"
+        for milestone in data['milestones']
+    ] or ['-']
+    lines += ['', '## Konzultace', '']
+    for consultation in data['consultations']:
+        lines += [f"### {consultation['consultation_date']} - {consultation['teacher_name']}", '', consultation['notes'], '']
+    if not data['consultations']:
+        lines += ['-']
+    lines += ['', '## Hodnocení', '']
+    for evaluation in data['evaluations']:
+        lines += [f"### {evaluation['teacher_name']} - {evaluation['score']} bodů", '', evaluation['evaluation'], '']
+    if not data['evaluations']:
+        lines += ['-']
+    return '\n'.join(str(line) for line in lines) + '\n'
+
+
+def project_files(project):
+    """
+    Přiložené soubory projektu jako dvojice (pole, absolutní cesta). Pole souborů jsou volný text,
+    proto se berou jen cesty evidovaných blobů a jen uvnitř MEDIA_ROOT (safe_join) -
+    jinak by export přibalil libovolný soubor serveru (/etc/passwd, ../settings.py).
+    """
+    paths = {field: getattr(project, field) for field in EXPORT_FILE_FIELDS if getattr(project, field)}
+    if not paths:
+        return
+    stored = set(MediaBlob.objects.filter(path__in=paths.values()).values_list('path', flat=True))
+    for field, path in paths.items():
+        if path not in stored:
+            continue
+        try:
+            full_path = safe_join(settings.MEDIA_ROOT, path)
+        except SuspiciousFileOperation:
+            continue
+        if os.path.isfile(full_path):
+            yield field, full_path
+
+
+def project_entries(project, prefix=''):
+    """
+    Položky archivu pro jeden projekt: project.json, project.md a přiložené soubory.
+    """
+    data = ProjectDetailSerializer(project).data
+    yield f'{prefix}project.json', json.dumps(data, cls=JSONEncoder, ensure_ascii=False, indent=2).encode('utf-8')
+    yield f'{prefix}project.md', project_markdown(data).encode('utf-8')
+
+    for field, full_path in project_files(project):
+        yield f'{prefix}{field}{os.path.splitext(full_path)[1]}', full_path
+
+
+def zip_response(entries, filename):
+    response = StreamingHttpResponse(iter_zip(entries), content_type='application/zip')
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
+
+
+def project_bundle_response(project):
+    return zip_response(project_entries(project), f'{project_folder(project)}.zip')
+
+
+def projects_bundle_response(projects, filename):
+    """
+    Jeden archiv pro více projektů, každý ve vlastní složce. Projekty se načítají
+    po dávkách serverovým kurzorem, zpracovaný projekt hned uvolní paměť.
+    """
+    def entries():
+        for project in projects.iterator(chunk_size=20):
+            yield from project_entries(project, prefix=f'{project_folder(project)}/')
+    return zip_response(entries(), filename)
+
+
+class Echo:
+    """
+    Pseudo-buffer pro csv.writer - zapsaný řádek rovnou vrátí generátoru.
+    """
+    def write(self, value):
+        return value
+
+
+def project_export_rows(projects):
+    """
+    Řádky exportu projektů jako dict. Učitelé a průměrné hodnocení se dopočítají
+    korelovanými poddotazy (bez GROUP BY nad celým výsledkem), řádky se čtou
+    serverovým kurzorem po EXPORT_CHUNK_SIZE.
+    """
+    teachers = ProjectTeacher.objects.filter(project=OuterRef('pk')).order_by().values('project').annotate(
+        names=ArrayAgg(Concat(F('teacher__username'), Value(' ('), F('role'), Value(')')), ordering='assigned_at')
+    ).values('names')
+    evaluations = ProjectEvaluation.objects.filter(project=OuterRef('pk')).order_by().values('project')
+
+    rows = projects.annotate(
+        teacher_list=Subquery(teachers),
+        evaluation_count=Subquery(evaluations.annotate(value=Count('pk')).values('value'), output_field=IntegerField()),
+        average_score=Subquery(evaluations.annotate(value=Avg('score')).values('value')),
+    ).values(
+        *[field for field in PROJECT_EXPORT_FIELDS if field not in ('student', 'teachers')],
+        'teacher_list', student_name=F('student__username'),
+    )
+
+    for row in rows.iterator(chunk_size=EXPORT_CHUNK_SIZE):
+        row['student'] = row.pop('student_name')
+        row['teachers'] = row.pop('teacher_list') or []
+        row['evaluation_count'] = row['evaluation_count'] or 0
+        if row['average_score'] is not None:
+            row['average_score'] = round(float(row['average_score']), 2)
+        yield {field: row[field] for field in PROJECT_EXPORT_FIELDS}
+
+
+def csv_cell(value):
+    """
+    Hodnota buňky CSV. Text začínající znakem vzorce (=, +, -, @, tabulátor, CR)
+    dostane prefix ', aby ho Excel/LibreOffice nespustil jako vzorec (CSV injection).
+    """
+    if isinstance(value, list):
+        value = '; '.join(value)
+    elif hasattr(value, 'isoformat'):
+        return value.isoformat()
+    if isinstance(value, str) and value.startswith(CSV_FORMULA_PREFIXES):
+        return f"'{value}"
+    return value
+
+
+def iter_csv(rows, fields):
+    writer = csv.writer(Echo())
+    # BOM, aby Excel poznal UTF-8 (diakritika)
+    yield '\ufeff' + writer.writerow(fields)
+    for row in rows:
+        yield writer.writerow([csv_cell(row[field]) for field in fields])
+
+
+def iter_ndjson(rows):
+    for row in rows:
+        yield json.dumps(row, cls=JSONEncoder, ensure_ascii=False) + '\n'
+
+
+def tabular_export_response(rows, fields, export_format, filename):
+    """
+    Streamovaná odpověď CSV nebo NDJSON (export_format z EXPORT_FORMATS).
+    """
+    if export_format == 'csv':
+        response = StreamingHttpResponse(iter_csv(rows, fields), content_type='text/csv; charset=utf-8')
+    else:
+        response = StreamingHttpResponse(iter_ndjson(rows), content_type='application/x-ndjson; charset=utf-8')
+    response['Content-Disposition'] = f'attachment; filename="{filename}.{export_format}"'
+    return response
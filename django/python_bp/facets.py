@@ -0,0 +1,68 @@
+from django.db import connection
+
+from .models import Project
+
+
+# Facety se skalární hodnotou (sloupec tabulky projects)
+FACET_FIELDS = ('year', 'field', 'status', 'type_of_work')
+# Kolik nejčastějších klíčových slov se vrací
+KEYWORD_FACET_LIMIT = 50
+
+FACET_LABELS = {
+    'status': dict(Project.STATUS_CHOICES),
+    'type_of_work': dict(Project.WORK_TYPES),
+}
+
+FACETS_SQL = """
+WITH filtered AS ({filtered})
+SELECT facet, value, count FROM (
+    SELECT
+        CASE
+            WHEN GROUPING(year) = 0 THEN 'year'
+            WHEN GROUPING(field) = 0 THEN 'field'
+            WHEN GROUPING(status) = 0 THEN 'status'
+            WHEN GROUPING(type_of_work) = 0 THEN 'type_of_work'
+            ELSE 'total'
+        END AS facet,
+        COALESCE(year::text, field, status, type_of_work) AS value,
+        COUNT(*) AS count
+    FROM filtered
+    GROUP BY GROUPING SETS ((year), (field), (status), (type_of_work), ())
+    UNION ALL
+    (
+        SELECT 'keywords', keyword, COUNT(DISTINCT id)
+        FROM filtered CROSS JOIN LATERAL unnest(keywords) AS keyword
+        GROUP BY keyword
+        ORDER BY COUNT(DISTINCT id) DESC, keyword
+        LIMIT %s
+    )
+) AS facets
+ORDER BY facet, count DESC, value
+"""
+
+
+def project_facets(queryset):
+    """
+    Počty projektů pro každou hodnotu facet (rok, obor, stav, typ práce, klíčová slova)
+    nad vyfiltrovaným querysetem. Vše jedním dotazem (GROUPING SETS + unnest(keywords)).
+    """
+    filtered = queryset.order_by().values('id', 'keywords', *FACET_FIELDS)
+    filtered_sql, filtered_params = filtered.query.sql_with_params()
+
+    with connection.cursor() as cursor:
+        cursor.execute(FACETS_SQL.format(filtered=filtered_sql), (*filtered_params, KEYWORD_FACET_LIMIT))
+        rows = cursor.fetchall()
+
+    total = 0
+    facets = {facet: [] for facet in (*FACET_FIELDS, 'keywords')}
+    for facet, value, count in rows:
+        if facet == 'total':
+            total = count
+            continue
+        if value is None:
+            continue
+        item = {'value': int(value) if facet == 'year' else value, 'count': count}
+        if facet in FACET_LABELS:
+            item['label'] = FACET_LABELS[facet].get(value, value)
+        facets[facet].append(item)
+    return {'total': total, 'facets': facets}
@@ -0,0 +1,165 @@
+from abc import ABC, abstractmethod
+from collections import defaultdict
+
+from django.conf import settings
+from django.db.models import F
+from rest_framework import serializers
+
+from .derivatives import get_variant_urls, variants_ready
+from .models import Project, ProjectTeacher
+from .serializer import ProjectListSerializer, ProjectWithTeachersSerializer
+
+
+STATUS_LABELS = dict(Project.STATUS_CHOICES)
+WORK_TYPE_LABELS = dict(Project.WORK_TYPES)
+TEACHER_ROLE_LABELS = dict(ProjectTeacher.TEACHER_ROLES)
+
+# Stejný výstup jako serializers.DateTimeField (ISO 8601, aktuální časové pásmo, 'Z' pro UTC)
+format_datetime = serializers.DateTimeField().to_representation
+
+# Sloupce pro .values() - student_name se načte JOINem místo objektu User
+PROJECT_LIST_VALUES = (
+    'id', 'title', 'description', 'year', 'field', 'keywords', 'student_id', 'thumbnail',
+    'status', 'type_of_work', 'created_at', 'updated_at',
+)
+
+# Pole výstupu v pořadí ProjectListSerializer -> (potřebné hodnoty z .values(), výpočet z řádku)
+PROJECT_LIST_FIELDS = {
+    'id': (('id',), lambda row: row['id']),
+    'title': (('title',), lambda row: row['title']),
+    'description': (('description',), lambda row: row['description']),
+    'year': (('year',), lambda row: row['year']),
+    'field': (('field',), lambda row: row['field']),
+    'keywords': (('keywords',), lambda row: row['keywords']),
+    'student': (('student_id',), lambda row: row['student_id']),
+    'student_name': (('student_id', 'student_name'), lambda row: row['student_name']),
+    'thumbnail': (('thumbnail',), lambda row: row['thumbnail']),
+    'thumbnail_variants': (
+        ('thumbnail', 'thumbnail_variants_ready'),
+        lambda row: get_variant_urls(row['thumbnail'], row['thumbnail_variants_ready']),
+    ),
+    'status': (('status',), lambda row: row['status']),
+    'status_display': (('status',), lambda row: STATUS_LABELS.get(row['status'], row['status'])),
+    'type_of_work': (('type_of_work',), lambda row: row['type_of_work']),
+    'type_display': (('type_of_work',), lambda row: WORK_TYPE_LABELS.get(row['type_of_work'], row['type_of_work'])),
+    'created_at': (('created_at',), lambda row: format_datetime(row['created_at'])),
+    'updated_at': (('updated_at',), lambda row: format_datetime(row['updated_at'])),
+}
+
+
+class ValuesSerializer(ABC):
+    """
+    Rychlá čtecí náhrada ModelSerializeru nad řádky z .values() (dict).
+    Nabízí jen to, co používají list views: setup_eager_loading, many=True a .data.
+    Výstup musí mít stejný tvar jako serializér, který nahrazuje (model_serializer_class).
+    Se sparse fieldsetem (fields) se načítají jen potřebné sloupce a výstup se ořízne.
+    """
+    model_serializer_class = None
+
+    def __init__(self, instance=None, many=False, fields=None, **kwargs):
+        self.instance = instance
+        self.many = many
+        self.field_names = fields
+
+    @classmethod
+    def setup_eager_loading(cls, queryset, fields=None):
+        return queryset
+
+    @property
+    def data(self):
+        result = self.to_representation_many(list(self.instance) if self.many else [self.instance])
+        if self.field_names is not None:
+            result = [{name: item[name] for name in self.field_names if name in item} for item in result]
+        return result if self.many else result[0]
+
+    def to_representation_many(self, rows):
+        return [self.to_representation(row) for row in rows]
+
+    @abstractmethod
+    def to_representation(self, row):
+        """
+        Jeden řádek z .values() -> dict ve tvaru model_serializer_class.
+        """
+
+
+class FastProjectListSerializer(ValuesSerializer):
+    """
+    Stejný JSON jako ProjectListSerializer.
+    """
+    model_serializer_class = ProjectListSerializer
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.project_fields = [
+            (name, value) for name, (_, value) in PROJECT_LIST_FIELDS.items()
+            if self.field_names is None or name in self.field_names
+        ]
+
+    @classmethod
+    def setup_eager_loading(cls, queryset, fields=None):
+        # id potřebují i vnořené kolekce (učitelé) a stránkování
+        columns = {'id'}.union(*(
+            required for name, (required, _) in PROJECT_LIST_FIELDS.items() if fields is None or name in fields
+        ))
+        annotations = {}
+        if 'student_name' in columns:
+            annotations['student_name'] = F('student__username')
+        if 'thumbnail_variants_ready' in columns:
+            annotations['thumbnail_variants_ready'] = variants_ready('thumbnail')
+        return queryset.values(*(column for column in PROJECT_LIST_VALUES if column in columns), **annotations)
+
+    def to_representation(self, row):
+        data = {}
+        for name, value in self.project_fields:
+            # ReadOnlyField(source='student.username') pole u projektu bez studenta vynechá
+            if name == 'student_name' and row['student_id'] is None:
+                continue
+            data[name] = value(row)
+        return data
+
+
+class FastProjectWithTeachersSerializer(FastProjectListSerializer):
+    """
+    Stejný JSON jako ProjectWithTeachersSerializer. Učitelé celé stránky
+    se načtou jedním dotazem přes .values() (obdoba prefetch_related).
+    """
+    model_serializer_class = ProjectWithTeachersSerializer
+
+    def to_representation_many(self, rows):
+        if self.field_names is not None and 'teachers' not in self.field_names:
+            return super().to_representation_many(rows)
+
+        teachers = defaultdict(list)
+        # Stejné pořadí jako Prefetch v EagerLoadingMixin (podle id)
+        teacher_rows = ProjectTeacher.objects.filter(project_id__in=[row['id'] for row in rows]).order_by('pk').values(
+            'project_id', 'teacher_id', 'role', teacher_name=F('teacher__username')
+        )
+        for teacher in teacher_rows:
+            teachers[teacher['project_id']].append({
+                'teacher': teacher['teacher_id'],
+                'teacher_name': teacher['teacher_name'],
+                'role': teacher['role'],
+                'role_display': TEACHER_ROLE_LABELS.get(teacher['role'], teacher['role']),
+            })
+
+        result = []
+        for row in rows:
+            data = self.to_representation(row)
+            data['teachers'] = teachers[row['id']]
+            result.append(data)
+        return result
+
+
+FAST_SERIALIZERS = {
+    ProjectListSerializer: FastProjectListSerializer,
+    ProjectWithTeachersSerializer: FastProjectWithTeachersSerializer,
+}
+
+
+def list_serializer_class(serializer_class):
+    """
+    Serializér pro list endpoint - s FAST_LIST_SERIALIZERS rychlá varianta nad .values().
+    """
+    if settings.FAST_LIST_SERIALIZERS:
+        return FAST_SERIALIZERS.get(serializer_class, serializer_class)
+    return serializer_class
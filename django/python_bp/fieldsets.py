@@ -0,0 +1,93 @@
+import re
+from functools import lru_cache
+
+from django.core.exceptions import FieldDoesNotExist
+from drf_yasg import openapi
+from rest_framework import serializers
+from rest_framework.exceptions import ParseError
+
+
+DISPLAY_METHOD_RE = re.compile(r'get_(\w+)_display')
+
+SPARSE_FIELDSET_PARAMETERS = [
+    openapi.Parameter('fields', openapi.IN_QUERY, type=openapi.TYPE_STRING,
+                      description="Comma separated fields to return (e.g. id,title,thumbnail,year)"),
+    openapi.Parameter('expand', openapi.IN_QUERY, type=openapi.TYPE_STRING,
+                      description="Comma separated nested collections to include (e.g. teachers,milestones)"),
+]
+
+
+def _split(value):
+    return [name.strip() for name in (value or '').split(',') if name.strip()]
+
+
+@lru_cache(maxsize=None)
+def serializer_field_names(serializer_class):
+    """
+    Názvy polí serializéru v pořadí výstupu a množina vnořených kolekcí (many=True).
+    """
+    fields = serializer_class().fields
+    expandable = frozenset(name for name, field in fields.items() if isinstance(field, serializers.ListSerializer))
+    return tuple(fields), expandable
+
+
+def requested_fields(request, serializer_class, extra_expandable=()):
+    """
+    Pole vybraná parametry fields= a expand= v pořadí serializéru, None bez parametrů.
+    fields= vybírá pole (výchozí jsou všechna kromě vnořených kolekcí), expand= přidává
+    vnořené kolekce. Kolekce uvedená přímo ve fields= se také načte.
+    extra_expandable jsou kolekce, které k výstupu serializéru přidává view.
+    Rychlé serializéry (fast_serializers.py) se řídí polemi serializéru, který nahrazují.
+    """
+    fields = _split(request.query_params.get('fields'))
+    expand = _split(request.query_params.get('expand'))
+    if not fields and not expand:
+        return None
+
+    names, expandable = serializer_field_names(getattr(serializer_class, 'model_serializer_class', serializer_class))
+    names += tuple(extra_expandable)
+    expandable |= frozenset(extra_expandable)
+
+    unknown = [name for name in fields if name not in names]
+    if unknown:
+        raise ParseError(f"Unknown fields: {', '.join(unknown)}. Available: {', '.join(names)}.")
+    not_expandable = [name for name in expand if name not in expandable]
+    if not_expandable:
+        raise ParseError(f"Cannot expand: {', '.join(not_expandable)}. Expandable: {', '.join(sorted(expandable)) or '-'}.")
+
+    selected = set(fields) if fields else {name for name in names if name not in expandable}
+    selected.update(expand)
+    return tuple(name for name in names if name in selected)
+
+
+@lru_cache(maxsize=None)
+def only_fields(serializer_class, fields):
+    """
+    Cesty pro .only() potřebné pro vybraná pole: 'sloupec', u polí přes relaci
+    i 'relace__sloupec' (JOIN). Vnořené kolekce se načítají prefetchem a potřebují jen pk.
+    None, pokud některé pole nejde přeložit na sloupce (vlastní metoda, source='*'...).
+    """
+    model = serializer_class.Meta.model
+    serializer_fields = serializer_class().fields
+    paths = {model._meta.pk.name}
+    for name in fields:
+        field = serializer_fields.get(name)
+        if field is None or isinstance(field, serializers.ListSerializer):
+            continue
+        attrs = field.source_attrs
+        if not attrs or len(attrs) > 2:
+            return None
+        match = DISPLAY_METHOD_RE.fullmatch(attrs[0])
+        attr = match.group(1) if match else attrs[0]
+        try:
+            model_field = model._meta.get_field(attr)
+        except FieldDoesNotExist:
+            return None
+        if not model_field.concrete:
+            return None
+        paths.add(attr)
+        if len(attrs) == 2:
+            if not model_field.is_relation:
+                return None
+            paths.add(f'{attr}__{attrs[1]}')
+    return tuple(sorted(paths))
@@ -1,28 +1,52 @@
-import os
-import uuid
+import time
+
 from django.conf import settings
 from rest_framework import viewsets, parsers, status
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.decorators import api_view, parser_classes, permission_classes
 
+from .derivatives import DERIVATIVE_FIELDS, schedule_derivatives
+from .media_store import store_uploaded_file
+from .metrics import UPLOAD_BYTES, UPLOAD_DURATION
+
+
+# Povolené přípony pro jednotlivé typy souborů
+VALID_FILE_TYPES = {
+    'thumbnail': ['jpg', 'jpeg', 'png', 'gif'],
+    'document': ['pdf', 'doc', 'docx', 'odt'],
+    'poster': ['jpg', 'jpeg', 'png', 'pdf'],
+    'video': ['mp4', 'webm', 'ogg']
+}
 
-def get_file_path(instance, filename):
+
+def validate_file_type(file_type, file_name):
     """
-    Generuje unikátní cestu pro nahrané soubory.
+    Ověří typ souboru a jeho příponu. Vrací chybovou hlášku, nebo None.
     """
-    ext = filename.split('.')[-1]
-    filename = f"{uuid.uuid4()}.{ext}"
+    if file_type not in VALID_FILE_TYPES:
+        return 'Neplatný typ souboru'
     
-    if instance == 'thumbnails':
-        return os.path.join('thumbnails', filename)
-    elif instance == 'documents':
-        return os.path.join('documents', filename)
-    elif instance == 'posters':
-        return os.path.join('posters', filename)
-    elif instance == 'videos':
-        return os.path.join('videos', filename)
-    return filename
+    ext = file_name.split('.')[-1].lower()
+    if ext not in VALID_FILE_TYPES[file_type]:
+        return f'Neplatná přípona souboru. Povolené přípony jsou: {", ".join(VALID_FILE_TYPES[file_type])}.'
+    return None
+
+
+def get_file_url(file_path):
+    return f"{settings.MEDIA_URL.rstrip('/')}/{file_path}"
+
+
+def blob_response_data(blob):
+    """
+    Odpověď po nahrání souboru - file_path se ukládá do polí projektu.
+    """
+    return {
+        'file_path': blob.path,
+        'url': get_file_url(blob.path),
+        'size': blob.size,
+        'sha256': blob.sha256,
+    }
 
 
 @api_view(['POST'])
@@ -33,61 +57,36 @@ def upload_file(request):
     API view pro nahrávání souborů.
     Podporuje nahrávání obrázků (thumbnail, poster), dokumentů a videí.
     """
-    if 'file' not in request.FILES:
-        return Response({'error': 'Žádný soubor nebyl nahrán'}, status=status.HTTP_400_BAD_REQUEST)
+    # request.FILES parsuje tělo requestu až zde, doba zahrnuje i příjem souboru
+    started = time.perf_counter()
+    files = request.FILES
     
-    file = request.FILES['file']
-    file_type = request.data.get('type', '')
-    
-    # Kontrola velikosti souboru
-    if file.size > settings.MAX_UPLOAD_SIZE:
+    # Kontrola velikosti souboru (StreamingFileUploadHandler přenos ukončí hned po překročení limitu)
+    if getattr(request, 'upload_too_large', False) or ('file' in files and files['file'].size > settings.MAX_UPLOAD_SIZE):
         return Response(
             {'error': f'Soubor je příliš velký. Maximální povolená velikost je {settings.MAX_UPLOAD_SIZE / (1024 * 1024)} MB.'},
             status=status.HTTP_400_BAD_REQUEST
         )
     
-    # Kontrola typu souboru
-    valid_file_types = {
-        'thumbnail': ['jpg', 'jpeg', 'png', 'gif'],
-        'document': ['pdf', 'doc', 'docx', 'odt'],
-        'poster': ['jpg', 'jpeg', 'png', 'pdf'],
-        'video': ['mp4', 'webm', 'ogg']
-    }
-    
-    if file_type not in valid_file_types:
-        return Response({'error': 'Neplatný typ souboru'}, status=status.HTTP_400_BAD_REQUEST)
-    
-    # Kontrola přípony souboru
-    ext = file.name.split('.')[-1].lower()
-    if ext not in valid_file_types[file_type]:
-        return Response(
-            {'error': f'Neplatná přípona souboru. Povolené přípony jsou: {", ".join(valid_file_types[file_type])}.'},
-            status=status.HTTP_400_BAD_REQUEST
-        )
+    if 'file' not in files:
+        return Response({'error': 'Žádný soubor nebyl nahrán'}, status=status.HTTP_400_BAD_REQUEST)
     
-    # Uložení souboru
-    file_path = None
-    if file_type == 'thumbnail':
-        file_path = get_file_path('thumbnails', file.name)
-        path = os.path.join(settings.MEDIA_ROOT, file_path)
-    elif file_type == 'document':
-        file_path = get_file_path('documents', file.name)
-        path = os.path.join(settings.MEDIA_ROOT, file_path)
-    elif file_type == 'poster':
-        file_path = get_file_path('posters', file.name)
-        path = os.path.join(settings.MEDIA_ROOT, file_path)
-    elif file_type == 'video':
-        file_path = get_file_path('videos', file.name)
-        path = os.path.join(settings.MEDIA_ROOT, file_path)
+    file = files['file']
+    file_type = request.data.get('type', '')
     
-    # Vytvoření adresáře, pokud neexistuje
-    os.makedirs(os.path.dirname(path), exist_ok=True)
+    # Kontrola typu souboru a přípony
+    error = validate_file_type(file_type, file.name)
+    if error:
+        return Response({'error': error}, status=status.HTTP_400_BAD_REQUEST)
     
-    # Zápis souboru
-    with open(path, 'wb+') as destination:
-        for chunk in file.chunks():
-            destination.write(chunk)
+    # Uložení souboru - stejný obsah se uloží jen jednou (media_store.py)
+    blob = store_uploaded_file(file, request.user)
+    UPLOAD_BYTES.observe(file.size, type=file_type)
+    UPLOAD_DURATION.observe(time.perf_counter() - started, type=file_type)
     
+    # Zmenšené varianty obrázků se generují na pozadí (derivatives.py)
+    if file_type in DERIVATIVE_FIELDS:
+        schedule_derivatives(blob.path)
+
     # Vrácení cesty k souboru
-    file_url = f"{settings.MEDIA_URL.rstrip('/')}/{file_path}"
-    return Response({'file_path': file_path, 'url': file_url}, status=status.HTTP_201_CREATED)
\ No newline at end of file
+    return Response(blob_response_data(blob), status=status.HTTP_201_CREATED)
\ No newline at end of file
@@ -0,0 +1,178 @@
+import re
+import threading
+from collections import Counter
+
+from django.conf import settings
+from django.contrib.postgres.search import TrigramSimilarity
+from django.db.models import Count, F, Max, Value
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+from .models import Keyword, Project
+
+
+# Počet návrhů uložených v každém uzlu trie
+TRIE_TOP_N = 10
+# Od jaké délky dotazu se doplňuje podobnostní (trigramové) hledání
+TRIGRAM_MIN_LENGTH = 3
+
+WHITESPACE_RE = re.compile(r'\s+')
+
+
+def normalize_keyword(value):
+    return WHITESPACE_RE.sub(' ', value).strip().casefold()[:100]
+
+
+def project_keywords(keywords):
+    """
+    Normalizovaná slova projektu (každé nejvýše jednou) -> původní tvar.
+    """
+    result = {}
+    for keyword in keywords or []:
+        normalized = normalize_keyword(keyword)
+        if normalized and normalized not in result:
+            result[normalized] = WHITESPACE_RE.sub(' ', keyword).strip()
+    return result
+
+
+def update_keyword_usage(added, removed):
+    """
+    Upraví usage_count podle změny klíčových slov projektu.
+    added je dict normalizovaný tvar -> původní tvar, removed množina normalizovaných tvarů.
+    """
+    added_keys = set(added) - set(removed)
+    removed_keys = set(removed) - set(added)
+    if not added_keys and not removed_keys:
+        return
+
+    # update() auto_now nenastaví - updated_at je verze slovníku (get_keyword_trie)
+    now = timezone.now()
+    if added_keys:
+        Keyword.objects.bulk_create(
+            [Keyword(normalized=key, name=added[key][:100]) for key in added_keys],
+            ignore_conflicts=True,
+        )
+        Keyword.objects.filter(normalized__in=added_keys).update(usage_count=F('usage_count') + 1, updated_at=now)
+    if removed_keys:
+        Keyword.objects.filter(normalized__in=removed_keys).update(
+            usage_count=Greatest(F('usage_count') - 1, Value(0)), updated_at=now
+        )
+
+
+def rebuild_keyword_counts():
+    """
+    Přepočítá celý slovník z nesmazaných projektů (oprava po hromadných změnách přes update()).
+    Vrací počet použitých slov.
+    """
+    counts = Counter()
+    names = {}
+    rows = Project.objects.filter(deleted=False).order_by().values_list('keywords', flat=True)
+    for keywords in rows.iterator(chunk_size=2000):
+        for key, name in project_keywords(keywords).items():
+            counts[key] += 1
+            names.setdefault(key, name)
+
+    Keyword.objects.bulk_create(
+        [Keyword(normalized=key, name=name[:100]) for key, name in names.items()],
+        ignore_conflicts=True,
+    )
+    changed = []
+    now = timezone.now()
+    for keyword in Keyword.objects.only('pk', 'normalized', 'usage_count').iterator(chunk_size=2000):
+        if keyword.usage_count != counts[keyword.normalized]:
+            keyword.usage_count = counts[keyword.normalized]
+            keyword.updated_at = now
+            changed.append(keyword)
+    Keyword.objects.bulk_update(changed, ['usage_count', 'updated_at'], batch_size=1000)
+    return len(counts)
+
+
+def get_keywords_version():
+    """
+    Verze slovníku odvozená z DB - max(updated_at) a počet slov. Na rozdíl od tokenu
+    v LocMem cache ji vidí všechny procesy; max(updated_at) čte index keywords_updated_idx.
+    """
+    stats = Keyword.objects.order_by().aggregate(updated_at=Max('updated_at'), count=Count('pk'))
+    return stats['updated_at'], stats['count']
+
+
+class KeywordTrie:
+    """
+    Prefixový strom nad normalizovanými slovy. Každý uzel drží nejvýše TRIE_TOP_N
+    nejpoužívanějších slov svého podstromu, dotaz je tak O(délka prefixu).
+    """
+    def __init__(self, keywords):
+        self.root = {}
+        # keywords musí být seřazené od nejpoužívanějšího - první zápisy do uzlu vyhrávají
+        for normalized, name, usage_count in keywords:
+            node = self.root
+            for char in normalized:
+                node = node.setdefault(char, {})
+                top = node.setdefault('', [])
+                if len(top) < TRIE_TOP_N:
+                    top.append((name, usage_count))
+
+    def lookup(self, prefix, limit):
+        node = self.root
+        for char in prefix:
+            node = node.get(char)
+            if node is None:
+                return []
+        return node.get('', [])[:limit]
+
+
+_trie = None
+_trie_version = None
+_trie_lock = threading.Lock()
+
+
+def get_keyword_trie():
+    """
+    Trie v paměti procesu. Při změně slovníku (jiná verze, get_keywords_version) se postaví znovu.
+    Příliš velký slovník (KEYWORD_TRIE_MAX_SIZE) se v paměti nedrží, vrací None.
+    """
+    global _trie, _trie_version
+    version = get_keywords_version()
+
+    if _trie is not None and _trie_version == version:
+        return _trie or None
+
+    with _trie_lock:
+        if _trie is None or _trie_version != version:
+            keywords = Keyword.objects.filter(usage_count__gt=0).order_by('-usage_count', 'normalized')
+            rows = list(keywords.values_list('normalized', 'name', 'usage_count')[:settings.KEYWORD_TRIE_MAX_SIZE + 1])
+            _trie = KeywordTrie(rows) if len(rows) <= settings.KEYWORD_TRIE_MAX_SIZE else False
+            _trie_version = version
+    return _trie or None
+
+
+def suggest_keywords(query, limit=TRIE_TOP_N):
+    """
+    Návrhy klíčových slov: nejdřív prefixová shoda (trie, případně index LIKE 'x%'),
+    od TRIGRAM_MIN_LENGTH znaků doplněná o podobná slova (pg_trgm) kvůli překlepům.
+    """
+    normalized = normalize_keyword(query)
+    if not normalized:
+        return []
+    limit = min(limit, TRIE_TOP_N)
+
+    trie = get_keyword_trie()
+    if trie is not None:
+        matches = trie.lookup(normalized, limit)
+    else:
+        matches = list(
+            Keyword.objects.filter(normalized__startswith=normalized, usage_count__gt=0)
+            .order_by('-usage_count', 'normalized').values_list('name', 'usage_count')[:limit]
+        )
+    suggestions = [{'keyword': name, 'count': count} for name, count in matches]
+
+    if len(suggestions) < limit and len(normalized) >= TRIGRAM_MIN_LENGTH:
+        similar = (
+            Keyword.objects.filter(normalized__trigram_similar=normalized, usage_count__gt=0)
+            .exclude(normalized__startswith=normalized)
+            .annotate(similarity=TrigramSimilarity('normalized', normalized))
+            .order_by('-similarity', '-usage_count')
+            .values_list('name', 'usage_count')[:limit - len(suggestions)]
+        )
+        suggestions += [{'keyword': name, 'count': count} for name, count in similar]
+    return suggestions
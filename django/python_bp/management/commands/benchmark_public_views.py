@@ -0,0 +1,145 @@
+import asyncio
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from asgiref.sync import ThreadSensitiveContext, sync_to_async
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.http import QueryDict
+from django.test import AsyncRequestFactory, RequestFactory
+
+from python_bp import async_views, views
+from python_bp.models import Project
+
+
+ENDPOINTS = {
+    'list': ('public_projects_list', '/public/projects/'),
+    'facets': ('public_projects_facets', '/public/projects/facets/'),
+    'detail': ('public_project_detail', '/public/projects/{pk}/'),
+}
+
+
+class Command(BaseCommand):
+    help = (
+        'Porovná sync (views.py) a async (async_views.py) implementaci veřejného endpointu: '
+        'sync view ve vláknech jako WSGI worker, sync view přes sync_to_async jako pod ASGI '
+        'a async view v jednom event loopu. Vypíše propustnost a latence.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--endpoint', choices=sorted(ENDPOINTS), default='list')
+        parser.add_argument('--pk', type=int, help='Id veřejného projektu pro detail (výchozí první veřejný).')
+        parser.add_argument('--query', default='', help='Query string, např. "year=2024&search=robot".')
+        parser.add_argument('--requests', type=int, default=500, help='Počet requestů na režim.')
+        parser.add_argument('--concurrency', type=int, default=50, help='Počet souběžných requestů (vláken WSGI).')
+        parser.add_argument('--cold', action='store_true',
+                            help='Každý request s jiným query stringem - měří se bez veřejné cache.')
+
+    def handle(self, *args, **options):
+        name, path = ENDPOINTS[options['endpoint']]
+        kwargs = {}
+        if options['endpoint'] == 'detail':
+            pk = options['pk'] or Project.objects.filter(public_visibility=True, deleted=False).values_list(
+                'pk', flat=True
+            ).first()
+            if pk is None:
+                raise CommandError('Není žádný veřejný projekt.')
+            kwargs['pk'] = pk
+            path = path.format(pk=pk)
+
+        self.path = path
+        self.kwargs = kwargs
+        self.query = options['query']
+        self.cold = options['cold']
+        total, concurrency = options['requests'], options['concurrency']
+
+        sync_view = getattr(views, name)
+        async_view = getattr(async_views, name)
+        results = [
+            ('wsgi (sync, vlákna)', self.run_threads(sync_view, total, concurrency)),
+            ('asgi (sync_to_async)', asyncio.run(self.run_async(sync_to_async(self.call_sync(sync_view)), total, concurrency))),
+            ('asgi (async views)', asyncio.run(self.run_async(self.call_async(async_view), total, concurrency))),
+        ]
+
+        self.stdout.write(f'{path} - {total} requestů, souběžnost {concurrency}{", bez cache" if self.cold else ""}')
+        for label, (elapsed, latencies, errors) in results:
+            latencies.sort()
+            self.stdout.write(
+                f'{label:<22} {total / elapsed:8.1f} req/s   '
+                f'p50 {self.percentile(latencies, 50):7.1f} ms   '
+                f'p95 {self.percentile(latencies, 95):7.1f} ms   '
+                f'p99 {self.percentile(latencies, 99):7.1f} ms   '
+                f'chyb {errors}'
+            )
+
+    def get_query(self, index):
+        query = QueryDict(self.query, mutable=True)
+        if self.cold:
+            query['_bench'] = f'{time.monotonic_ns()}-{index}'
+        return query
+
+    def call_sync(self, view):
+        factory = RequestFactory()
+
+        def call(index):
+            response = view(factory.get(self.path, self.get_query(index)), **self.kwargs)
+            if hasattr(response, 'render'):
+                response.render()
+            return response
+        return call
+
+    def call_async(self, view):
+        factory = AsyncRequestFactory()
+
+        async def call(index):
+            return await view(factory.get(self.path, self.get_query(index)), **self.kwargs)
+        return call
+
+    def run_threads(self, view, total, concurrency):
+        call = self.call_sync(view)
+
+        def timed(index):
+            started = time.perf_counter()
+            try:
+                status_code = call(index).status_code
+            finally:
+                connections.close_all()
+            return (time.perf_counter() - started) * 1000, status_code
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            measurements = list(executor.map(timed, range(total)))
+        return self.summarize(started, measurements)
+
+    async def run_async(self, call, total, concurrency):
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def timed(index):
+            async with semaphore:
+                # Jako ASGI handler - každý request má vlastní vlákno pro synchronní kód
+                async with ThreadSensitiveContext():
+                    started = time.perf_counter()
+                    response = await call(index)
+                    elapsed = (time.perf_counter() - started) * 1000
+                    await sync_to_async(connections.close_all)()
+                    return elapsed, response.status_code
+
+        started = time.perf_counter()
+        measurements = await asyncio.gather(*(timed(index) for index in range(total)))
+        return self.summarize(started, measurements)
+
+    @staticmethod
+    def summarize(started, measurements):
+        elapsed = time.perf_counter() - started
+        latencies = [latency for latency, _ in measurements]
+        errors = sum(1 for _, status_code in measurements if status_code >= 400)
+        return elapsed, latencies, errors
+
+    @staticmethod
+    def percentile(values, percent):
+        if not values:
+            return 0.0
+        if len(values) == 1:
+            return values[0]
+        return statistics.quantiles(values, n=100, method='inclusive')[percent - 1]
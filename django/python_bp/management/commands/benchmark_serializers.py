@@ -0,0 +1,83 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from python_bp.fast_serializers import FAST_SERIALIZERS, PROJECT_LIST_VALUES, FastProjectListSerializer
+from python_bp.models import Project, User
+from python_bp.serializer import ProjectListSerializer
+
+
+class Command(BaseCommand):
+    help = (
+        'Změří cenu serializace jednoho řádku seznamu projektů: ModelSerializer nad instancemi '
+        'vs. rychlý serializér nad .values() (fast_serializers.py). Bez --db jen CPU serializace '
+        'nad řádky v paměti, s --db včetně dotazu nad skutečnými daty.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--page-size', type=int, default=20, help='Velikost stránky.')
+        parser.add_argument('--pages', type=int, default=2000, help='Počet serializovaných stránek.')
+        parser.add_argument('--db', action='store_true', help='Načítat stránky z databáze (nesmazané projekty).')
+
+    def handle(self, *args, **options):
+        page_size, pages = options['page_size'], options['pages']
+        if options['db']:
+            for serializer_class, fast_class in FAST_SERIALIZERS.items():
+                queryset = Project.objects.filter(deleted=False).order_by('-year', 'title', 'id')
+                if not queryset.exists():
+                    raise CommandError('V databázi nejsou žádné projekty.')
+                self.compare(
+                    serializer_class.__name__,
+                    lambda: serializer_class(serializer_class.setup_eager_loading(queryset)[:page_size], many=True).data,
+                    lambda: fast_class(fast_class.setup_eager_loading(queryset)[:page_size], many=True).data,
+                    pages, page_size,
+                )
+            return
+
+        instances, rows = self.make_page(page_size)
+        # Výstupy se musí shodovat, jinak by srovnání nemělo smysl
+        if ProjectListSerializer(instances, many=True).data != FastProjectListSerializer(rows, many=True).data:
+            raise CommandError('Rychlý serializér vrací jiná data než ProjectListSerializer.')
+        self.compare(
+            'ProjectListSerializer',
+            lambda: ProjectListSerializer(instances, many=True).data,
+            lambda: FastProjectListSerializer(rows, many=True).data,
+            pages, page_size,
+        )
+
+    def compare(self, label, model_serialize, fast_serialize, pages, page_size):
+        model_cost = self.measure(model_serialize, pages, page_size)
+        fast_cost = self.measure(fast_serialize, pages, page_size)
+        self.stdout.write(
+            f'{label}: ModelSerializer {model_cost:.1f} µs/řádek, '
+            f'values() {fast_cost:.1f} µs/řádek ({model_cost / fast_cost:.1f}× rychlejší)'
+        )
+
+    @staticmethod
+    def measure(serialize, pages, page_size):
+        serialize()
+        started = time.perf_counter()
+        for _ in range(pages):
+            serialize()
+        return (time.perf_counter() - started) / (pages * page_size) * 1_000_000
+
+    @staticmethod
+    def make_page(page_size):
+        """
+        Stránka projektů v paměti - instance se studentem (jako po select_related) a stejné řádky jako dict.
+        """
+        now = timezone.now()
+        instances, rows = [], []
+        for index in range(page_size):
+            student = User(id=index + 1, username=f'student{index}', role='student')
+            project = Project(
+                id=index + 1, title=f'Projekt {index}', description='Popis projektu ' * 20, year=2024,
+                field='Informatika', keywords=['python', 'robotika', 'ekologie'], student=student,
+                thumbnail=None, status='submitted', type_of_work='SOČ', created_at=now, updated_at=now,
+            )
+            instances.append(project)
+            row = {field: getattr(project, field) for field in PROJECT_LIST_VALUES}
+            row['student_name'] = student.username
+            rows.append(row)
+        return instances, rows
@@ -0,0 +1,20 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from python_bp.similarity import rebuild_similarities
+
+
+class Command(BaseCommand):
+    help = (
+        'Přepočítá tabulku podobných projektů a uložené TF-IDF vektory (název, popis, klíčová slova). '
+        'Průběžně je udržují signály, plný přepočet je potřeba po nasazení, importu dat nebo změně vah '
+        'a občas i kvůli sjednocení IDF uložených vektorů.'
+    )
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        count = rebuild_similarities()
+        self.stdout.write(self.style.SUCCESS(
+            f'Zpracováno projektů: {count} za {time.monotonic() - started:.1f} s.'
+        ))
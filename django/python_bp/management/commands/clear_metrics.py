@@ -0,0 +1,32 @@
+import glob
+import os
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from python_bp.metrics import merge_dead_process_files
+
+
+class Command(BaseCommand):
+    help = (
+        'Smaže soubory metrik procesů v METRICS_DIR. Spouštět před startem serveru - '
+        'soubory ukončených workerů se jinak dál sčítají do /metrics/. S --dead za běhu '
+        'jen sloučí soubory ukončených procesů do jednoho (např. z cronu po restartech workerů).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dead', action='store_true',
+            help='Nesmazat nic, jen sloučit soubory ukončených procesů (čítače zůstanou zachované).',
+        )
+
+    def handle(self, *args, **options):
+        if options['dead']:
+            merged = merge_dead_process_files()
+            self.stdout.write(self.style.SUCCESS(f'Sloučeno: {merged} souborů ukončených procesů.'))
+            return
+
+        paths = glob.glob(os.path.join(settings.METRICS_DIR, 'metrics_*.db'))
+        for path in paths:
+            os.remove(path)
+        self.stdout.write(self.style.SUCCESS(f'Smazáno: {len(paths)} souborů metrik.'))
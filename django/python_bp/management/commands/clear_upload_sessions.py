@@ -0,0 +1,63 @@
+import os
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from python_bp.models import UploadSession
+from python_bp.resumable_upload import delete_session
+from python_bp.upload_handlers import get_staging_dir
+
+
+class Command(BaseCommand):
+    help = (
+        'Smaže nedokončené obnovitelné uploady starší než UPLOAD_SESSION_MAX_AGE_HOURS '
+        'a osiřelé dočasné soubory ve staging adresáři.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--max-age-hours', type=int, default=settings.UPLOAD_SESSION_MAX_AGE_HOURS,
+            help='Stáří (od poslední zapsané části), po kterém se upload považuje za opuštěný.',
+        )
+        parser.add_argument('--dry-run', action='store_true', help='Pouze vypíše, co by se smazalo.')
+
+    def handle(self, *args, **options):
+        dry_run = options['dry_run']
+        max_age = timedelta(hours=options['max_age_hours'])
+        cutoff = timezone.now() - max_age
+
+        stale_sessions = UploadSession.objects.filter(updated_at__lt=cutoff)
+        session_count = 0
+        for session in stale_sessions.iterator():
+            session_count += 1
+            if not dry_run:
+                delete_session(session)
+
+        # .part a .chunk soubory po přerušených requestech a .session soubory bez záznamu v DB
+        active_ids = {str(pk) for pk in UploadSession.objects.values_list('id', flat=True)}
+        staging_dir = get_staging_dir()
+        file_count = 0
+        if os.path.isdir(staging_dir):
+            cutoff_timestamp = time.time() - max_age.total_seconds()
+            for entry in os.scandir(staging_dir):
+                if not entry.is_file():
+                    continue
+                name, ext = os.path.splitext(entry.name)
+                if ext == '.session' and name in active_ids:
+                    continue
+                if ext not in ('.part', '.chunk', '.session') or entry.stat().st_mtime >= cutoff_timestamp:
+                    continue
+                file_count += 1
+                if not dry_run:
+                    try:
+                        os.remove(entry.path)
+                    except FileNotFoundError:
+                        pass
+
+        prefix = 'Ke smazání' if dry_run else 'Smazáno'
+        self.stdout.write(self.style.SUCCESS(
+            f'{prefix}: {session_count} uploadů, {file_count} dočasných souborů.'
+        ))
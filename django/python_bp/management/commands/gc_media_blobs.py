@@ -0,0 +1,114 @@
+import os
+from collections import Counter
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from python_bp.derivatives import delete_derivatives
+from python_bp.media_store import BLOB_DIR, PROJECT_MEDIA_FIELDS
+from python_bp.models import MediaBlob, Project
+
+
+BATCH_SIZE = 1000
+
+
+class Command(BaseCommand):
+    help = (
+        'Přepočítá ref_count blobů podle polí projektů a smaže bloby, na které už žádný '
+        'projekt neodkazuje. Smazané projekty starší než retenční doba se nepočítají.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--retention-days', type=int, default=settings.MEDIA_DELETED_RETENTION_DAYS,
+            help='Jak dlouho drží soft-deleted projekt své soubory (od poslední změny).',
+        )
+        parser.add_argument(
+            '--grace-hours', type=int, default=settings.MEDIA_BLOB_GRACE_HOURS,
+            help='Nově nahrané bloby bez odkazu se mažou až po této době.',
+        )
+        parser.add_argument('--dry-run', action='store_true', help='Pouze vypíše, co by se smazalo.')
+
+    def handle(self, *args, **options):
+        dry_run = options['dry_run']
+        now = timezone.now()
+        expired_projects = Project.objects.filter(
+            deleted=True, updated_at__lt=now - timedelta(days=options['retention_days'])
+        )
+
+        with transaction.atomic():
+            if not dry_run:
+                # Projekt po retenční době už soubory nepotřebuje - odkazy odstraníme,
+                # aby po smazání blobů nezůstaly neplatné cesty (update() nemění updated_at)
+                expired_count = expired_projects.update(**{field: None for field in PROJECT_MEDIA_FIELDS})
+            else:
+                expired_count = expired_projects.count()
+            refs = self.count_references(expired_projects if dry_run else None)
+            fixed = self.reconcile(refs, dry_run)
+
+        cutoff = now - timedelta(hours=options['grace_hours'])
+        candidates = MediaBlob.objects.filter(ref_count=0, updated_at__lt=cutoff)
+        if dry_run:
+            # ref_count se v dry-run nepřepisuje, kandidáty určí spočítané odkazy
+            candidates = MediaBlob.objects.filter(updated_at__lt=cutoff).exclude(path__in=list(refs))
+
+        removed = freed = 0
+        for blob in candidates.iterator():
+            if not dry_run:
+                # Podmínky se ověří znovu - mezitím mohl blob získat odkaz nebo ho někdo
+                # znovu nahrál (_store_blob posune jen updated_at)
+                deleted, _ = MediaBlob.objects.filter(pk=blob.pk, ref_count=0, updated_at__lt=cutoff).delete()
+                if not deleted:
+                    continue
+                try:
+                    os.remove(os.path.join(settings.MEDIA_ROOT, blob.path))
+                except FileNotFoundError:
+                    pass
+                delete_derivatives(blob.path)
+            removed += 1
+            freed += blob.size
+
+        prefix = 'Ke smazání' if dry_run else 'Smazáno'
+        self.stdout.write(self.style.SUCCESS(
+            f'Projektů po retenční době: {expired_count}, opravených ref_count: {fixed}. '
+            f'{prefix}: {removed} blobů ({freed / (1024 * 1024):.1f} MB).'
+        ))
+
+    def count_references(self, excluded_projects=None):
+        """
+        Spočítá odkazy na bloby ze všech polí souborů projektů.
+        """
+        projects = Project.objects.all()
+        if excluded_projects is not None:
+            projects = projects.exclude(pk__in=excluded_projects.values('pk'))
+
+        refs = Counter()
+        for field in PROJECT_MEDIA_FIELDS:
+            rows = projects.filter(**{f'{field}__startswith': f'{BLOB_DIR}/'}).order_by().values_list(field)
+            for path, in rows.iterator(chunk_size=BATCH_SIZE):
+                refs[path] += 1
+        return refs
+
+    def reconcile(self, refs, dry_run):
+        """
+        Srovná ref_count se skutečným počtem odkazů. Vrací počet opravených blobů.
+        """
+        changed = []
+        fixed = 0
+        for blob in MediaBlob.objects.only('pk', 'path', 'ref_count').iterator(chunk_size=BATCH_SIZE):
+            if blob.ref_count != refs[blob.path]:
+                fixed += 1
+                blob.ref_count = refs[blob.path]
+                changed.append(blob)
+            if len(changed) >= BATCH_SIZE:
+                self.save_ref_counts(changed, dry_run)
+                changed = []
+        self.save_ref_counts(changed, dry_run)
+        return fixed
+
+    def save_ref_counts(self, blobs, dry_run):
+        if blobs and not dry_run:
+            MediaBlob.objects.bulk_update(blobs, ['ref_count'])
@@ -0,0 +1,58 @@
+from concurrent.futures import FIRST_COMPLETED, wait
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from python_bp.derivatives import DERIVATIVE_FIELDS, generate_derivatives, is_image
+from python_bp.models import Project
+from python_bp.tasks import get_executor
+
+
+class Command(BaseCommand):
+    help = (
+        'Dogeneruje zmenšené varianty (WebP/JPEG) pro existující náhledy a postery projektů. '
+        'Již existující varianty přeskočí, pokud není zadáno --force.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--force', action='store_true', help='Přegeneruje i existující varianty.')
+        parser.add_argument(
+            '--field', choices=DERIVATIVE_FIELDS, action='append',
+            help='Omezí zpracování na dané pole (lze zadat vícekrát).',
+        )
+
+    def handle(self, *args, **options):
+        paths = set()
+        for field in options['field'] or DERIVATIVE_FIELDS:
+            values = Project.objects.exclude(**{f'{field}__isnull': True}).exclude(**{field: ''})
+            for path in values.order_by().values_list(field, flat=True).distinct().iterator():
+                if is_image(path):
+                    paths.add(path)
+
+        executor = get_executor()
+        # Do poolu posíláme nejvýše 2x tolik úloh, kolik je procesů - paměť zůstává omezená
+        max_pending = settings.BACKGROUND_WORKERS * 2
+        pending = {}
+        written = failed = 0
+
+        def collect(done):
+            nonlocal written, failed
+            for future in done:
+                path = pending.pop(future)
+                try:
+                    written += future.result()[0]
+                except Exception as error:
+                    failed += 1
+                    self.stderr.write(f'{path}: {error}')
+
+        for path in sorted(paths):
+            if len(pending) >= max_pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                collect(done)
+            future = executor.submit(generate_derivatives, settings.MEDIA_ROOT, path, options['force'])
+            pending[future] = path
+        collect(wait(pending)[0])
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Zpracováno obrázků: {len(paths)}, zapsáno variant: {written}, chyb: {failed}.'
+        ))
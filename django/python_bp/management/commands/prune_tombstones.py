@@ -0,0 +1,33 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from python_bp.models import Tombstone
+
+
+class Command(BaseCommand):
+    help = (
+        'Smaže tombstony delta synchronizace starší než SYNC_TOMBSTONE_RETENTION_DAYS. '
+        'Klienti se starším kurzorem dostanou 410 a synchronizují vše znovu.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--retention-days', type=int, default=settings.SYNC_TOMBSTONE_RETENTION_DAYS,
+            help='Stáří, po kterém se tombstone smaže (musí odpovídat nastavení serveru).',
+        )
+        parser.add_argument('--dry-run', action='store_true', help='Pouze vypíše, co by se smazalo.')
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(days=options['retention_days'])
+        expired = Tombstone.objects.filter(deleted_at__lt=cutoff)
+
+        if options['dry_run']:
+            count = expired.count()
+        else:
+            count, _ = expired.delete()
+
+        prefix = 'Ke smazání' if options['dry_run'] else 'Smazáno'
+        self.stdout.write(self.style.SUCCESS(f'{prefix}: {count} tombstonů.'))
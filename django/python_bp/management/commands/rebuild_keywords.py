@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from python_bp.keywords import rebuild_keyword_counts
+
+
+class Command(BaseCommand):
+    help = (
+        'Přepočítá slovník klíčových slov (usage_count) z nesmazaných projektů. '
+        'Potřeba jen po hromadných změnách mimo save(), např. QuerySet.update().'
+    )
+
+    def handle(self, *args, **options):
+        count = rebuild_keyword_counts()
+        self.stdout.write(self.style.SUCCESS(f'Slovník obsahuje {count} použitých klíčových slov.'))
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from python_bp.models import Project
+from python_bp.search import update_search_vector
+
+
+class Command(BaseCommand):
+    help = (
+        'Přepočítá search_vector všech projektů. Potřeba po hromadných změnách mimo save() '
+        '(QuerySet.update(), bulk_create) a po změně PROJECT_SEARCH_CONFIG.'
+    )
+
+    def handle(self, *args, **options):
+        count = update_search_vector(Project.objects.all())
+        self.stdout.write(self.style.SUCCESS(f'Přepočítáno: {count} projektů.'))
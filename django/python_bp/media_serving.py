@@ -0,0 +1,195 @@
+import mimetypes
+import os
+import re
+
+from django.conf import settings
+from django.db.models import Q
+from django.http import FileResponse, Http404, HttpResponse
+from django.utils._os import safe_join
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+from django.views.decorators.http import require_http_methods
+
+from .access import ProjectAccess
+from .authentication import authenticate_request
+from .derivatives import DERIVATIVE_DIR, DERIVATIVE_FIELDS
+from .media_store import PROJECT_MEDIA_FIELDS
+from .models import MediaBlob, Project
+
+
+RANGE_RE = re.compile(r'^bytes=(?P<start>\d*)-(?P<end>\d*)$')
+STREAM_BLOCK_SIZE = 256 * 1024
+
+
+class RangeFileWrapper:
+    """
+    Čte ze souboru nejvýše length bajtů od aktuální pozice.
+    fileno() zůstává dostupné, takže server s wsgi.file_wrapper může použít os.sendfile
+    (délku omezí hlavička Content-Length).
+    """
+    def __init__(self, file, length):
+        self.file = file
+        self.remaining = length
+
+    def read(self, size=-1):
+        if self.remaining <= 0:
+            return b''
+        if size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.file.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def fileno(self):
+        return self.file.fileno()
+
+    def close(self):
+        self.file.close()
+
+
+def parse_range(header, size):
+    """
+    Vrací (start, end) pro jediný rozsah bytes=..., None pokud hlavičku ignorujeme
+    (chybí nebo obsahuje více rozsahů) a False, pokud rozsah nelze splnit.
+    """
+    match = RANGE_RE.match(header.replace(' ', '')) if header else None
+    if not match:
+        return None
+    start, end = match.group('start'), match.group('end')
+    if not start:
+        # bytes=-500 = posledních 500 bajtů
+        if not end or int(end) == 0:
+            return False
+        return max(size - int(end), 0), size - 1
+    start = int(start)
+    end = min(int(end), size - 1) if end else size - 1
+    if start >= size or start > end:
+        return False
+    return start, end
+
+
+def media_source_condition(path, fields):
+    """
+    Podmínka na pole fields odkazující na path. U variant obrázků
+    (derivatives/<zdroj bez přípony>/...) podmínka na zdrojový obrázek.
+    """
+    condition = Q()
+    if path.startswith(f'{DERIVATIVE_DIR}/'):
+        source = os.path.dirname(path)[len(DERIVATIVE_DIR) + 1:]
+        for field in fields:
+            condition |= Q(**{f'{field}__startswith': f'{source}.'})
+    else:
+        for field in fields:
+            condition |= Q(**{field: path})
+    return condition
+
+
+def media_projects(path):
+    """
+    Nesmazané projekty, jejichž pole souborů odkazují na path.
+    """
+    fields = DERIVATIVE_FIELDS if path.startswith(f'{DERIVATIVE_DIR}/') else PROJECT_MEDIA_FIELDS
+    return Project.objects.filter(media_source_condition(path, fields), deleted=False).order_by()
+
+
+def is_uploader(user, path):
+    return MediaBlob.objects.filter(media_source_condition(path, ('path',)), uploaders=user).exists()
+
+
+def check_media_access(request, path):
+    """
+    Vrací True pro veřejně dostupný soubor, False pro soubor dostupný jen přihlášenému
+    uživateli s přístupem k projektu. Soubor, na který neodkazuje žádný nesmazaný projekt,
+    smí stahovat jen ten, kdo ho nahrál, a administrátor. Bez přístupu vyvolá Http404
+    (neprozradí existenci).
+    """
+    projects = list(media_projects(path).values_list('id', 'public_visibility'))
+    if any(public for _, public in projects):
+        return True
+
+    user = authenticate_request(request)
+    if user is None:
+        raise Http404
+
+    access = ProjectAccess(user)
+    if access.is_admin or user.is_staff:
+        return False
+    if any(access.can_access(project_id) for project_id, _ in projects):
+        return False
+    if not projects and is_uploader(user, path):
+        # Čerstvě nahraný soubor, který ještě není u projektu
+        return False
+    raise Http404
+
+
+@require_http_methods(['GET', 'HEAD'])
+def serve_media(request, path):
+    """
+    Servíruje soubory z MEDIA_ROOT s kontrolou přístupu k projektu.
+    Podporuje Range (přetáčení videa), If-None-Match a přesměrování na webserver
+    (MEDIA_SERVE_MODE = 'x-accel' pro nginx, 'x-sendfile' pro Apache/lighttpd).
+    """
+    if any(part.startswith('.') for part in path.split('/')):
+        raise Http404
+    try:
+        full_path = safe_join(settings.MEDIA_ROOT, path)
+        stat = os.stat(full_path)
+    except (OSError, ValueError):
+        raise Http404
+    if not os.path.isfile(full_path):
+        raise Http404
+
+    is_public = check_media_access(request, path)
+    etag = quote_etag(f'{stat.st_size:x}-{stat.st_mtime_ns:x}')
+
+    response = get_conditional_response(request, etag=etag, last_modified=int(stat.st_mtime))
+    if response is None:
+        response = build_file_response(request, path, full_path, stat.st_size, etag)
+
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(stat.st_mtime)
+    response['Cache-Control'] = (
+        f'public, max-age={settings.MEDIA_CACHE_MAX_AGE}' if is_public else 'private, no-cache'
+    )
+    return response
+
+
+def build_file_response(request, path, full_path, size, etag):
+    content_type, encoding = mimetypes.guess_type(full_path)
+    content_type = content_type or 'application/octet-stream'
+    mode = settings.MEDIA_SERVE_MODE
+
+    if mode in ('x-accel', 'x-sendfile'):
+        # Soubor posílá webserver (včetně Range), aplikace jen ověří přístup
+        response = HttpResponse(content_type=content_type)
+        if mode == 'x-accel':
+            response['X-Accel-Redirect'] = f"{settings.MEDIA_ACCEL_PREFIX.rstrip('/')}/{path}"
+        else:
+            response['X-Sendfile'] = full_path
+        return response
+
+    byte_range = None
+    if_range = request.META.get('HTTP_IF_RANGE')
+    if not if_range or if_range == etag:
+        byte_range = parse_range(request.META.get('HTTP_RANGE'), size)
+
+    if byte_range is False:
+        response = HttpResponse(status=416)
+        response['Content-Range'] = f'bytes */{size}'
+        return response
+
+    file = open(full_path, 'rb')
+    if byte_range is None:
+        response = FileResponse(file, content_type=content_type)
+    else:
+        start, end = byte_range
+        file.seek(start)
+        response = FileResponse(RangeFileWrapper(file, end - start + 1), status=206, content_type=content_type)
+        response['Content-Range'] = f'bytes {start}-{end}/{size}'
+        response['Content-Length'] = str(end - start + 1)
+
+    response.block_size = STREAM_BLOCK_SIZE
+    response['Accept-Ranges'] = 'bytes'
+    if encoding:
+        response['Content-Encoding'] = encoding
+    return response
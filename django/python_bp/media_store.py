@@ -0,0 +1,116 @@
+import hashlib
+import os
+import uuid
+from collections import Counter
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import F, Value
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+from .models import MediaBlob
+from .upload_handlers import get_staging_dir
+
+
+BLOB_DIR = 'blobs'
+# Pole projektu, která odkazují na soubory v úložišti
+PROJECT_MEDIA_FIELDS = ('thumbnail', 'document', 'poster', 'video')
+HASH_CHUNK_SIZE = 64 * 1024
+
+
+def get_blob_path(sha256, ext):
+    """
+    Relativní cesta blobu v MEDIA_ROOT, např. blobs/ab/ab12...ef.pdf
+    """
+    return os.path.join(BLOB_DIR, sha256[:2], f'{sha256}.{ext.lower()}')
+
+
+def is_blob_path(path):
+    return bool(path) and path.startswith(f'{BLOB_DIR}/')
+
+
+def file_sha256(path):
+    hasher = hashlib.sha256()
+    with open(path, 'rb') as source:
+        for chunk in iter(lambda: source.read(HASH_CHUNK_SIZE), b''):
+            hasher.update(chunk)
+    return hasher.hexdigest()
+
+
+def store_file(source_path, file_name, sha256=None, uploader=None):
+    """
+    Přesune soubor ze staging adresáře do obsahově adresovaného úložiště.
+    Pokud stejný obsah už existuje, zdroj smaže a vrátí existující blob.
+    uploader se zapíše k blobu - soubor bez projektu smí stahovat jen ten, kdo ho nahrál.
+    """
+    blob = _store_blob(source_path, file_name, sha256 or file_sha256(source_path))
+    if uploader is not None:
+        blob.uploaders.add(uploader)
+    return blob
+
+
+def _store_blob(source_path, file_name, sha256):
+    blob = MediaBlob.objects.filter(sha256=sha256).first()
+    if blob is None:
+        ext = file_name.split('.')[-1]
+        path = get_blob_path(sha256, ext)
+        absolute_path = os.path.join(settings.MEDIA_ROOT, path)
+        os.makedirs(os.path.dirname(absolute_path), exist_ok=True)
+        os.replace(source_path, absolute_path)
+        try:
+            # Vlastní savepoint - volající může být uvnitř atomic (finalize_upload_session)
+            # a chyba bez něj by rozbila celou jeho transakci
+            with transaction.atomic():
+                return MediaBlob.objects.create(sha256=sha256, path=path, size=os.path.getsize(absolute_path))
+        except IntegrityError:
+            # Souběžný upload stejného obsahu - soubor je identický, stačí existující záznam
+            return MediaBlob.objects.get(sha256=sha256)
+
+    try:
+        os.remove(source_path)
+    except FileNotFoundError:
+        pass
+    # Znovu nahraný blob ještě nemusí mít odkaz z projektu, úklid ho nesmí smazat
+    MediaBlob.objects.filter(pk=blob.pk).update(updated_at=timezone.now())
+    return blob
+
+
+def store_uploaded_file(file, uploader=None):
+    """
+    Uloží nahraný soubor do úložiště. StreamedUploadedFile už leží ve staging
+    adresáři s vypočítaným SHA-256, ostatní soubory se tam nejdřív zapíšou.
+    """
+    if getattr(file, 'sha256', None):
+        file.file.close()
+        return store_file(file.temporary_file_path(), file.name, file.sha256, uploader)
+
+    staging_dir = get_staging_dir()
+    os.makedirs(staging_dir, exist_ok=True)
+    staging_path = os.path.join(staging_dir, f'{uuid.uuid4()}.part')
+    hasher = hashlib.sha256()
+    with open(staging_path, 'wb') as destination:
+        for chunk in file.chunks():
+            hasher.update(chunk)
+            destination.write(chunk)
+    return store_file(staging_path, file.name, hasher.hexdigest(), uploader)
+
+
+def get_media_refs(values):
+    """
+    Spočítá odkazy na bloby z hodnot polí PROJECT_MEDIA_FIELDS.
+    """
+    return Counter(value for value in values if is_blob_path(value))
+
+
+def update_ref_counts(added, removed):
+    """
+    Upraví ref_count podle rozdílu odkazů (Counter cesta -> počet).
+    """
+    now = timezone.now()
+    for path, count in (added - removed).items():
+        MediaBlob.objects.filter(path=path).update(ref_count=F('ref_count') + count, updated_at=now)
+    for path, count in (removed - added).items():
+        MediaBlob.objects.filter(path=path).update(
+            ref_count=Greatest(F('ref_count') - count, Value(0)), updated_at=now
+        )
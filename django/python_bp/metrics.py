@@ -0,0 +1,307 @@
+import glob
+import json
+import mmap
+import os
+import struct
+import re
+import threading
+from abc import ABC, abstractmethod
+from collections import defaultdict
+
+from django.conf import settings
+from django.http import HttpResponse
+from django.utils.crypto import constant_time_compare
+from django.views.decorators.http import require_GET
+
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = tuple(float(1024 * 4 ** exponent) for exponent in range(2, 11))  # 16 KiB .. 1 GiB
+# Soubor se sloučenými hodnotami ukončených procesů (clear_metrics --dead)
+MERGED_FILE = 'metrics_merged.db'
+PROCESS_FILE_PATTERN = re.compile(r'metrics_(\d+)\.db$')
+
+
+class MmapValues:
+    """
+    Hodnoty metrik jednoho procesu v souboru METRICS_DIR/metrics_<pid>.db (mmap).
+    Každý worker (gunicorn, ProcessPool) zapisuje jen do svého souboru, /metrics
+    sečte soubory všech procesů - bez sdílené paměti a zámků mezi procesy.
+
+    Formát: 4 B obsazená délka, 4 B výplň, pak záznamy
+    [4 B délka klíče][klíč UTF-8 doplněný na násobek 8 B][8 B double].
+    Obsazená délka se zapisuje až po celém záznamu, čtenář tak nevidí rozepsaný záznam.
+    """
+    INITIAL_SIZE = 64 * 1024
+
+    def __init__(self, path):
+        self._lock = threading.Lock()
+        self._positions = {}
+        self._file = open(path, 'a+b')
+        if os.fstat(self._file.fileno()).st_size == 0:
+            self._file.truncate(self.INITIAL_SIZE)
+        self._capacity = os.fstat(self._file.fileno()).st_size
+        self._mmap = mmap.mmap(self._file.fileno(), self._capacity)
+
+        self._used = struct.unpack_from('i', self._mmap, 0)[0]
+        if self._used == 0:
+            self._used = 8
+            struct.pack_into('i', self._mmap, 0, self._used)
+        for key, _, position in read_entries(self._mmap, self._used):
+            self._positions[key] = position
+
+    def _grow(self, size):
+        capacity = self._capacity
+        while capacity < size:
+            capacity *= 2
+        self._mmap.close()
+        self._file.truncate(capacity)
+        self._capacity = capacity
+        self._mmap = mmap.mmap(self._file.fileno(), self._capacity)
+
+    def _add_key(self, key):
+        encoded = key.encode('utf-8')
+        padded = encoded + b' ' * (8 - (4 + len(encoded)) % 8)
+        entry = struct.pack(f'i{len(padded)}sd', len(encoded), padded, 0.0)
+        if self._used + len(entry) > self._capacity:
+            self._grow(self._used + len(entry))
+        self._mmap[self._used:self._used + len(entry)] = entry
+        self._positions[key] = self._used + 4 + len(padded)
+        self._used += len(entry)
+        struct.pack_into('i', self._mmap, 0, self._used)
+
+    def inc(self, key, amount):
+        with self._lock:
+            if key not in self._positions:
+                self._add_key(key)
+            position = self._positions[key]
+            value = struct.unpack_from('d', self._mmap, position)[0]
+            struct.pack_into('d', self._mmap, position, value + amount)
+
+    def close(self):
+        self._mmap.close()
+        self._file.close()
+
+
+def read_entries(data, used):
+    position = 8
+    while position < used:
+        length = struct.unpack_from('i', data, position)[0]
+        key_end = position + 4 + length
+        value_position = key_end + (8 - (4 + length) % 8)
+        key = bytes(data[position + 4:key_end]).decode('utf-8')
+        yield key, struct.unpack_from('d', data, value_position)[0], value_position
+        position = value_position + 8
+
+
+_values = None
+_values_pid = None
+_values_lock = threading.Lock()
+
+
+def get_values():
+    """
+    Soubor hodnot aktuálního procesu. Po forku (gunicorn --preload) má worker nové pid
+    a otevře si vlastní soubor.
+    """
+    global _values, _values_pid
+    pid = os.getpid()
+    if _values_pid != pid:
+        with _values_lock:
+            if _values_pid != pid:
+                os.makedirs(settings.METRICS_DIR, exist_ok=True)
+                _values = MmapValues(os.path.join(settings.METRICS_DIR, f'metrics_{pid}.db'))
+                _values_pid = pid
+    return _values
+
+
+def read_file(path):
+    """
+    Hodnoty jednoho souboru metrik jako [(klíč, hodnota)].
+    """
+    with open(path, 'rb') as metrics_file:
+        data = metrics_file.read()
+    if len(data) < 8:
+        return []
+    return [(key, value) for key, value, _ in read_entries(data, struct.unpack_from('i', data, 0)[0])]
+
+
+def collect_values():
+    """
+    Součet hodnot ze souborů všech procesů (i ukončených - čítače jsou kumulativní)
+    a ze sloučeného souboru MERGED_FILE.
+    """
+    totals = defaultdict(float)
+    for path in glob.glob(os.path.join(settings.METRICS_DIR, 'metrics_*.db')):
+        for key, value in read_file(path):
+            totals[key] += value
+    return totals
+
+
+def is_process_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        # Proces existuje, jen patří jinému uživateli
+        return True
+    return True
+
+
+def merge_dead_process_files():
+    """
+    Sloučí soubory ukončených procesů do MERGED_FILE a smaže je - počet souborů v METRICS_DIR
+    tak neroste s každým restartem workeru a součty čítačů zůstanou zachované.
+    Spouštět z jediného procesu (cron), souběžné slučování by hodnoty započítalo dvakrát.
+    Vrací počet sloučených souborů.
+    """
+    dead = []
+    for path in glob.glob(os.path.join(settings.METRICS_DIR, 'metrics_*.db')):
+        match = PROCESS_FILE_PATTERN.search(os.path.basename(path))
+        if match and int(match.group(1)) != os.getpid() and not is_process_alive(int(match.group(1))):
+            dead.append(path)
+    if not dead:
+        return 0
+
+    merged = MmapValues(os.path.join(settings.METRICS_DIR, MERGED_FILE))
+    try:
+        for path in dead:
+            for key, value in read_file(path):
+                merged.inc(key, value)
+            os.remove(path)
+    finally:
+        merged.close()
+    return len(dead)
+
+
+REGISTRY = []
+
+
+def metric_key(name, suffix, label_values, bound=None):
+    """
+    Klíč hodnoty v souboru: JSON [metrika, vzorek, hodnoty popisků, 'le'].
+    """
+    return json.dumps([name, suffix, [str(value) for value in label_values], bound], separators=(',', ':'))
+
+
+class Metric(ABC):
+    """
+    Metrika s popisky, hodnoty se ukládají pod klíčem metric_key.
+    """
+    type = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        REGISTRY.append(self)
+
+    def _inc(self, suffix, amount, labels, bound=None):
+        if not settings.METRICS_ENABLED:
+            return
+        key = metric_key(self.name, suffix, [labels[name] for name in self.labelnames], bound)
+        get_values().inc(key, amount)
+
+    @abstractmethod
+    def samples(self, values):
+        """
+        values: {(vzorek, hodnoty popisků, le): hodnota} -> [(název vzorku, popisky, hodnota)]
+        """
+
+
+class Counter(Metric):
+    type = 'counter'
+
+    def inc(self, amount=1, **labels):
+        self._inc('_total', amount, labels)
+
+    def samples(self, values):
+        return [
+            (f'{self.name}{suffix}', tuple(zip(self.labelnames, label_values)), value)
+            for (suffix, label_values, _), value in sorted(values.items())
+        ]
+
+
+class Histogram(Metric):
+    """
+    Počty se ukládají po jednotlivých intervalech, kumulativní 'le' se počítá až při exportu.
+    """
+    type = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value, **labels):
+        bound = next((bound for bound in self.buckets if value <= bound), None)
+        self._inc('_bucket', 1, labels, str(bound) if bound is not None else '+Inf')
+        self._inc('_sum', value, labels)
+        self._inc('_count', 1, labels)
+
+    def samples(self, values):
+        series = defaultdict(dict)
+        for (suffix, label_values, bound), value in values.items():
+            series[tuple(label_values)][bound if suffix == '_bucket' else suffix] = value
+
+        result = []
+        for label_values, series_values in sorted(series.items()):
+            labels = tuple(zip(self.labelnames, label_values))
+            cumulative = 0.0
+            for bound in [*map(str, self.buckets), '+Inf']:
+                cumulative += series_values.get(bound, 0.0)
+                result.append((f'{self.name}_bucket', labels + (('le', bound),), cumulative))
+            result.append((f'{self.name}_sum', labels, series_values.get('_sum', 0.0)))
+            result.append((f'{self.name}_count', labels, series_values.get('_count', 0.0)))
+        return result
+
+
+def _escape(value):
+    return value.replace('\\', r'\\').replace('\n', r'\n').replace('"', r'\"')
+
+
+def generate_latest():
+    """
+    Všechny metriky v textovém formátu Prometheus (0.0.4).
+    """
+    by_metric = defaultdict(dict)
+    for key, value in collect_values().items():
+        name, suffix, label_values, bound = json.loads(key)
+        by_metric[name][(suffix, tuple(label_values), bound)] = value
+
+    lines = []
+    for metric in REGISTRY:
+        lines.append(f'# HELP {metric.name} {metric.documentation}')
+        lines.append(f'# TYPE {metric.name} {metric.type}')
+        for sample, labels, value in metric.samples(by_metric[metric.name]):
+            label_text = ','.join(f'{name}="{_escape(label)}"' for name, label in labels)
+            lines.append(f'{sample}{{{label_text}}} {value!r}' if label_text else f'{sample} {value!r}')
+    return '\n'.join(lines) + '\n'
+
+
+REQUESTS = Counter('api_requests', 'HTTP requests by URL name, method and status.', ('endpoint', 'method', 'status'))
+REQUEST_DURATION = Histogram('api_request_duration_seconds', 'Request wall time by URL name.', ('endpoint', 'method'))
+DB_QUERIES = Counter('api_db_queries', 'SQL queries executed by URL name.', ('endpoint',))
+DB_DURATION = Counter('api_db_duration_seconds', 'Time spent in SQL queries by URL name.', ('endpoint',))
+RESPONSE_BYTES = Counter('api_response_bytes', 'Response body bytes before and after compression.', ('endpoint', 'stage'))
+RENDER_DURATION = Counter('api_render_duration_seconds', 'Time spent rendering JSON by URL name.', ('endpoint',))
+COMPRESS_DURATION = Counter('api_compress_duration_seconds', 'Time spent compressing responses by URL name.', ('endpoint',))
+PUBLIC_CACHE_REQUESTS = Counter('api_public_cache_requests', 'Public response cache lookups by kind and result.', ('kind', 'result'))
+UPLOAD_BYTES = Histogram('api_upload_size_bytes', 'Size of files stored by upload_file.', ('type',), buckets=SIZE_BUCKETS)
+UPLOAD_DURATION = Histogram('api_upload_duration_seconds', 'Duration of upload_file including body parsing.', ('type',))
+
+
+@require_GET
+def metrics_view(request):
+    """
+    Metrics in Prometheus text format. With METRICS_TOKEN set, requires 'Authorization: Bearer <token>'.
+    Without a token the endpoint is open only with DEBUG=True.
+    """
+    if settings.METRICS_TOKEN:
+        authorization = request.headers.get('Authorization', '')
+        if not constant_time_compare(authorization, f'Bearer {settings.METRICS_TOKEN}'):
+            return HttpResponse('Unauthorized\n', status=401, content_type='text/plain')
+    elif not settings.DEBUG:
+        # Metriky prozrazují názvy endpointů a provoz - v produkci jen s tokenem
+        return HttpResponse('Forbidden: METRICS_TOKEN is not configured\n', status=403, content_type='text/plain')
+    return HttpResponse(generate_latest(), content_type=CONTENT_TYPE)
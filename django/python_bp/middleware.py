@@ -0,0 +1,211 @@
+import gzip
+import logging
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+from django.utils.deprecation import MiddlewareMixin
+
+from .metrics import (
+    COMPRESS_DURATION, DB_DURATION, DB_QUERIES, RENDER_DURATION, REQUEST_DURATION, REQUESTS, RESPONSE_BYTES
+)
+from .performance import QueryBudgetExceeded, RequestMetrics, current_metrics, get_query_budget
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+logger = logging.getLogger(__name__)
+
+# Metody s vlastním popiskem v metrikách - ostatní (libovolné řetězce od klienta) jdou pod 'other'
+METRIC_METHODS = frozenset({'GET', 'HEAD', 'POST', 'PUT', 'PATCH', 'DELETE', 'OPTIONS'})
+COMPRESSIBLE_TYPES = ('text/', 'application/json', 'application/javascript', 'application/xml', 'image/svg+xml')
+
+
+def parse_accept_encoding(header):
+    """
+    Accept-Encoding -> {kódování: q}, např. 'br;q=1.0, gzip;q=0.8, *;q=0'.
+    """
+    codings = {}
+    for item in header.split(','):
+        coding, _, params = item.strip().partition(';')
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        q = 1.0
+        for param in params.split(';'):
+            name, _, value = param.strip().partition('=')
+            if name.strip().lower() == 'q':
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        codings[coding] = q
+    return codings
+
+
+def choose_encoding(header):
+    """
+    Kódování s nejvyšším q, které umíme; při shodě má přednost brotli.
+    """
+    codings = parse_accept_encoding(header or '')
+    available = ('br', 'gzip') if brotli is not None else ('gzip',)
+    best, best_q = None, 0.0
+    for coding in available:
+        q = codings.get(coding, codings.get('*', 0.0))
+        if q > best_q:
+            best, best_q = coding, q
+    return best
+
+
+def compress(content, encoding):
+    if encoding == 'br':
+        return brotli.compress(content, quality=settings.COMPRESSION_BROTLI_QUALITY)
+    return gzip.compress(content, compresslevel=settings.COMPRESSION_GZIP_LEVEL, mtime=0)
+
+
+def get_endpoint(request):
+    """
+    Název URL (view_name), u viewsetů včetně akce - např. 'project-list', 'project-set-visibility'.
+    """
+    match = getattr(request, 'resolver_match', None)
+    return match.view_name if match is not None else 'unresolved'
+
+
+def get_method(request):
+    """
+    HTTP metoda pro popisek metrik - omezená množina hodnot, aby klient nemohl zakládat nové časové řady.
+    """
+    return request.method if request.method in METRIC_METHODS else 'other'
+
+
+def server_timing_entry(name, seconds, description=None):
+    entry = f'{name};dur={seconds * 1000:.2f}'
+    return f'{entry};desc="{description}"' if description else entry
+
+
+def add_server_timing(response, *entries):
+    if not settings.SERVER_TIMING:
+        return
+    existing = response.get('Server-Timing')
+    response['Server-Timing'] = ', '.join([existing, *entries] if existing else entries)
+
+
+class CompressionMiddleware(MiddlewareMixin):
+    """
+    Komprese odpovědí gzip/brotli podle Accept-Encoding od COMPRESSION_MIN_SIZE bajtů.
+    Streamované odpovědi (SSE, ZIP, exporty, média) se nekomprimují - buď jsou už
+    komprimované, nebo by komprese rozbila průběžné odesílání.
+    Úspora bajtů a čas renderování se sčítají po endpointech (metrics.py)
+    a posílají v hlavičce Server-Timing.
+    """
+    def process_response(self, request, response):
+        render_time = getattr(response, 'render_time', 0.0)
+        if response.streaming or response.has_header('Content-Encoding'):
+            return response
+
+        original_size = len(response.content)
+        compress_time = 0.0
+        content_type = response.get('Content-Type', '').lower()
+        if original_size >= settings.COMPRESSION_MIN_SIZE and content_type.startswith(COMPRESSIBLE_TYPES):
+            patch_vary_headers(response, ('Accept-Encoding',))
+            encoding = choose_encoding(request.META.get('HTTP_ACCEPT_ENCODING'))
+            if encoding is not None:
+                started = time.perf_counter()
+                compressed = compress(response.content, encoding)
+                compress_time = time.perf_counter() - started
+                if len(compressed) < original_size:
+                    response.content = compressed
+                    response['Content-Length'] = str(len(compressed))
+                    response['Content-Encoding'] = encoding
+                    # Komprimovaná odpověď není bajtově shodná - silný ETag se mění na slabý
+                    etag = response.get('ETag')
+                    if etag and etag.startswith('"'):
+                        response['ETag'] = f'W/{etag}'
+
+        sent_size = len(response.content)
+        endpoint = get_endpoint(request)
+        RESPONSE_BYTES.inc(original_size, endpoint=endpoint, stage='original')
+        RESPONSE_BYTES.inc(sent_size, endpoint=endpoint, stage='sent')
+        RENDER_DURATION.inc(render_time, endpoint=endpoint)
+        COMPRESS_DURATION.inc(compress_time, endpoint=endpoint)
+        add_server_timing(response, server_timing_entry('render', render_time), server_timing_entry('compress', compress_time))
+        logger.debug('%s: %s -> %s B, render %.2f ms, komprese %.2f ms',
+                     endpoint, original_size, sent_size, render_time * 1000, compress_time * 1000)
+        return response
+
+
+class PerformanceMiddleware:
+    """
+    Měření každého requestu: celkový čas, čas a počet SQL dotazů, opakované dotazy
+    (stejný otisk, typicky N+1) a velikost odpovědi. Výsledek jde do hlavičky
+    Server-Timing, do logu a do metrik (/metrics). Překročení QUERY_BUDGETS endpointu se zaloguje,
+    s QUERY_BUDGET_MODE='raise' (testy) vyhodí QueryBudgetExceeded.
+    Dotazy zachytává execute wrapper z performance.py (registrovaný v signals.py).
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        metrics = RequestMetrics()
+        token = current_metrics.set(metrics)
+        try:
+            response = self.get_response(request)
+        finally:
+            current_metrics.reset(token)
+        return self.process_metrics(request, response, metrics)
+
+    async def __acall__(self, request):
+        metrics = RequestMetrics()
+        token = current_metrics.set(metrics)
+        try:
+            response = await self.get_response(request)
+        finally:
+            current_metrics.reset(token)
+        return self.process_metrics(request, response, metrics)
+
+    def process_metrics(self, request, response, metrics):
+        endpoint = get_endpoint(request)
+        method = get_method(request)
+        wall_time = metrics.wall_time
+        query_count = metrics.query_count
+        duplicates = metrics.duplicates(2)
+        duplicate_count = sum(count - 1 for _, count in duplicates)
+        # U streamovaných odpovědí (SSE, exporty) velikost předem neznáme
+        size = None if response.streaming else len(response.content)
+
+        REQUESTS.inc(endpoint=endpoint, method=method, status=response.status_code)
+        REQUEST_DURATION.observe(wall_time, endpoint=endpoint, method=method)
+        DB_QUERIES.inc(query_count, endpoint=endpoint)
+        DB_DURATION.inc(metrics.db_time, endpoint=endpoint)
+
+        add_server_timing(
+            response,
+            server_timing_entry('db', metrics.db_time, f'{query_count} queries, {duplicate_count} duplicate'),
+            server_timing_entry('total', wall_time),
+        )
+        logger.debug('%s %s: %.2f ms, DB %.2f ms, %s dotazů (%s opakovaných), %s B',
+                     request.method, endpoint, wall_time * 1000, metrics.db_time * 1000,
+                     query_count, duplicate_count, size if size is not None else '-')
+
+        for sql, count in duplicates:
+            if count >= settings.QUERY_DUPLICATE_THRESHOLD:
+                logger.warning('%s: dotaz spuštěn %s× (N+1?): %s', endpoint, count, sql)
+
+        budget = get_query_budget(endpoint)
+        if budget is not None and query_count > budget:
+            message = f'{endpoint}: {query_count} SQL dotazů, rozpočet je {budget}'
+            if settings.QUERY_BUDGET_MODE == 'raise':
+                raise QueryBudgetExceeded(message)
+            logger.warning(message)
+        return response
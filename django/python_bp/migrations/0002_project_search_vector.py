@@ -0,0 +1,39 @@
+# Generated by Django 5.1.2 on 2026-10-17 02:48
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.conf import settings
+from django.contrib.postgres.search import SearchVector
+from django.db import migrations
+from django.db.models import F, Func, TextField, Value
+
+
+def fill_search_vector(apps, schema_editor):
+    Project = apps.get_model('python_bp', 'Project')
+    config = getattr(settings, 'PROJECT_SEARCH_CONFIG', 'simple')
+    keywords = Func(F('keywords'), Value(' '), function='array_to_string', output_field=TextField())
+    Project.objects.update(search_vector=(
+        SearchVector('title', weight='A', config=config)
+        + SearchVector(keywords, weight='B', config=config)
+        + SearchVector('description', weight='C', config=config)
+    ))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('python_bp', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='project',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='project',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='projects_search_vector_gin'),
+        ),
+        migrations.RunPython(fill_search_vector, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,46 @@
+# Generated by Django 5.1.2 on 2026-10-17 02:52
+
+import django.contrib.postgres.indexes
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('python_bp', '0002_project_search_vector'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['project', '-created_at', 'id'], name='comments_project_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['-created_at', 'id'], name='comments_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='milestone',
+            index=models.Index(fields=['deadline', 'id'], name='milestones_deadline_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='project',
+            index=models.Index(condition=models.Q(('deleted', False)), fields=['-year', 'title', 'id'], name='projects_active_year_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='project',
+            index=models.Index(condition=models.Q(('deleted', False), ('public_visibility', True)), fields=['-year', 'title', 'id'], name='projects_public_year_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='project',
+            index=models.Index(condition=models.Q(('deleted', False)), fields=['field', '-year', 'title'], name='projects_active_field_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='project',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['keywords'], name='projects_keywords_gin'),
+        ),
+        migrations.AddIndex(
+            model_name='projectteacher',
+            index=models.Index(fields=['teacher', 'project'], name='project_teachers_teacher_idx'),
+        ),
+    ]
@@ -0,0 +1,55 @@
+# Generated by Django 5.1.2 on 2026-10-17 03:05
+
+import re
+
+import django.contrib.postgres.indexes
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations, models
+
+
+def fill_keywords(apps, schema_editor):
+    # Stejná normalizace jako keywords.normalize_keyword
+    Project = apps.get_model('python_bp', 'Project')
+    Keyword = apps.get_model('python_bp', 'Keyword')
+    counts = {}
+    names = {}
+    for keywords in Project.objects.filter(deleted=False).values_list('keywords', flat=True).iterator():
+        seen = set()
+        for keyword in keywords or []:
+            name = re.sub(r'\s+', ' ', keyword).strip()
+            normalized = name.casefold()[:100]
+            if not normalized or normalized in seen:
+                continue
+            seen.add(normalized)
+            counts[normalized] = counts.get(normalized, 0) + 1
+            names.setdefault(normalized, name)
+    Keyword.objects.bulk_create(
+        [Keyword(normalized=key, name=names[key][:100], usage_count=count) for key, count in counts.items()],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('python_bp', '0005_media_blob'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.CreateModel(
+            name='Keyword',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100)),
+                ('normalized', models.CharField(max_length=100, unique=True)),
+                ('usage_count', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'db_table': 'keywords',
+                'indexes': [models.Index(fields=['normalized'], name='keywords_prefix_idx', opclasses=['varchar_pattern_ops']), django.contrib.postgres.indexes.GinIndex(fields=['normalized'], name='keywords_trigram_gin', opclasses=['gin_trgm_ops'])],
+            },
+        ),
+        migrations.RunPython(fill_keywords, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.1.2 on 2026-10-17 03:07
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('python_bp', '0006_keyword_dictionary'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProjectSimilarity',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('rank', models.PositiveSmallIntegerField()),
+                ('score', models.FloatField()),
+                ('project', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='similar_links', to='python_bp.project')),
+                ('similar', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='python_bp.project')),
+            ],
+            options={
+                'db_table': 'project_similarities',
+                'constraints': [models.UniqueConstraint(fields=('project', 'rank'), name='project_similarities_rank_uniq')],
+            },
+        ),
+    ]
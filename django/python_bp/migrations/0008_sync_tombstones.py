@@ -0,0 +1,56 @@
+# Generated by Django 5.1.2 on 2026-10-17 03:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('python_bp', '0007_project_similarity'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Tombstone',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('model', models.CharField(max_length=30)),
+                ('object_id', models.BigIntegerField()),
+                ('project_id', models.BigIntegerField(null=True)),
+                ('user_id', models.BigIntegerField(null=True)),
+                ('reason', models.CharField(choices=[('deleted', 'Smazáno'), ('hidden', 'Skryto z veřejných projektů')], default='deleted', max_length=10)),
+                ('deleted_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'db_table': 'tombstones',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['updated_at', 'id'], name='comments_updated_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='consultation',
+            index=models.Index(fields=['updated_at', 'id'], name='consultations_updated_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='milestone',
+            index=models.Index(fields=['updated_at', 'id'], name='milestones_updated_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='project',
+            index=models.Index(fields=['updated_at', 'id'], name='projects_updated_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='projectevaluation',
+            index=models.Index(fields=['updated_at', 'id'], name='evaluations_updated_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='projectteacher',
+            index=models.Index(fields=['updated_at', 'id'], name='project_teachers_updated_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tombstone',
+            index=models.Index(fields=['deleted_at', 'id'], name='tombstones_deleted_idx'),
+        ),
+    ]
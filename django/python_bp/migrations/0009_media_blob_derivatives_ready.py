@@ -0,0 +1,18 @@
+# Generated by Django 5.1.2 on 2026-10-17 03:37
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('python_bp', '0008_sync_tombstones'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='mediablob',
+            name='derivatives_ready',
+            field=models.BooleanField(default=False),
+        ),
+    ]
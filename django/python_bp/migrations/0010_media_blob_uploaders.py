@@ -0,0 +1,19 @@
+# Generated by Django 5.1.2 on 2026-10-17 03:39
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('python_bp', '0009_media_blob_derivatives_ready'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='mediablob',
+            name='uploaders',
+            field=models.ManyToManyField(blank=True, related_name='uploaded_blobs', to=settings.AUTH_USER_MODEL),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.1.2 on 2026-10-17 03:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('python_bp', '0010_media_blob_uploaders'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='keyword',
+            index=models.Index(fields=['updated_at'], name='keywords_updated_idx'),
+        ),
+    ]
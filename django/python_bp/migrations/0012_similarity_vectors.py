@@ -0,0 +1,39 @@
+# Generated by Django 5.1.2 on 2026-10-17 03:43
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('python_bp', '0011_keywords_updated_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SimilarityTerm',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('term', models.CharField(max_length=200, unique=True)),
+                ('document_frequency', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'db_table': 'similarity_terms',
+            },
+        ),
+        migrations.CreateModel(
+            name='ProjectTermWeight',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('weight', models.FloatField()),
+                ('project', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='term_weights', to='python_bp.project')),
+                ('term', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='python_bp.similarityterm')),
+            ],
+            options={
+                'db_table': 'project_term_weights',
+                'indexes': [models.Index(fields=['term', 'project'], name='project_term_weights_term_idx')],
+                'constraints': [models.UniqueConstraint(fields=('project', 'term'), name='project_term_weights_uniq')],
+            },
+        ),
+    ]
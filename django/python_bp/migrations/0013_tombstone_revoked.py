@@ -0,0 +1,18 @@
+# Generated by Django 5.1.2 on 2026-10-17 03:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('python_bp', '0012_similarity_vectors'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='tombstone',
+            name='reason',
+            field=models.CharField(choices=[('deleted', 'Smazáno'), ('hidden', 'Skryto z veřejných projektů'), ('revoked', 'Odebrán přístup')], default='deleted', max_length=10),
+        ),
+    ]
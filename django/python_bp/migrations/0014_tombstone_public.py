@@ -0,0 +1,24 @@
+# Generated by Django 5.1.2 on 2026-10-17 04:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('python_bp', '0013_tombstone_revoked'),
+    ]
+
+    operations = [
+        # Starší tombstony dostávali všichni - zůstanou veřejné
+        migrations.AddField(
+            model_name='tombstone',
+            name='public',
+            field=models.BooleanField(default=True),
+        ),
+        migrations.AlterField(
+            model_name='tombstone',
+            name='public',
+            field=models.BooleanField(default=False),
+        ),
+    ]
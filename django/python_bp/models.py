@@ -1,6 +1,11 @@
+import uuid
+
 from django.db import models
+from django.db.models import Q
 from django.contrib.auth.models import AbstractUser
 from django.contrib.postgres.fields import ArrayField
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
 from django.utils import timezone
 
 
@@ -57,11 +62,27 @@ class Project(models.Model):
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='draft')
     type_of_work = models.CharField(max_length=20, choices=WORK_TYPES, default='SOČ')
     deleted = models.BooleanField(default=False)
+    # Udržováno signálem (viz signals.py), slouží pro fulltextové vyhledávání
+    search_vector = SearchVectorField(null=True, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
     class Meta:
         db_table = 'projects'
+        indexes = [
+            GinIndex(fields=['search_vector'], name='projects_search_vector_gin'),
+            # Všechny dotazy filtrují deleted=False a řadí podle -year, title
+            models.Index(fields=['-year', 'title', 'id'], name='projects_active_year_idx',
+                         condition=Q(deleted=False)),
+            # Veřejná přehlídka projektů (public_projects_list)
+            models.Index(fields=['-year', 'title', 'id'], name='projects_public_year_idx',
+                         condition=Q(public_visibility=True, deleted=False)),
+            models.Index(fields=['field', '-year', 'title'], name='projects_active_field_idx',
+                         condition=Q(deleted=False)),
+            GinIndex(fields=['keywords'], name='projects_keywords_gin'),
+            # Delta synchronizace (sync.py) - změny od času kurzoru
+            models.Index(fields=['updated_at', 'id'], name='projects_updated_idx'),
+        ]
     
     def __str__(self):
         return f"{self.title} ({self.type_of_work}, {self.year})"
@@ -87,6 +108,11 @@ class ProjectTeacher(models.Model):
     
     class Meta:
         db_table = 'project_teachers'
+        indexes = [
+            # Projekty učitele (ProjectTeacher.objects.filter(teacher=user)) bez přístupu do tabulky
+            models.Index(fields=['teacher', 'project'], name='project_teachers_teacher_idx'),
+            models.Index(fields=['updated_at', 'id'], name='project_teachers_updated_idx'),
+        ]
     
     def __str__(self):
         return f"{self.teacher.username} - {self.project.title} ({self.get_role_display()})"
@@ -114,6 +140,10 @@ class Milestone(models.Model):
     
     class Meta:
         db_table = 'milestones'
+        indexes = [
+            models.Index(fields=['deadline', 'id'], name='milestones_deadline_idx'),
+            models.Index(fields=['updated_at', 'id'], name='milestones_updated_idx'),
+        ]
     
     def __str__(self):
         return f"{self.title} - {self.project.title}"
@@ -131,6 +161,11 @@ class Comment(models.Model):
     
     class Meta:
         db_table = 'comments'
+        indexes = [
+            models.Index(fields=['project', '-created_at', 'id'], name='comments_project_created_idx'),
+            models.Index(fields=['-created_at', 'id'], name='comments_created_idx'),
+            models.Index(fields=['updated_at', 'id'], name='comments_updated_idx'),
+        ]
     
     def __str__(self):
         return f"Komentář od {self.user.username} k projektu {self.project.title}"
@@ -149,6 +184,9 @@ class Consultation(models.Model):
     
     class Meta:
         db_table = 'consultations'
+        indexes = [
+            models.Index(fields=['updated_at', 'id'], name='consultations_updated_idx'),
+        ]
     
     def __str__(self):
         return f"Konzultace projektu {self.project.title} dne {self.consultation_date.strftime('%d.%m.%Y')}"
@@ -167,6 +205,175 @@ class ProjectEvaluation(models.Model):
     
     class Meta:
         db_table = 'project_evaluations'
+        indexes = [
+            models.Index(fields=['updated_at', 'id'], name='evaluations_updated_idx'),
+        ]
+    
+    def __str__(self):
+        return f"Hodnocení projektu {self.project.title} od {self.teacher.username}"
+
+
+class UploadSession(models.Model):
+    """
+    Rozpracovaný obnovitelný upload - soubor se nahrává po částech (PUT s Content-Range)
+    """
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='upload_sessions')
+    file_type = models.CharField(max_length=20)
+    file_name = models.CharField(max_length=255)
+    size = models.BigIntegerField()
+    offset = models.BigIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        db_table = 'upload_sessions'
+    
+    def __str__(self):
+        return f"Upload {self.file_name} ({self.offset}/{self.size} B)"
+
+
+class MediaBlob(models.Model):
+    """
+    Obsahově adresovaný soubor v MEDIA_ROOT (blobs/<aa>/<sha256>.<ext>).
+    Stejný obsah se ukládá jen jednou, pole souborů projektu na něj odkazují cestou.
+    """
+    sha256 = models.CharField(max_length=64, unique=True)
+    path = models.CharField(max_length=255, unique=True)
+    size = models.BigIntegerField()
+    # Počet odkazů z polí thumbnail/document/poster/video projektů (viz signals.py)
+    ref_count = models.PositiveIntegerField(default=0)
+    # Uživatelé, kteří obsah nahráli - soubor bez projektu smí stahovat jen oni (media_serving.py)
+    uploaders = models.ManyToManyField(User, related_name='uploaded_blobs', blank=True)
+    # Zmenšené varianty obrázku jsou vygenerované (derivatives.py) - čtení bez stat() souborů
+    derivatives_ready = models.BooleanField(default=False)
+    created_at = models.DateTimeField(auto_now_add=True)
+    # Poslední nahrání nebo změna počtu odkazů - chrání čerstvé bloby před úklidem
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        db_table = 'media_blobs'
+        indexes = [
+            # Kandidáti na úklid (gc_media_blobs)
+            models.Index(fields=['updated_at'], name='media_blobs_unreferenced_idx',
+                         condition=Q(ref_count=0)),
+        ]
+    
+    def __str__(self):
+        return f"{self.path} ({self.ref_count} odkazů)"
+
+
+class Keyword(models.Model):
+    """
+    Slovník klíčových slov projektů pro našeptávání. usage_count = počet nesmazaných
+    projektů s daným slovem, udržuje se signály (viz keywords.py).
+    """
+    name = models.CharField(max_length=100)
+    # Porovnávací tvar (casefold, jednoduché mezery) - podle něj se slova slučují
+    normalized = models.CharField(max_length=100, unique=True)
+    usage_count = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        db_table = 'keywords'
+        indexes = [
+            # Prefixové hledání (LIKE 'rob%')
+            models.Index(fields=['normalized'], name='keywords_prefix_idx', opclasses=['varchar_pattern_ops']),
+            # Podobnostní hledání překlepů (pg_trgm)
+            GinIndex(fields=['normalized'], name='keywords_trigram_gin', opclasses=['gin_trgm_ops']),
+            # Verze slovníku pro trie v paměti procesů (max(updated_at), viz keywords.py)
+            models.Index(fields=['updated_at'], name='keywords_updated_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.name} ({self.usage_count})"
+
+
+class ProjectSimilarity(models.Model):
+    """
+    Předpočítaní nejbližší sousedé projektu podle TF-IDF (viz similarity.py).
+    Pro každý projekt nejvýše SIMILAR_PROJECTS_K řádků seřazených podle rank.
+    """
+    project = models.ForeignKey(Project, on_delete=models.CASCADE, related_name='similar_links')
+    similar = models.ForeignKey(Project, on_delete=models.CASCADE, related_name='+')
+    rank = models.PositiveSmallIntegerField()
+    score = models.FloatField()
+    
+    class Meta:
+        db_table = 'project_similarities'
+        constraints = [
+            models.UniqueConstraint(fields=['project', 'rank'], name='project_similarities_rank_uniq'),
+        ]
+    
+    def __str__(self):
+        return f"{self.project_id} -> {self.similar_id} ({self.score:.3f})"
+
+
+class SimilarityTerm(models.Model):
+    """
+    Slovník TF-IDF pro podobné projekty (viz similarity.py): term a počet nesmazaných
+    projektů, které ho obsahují. Přírůstková aktualizace z něj počítá IDF.
+    """
+    term = models.CharField(max_length=200, unique=True)
+    document_frequency = models.PositiveIntegerField(default=0)
+    
+    class Meta:
+        db_table = 'similarity_terms'
+    
+    def __str__(self):
+        return f"{self.term} ({self.document_frequency})"
+
+
+class ProjectTermWeight(models.Model):
+    """
+    Uložený L2-normalizovaný TF-IDF vektor projektu (jeden řádek na term).
+    Skalární součin s ostatními projekty počítá DB přes index podle termu.
+    """
+    project = models.ForeignKey(Project, on_delete=models.CASCADE, related_name='term_weights')
+    term = models.ForeignKey(SimilarityTerm, on_delete=models.CASCADE, related_name='+')
+    weight = models.FloatField()
+    
+    class Meta:
+        db_table = 'project_term_weights'
+        constraints = [
+            models.UniqueConstraint(fields=['project', 'term'], name='project_term_weights_uniq'),
+        ]
+        indexes = [
+            # Projekty sdílející term (skalární součin v similarity.py)
+            models.Index(fields=['term', 'project'], name='project_term_weights_term_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.project_id}: {self.term_id} ({self.weight:.3f})"
+
+
+class Tombstone(models.Model):
+    """
+    Záznam o smazaném (nebo skrytém) objektu pro delta synchronizaci (viz sync.py).
+    Odkazy jsou jen čísla - objekt ani projekt už nemusí existovat.
+    """
+    REASONS = (
+        ('deleted', 'Smazáno'),
+        ('hidden', 'Skryto z veřejných projektů'),
+        # Uživatel user_id přišel o přístup k projektu (odebraný učitel, změna autora)
+        ('revoked', 'Odebrán přístup'),
+    )
+    
+    model = models.CharField(max_length=30)
+    object_id = models.BigIntegerField()
+    project_id = models.BigIntegerField(null=True)
+    # Uživatel, kterého se smazaný objekt týkal (učitel přiřazení, konzultace, hodnocení)
+    user_id = models.BigIntegerField(null=True)
+    reason = models.CharField(max_length=10, choices=REASONS, default='deleted')
+    # Smazaný projekt byl veřejný - tombstone dostanou všichni, jinak jen jeho uživatelé
+    public = models.BooleanField(default=False)
+    deleted_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        db_table = 'tombstones'
+        indexes = [
+            models.Index(fields=['deleted_at', 'id'], name='tombstones_deleted_idx'),
+        ]
     
     def __str__(self):
-        return f"Hodnocení projektu {self.project.title} od {self.teacher.username}"
\ No newline at end of file
+        return f"{self.model} {self.object_id} ({self.get_reason_display()})"
@@ -0,0 +1,227 @@
+import base64
+import json
+import operator
+from collections import OrderedDict
+from functools import reduce
+
+from django.core.paginator import InvalidPage
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """
+    Stránkování podle klíče (keyset/cursor). Místo OFFSET a COUNT(*) filtruje
+    řádky za posledním záznamem předchozí stránky, takže každá stránka stojí stejně.
+    Řazení musí být jednoznačné - poslední pole by mělo být primární klíč.
+    """
+    cursor_query_param = 'cursor'
+    ordering = ('-id',)
+    invalid_cursor_message = 'Neplatný kurzor.'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        queryset, cursor, reverse = self._prepare(queryset, request)
+        # O jeden záznam navíc, abychom poznali, zda existuje další stránka
+        return self._finish(list(queryset[:self.page_size + 1]), cursor, reverse)
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        """
+        Varianta pro async views (async ORM).
+        """
+        queryset, cursor, reverse = self._prepare(queryset, request)
+        return self._finish([item async for item in queryset[:self.page_size + 1]], cursor, reverse)
+
+    def _prepare(self, queryset, request):
+        self.request = request
+        self.page_size = api_settings.PAGE_SIZE or 20
+
+        cursor = self.decode_cursor(request)
+        reverse = bool(cursor and cursor['r'])
+        ordering = [self._invert(field) for field in self.ordering] if reverse else list(self.ordering)
+
+        queryset = queryset.order_by(*ordering)
+        # Sparse fieldset (.only()) mohl řadicí sloupce vynechat - hodnoty kurzoru by se dotahovaly po řádcích
+        loaded, deferred = queryset.query.deferred_loading
+        if loaded and not deferred:
+            queryset = queryset.only(*loaded, *(field.lstrip('-') for field in self.ordering))
+        # U řádků z .values() (rychlé serializéry se sparse fieldsetem) totéž pro vybrané sloupce
+        if queryset._fields:
+            missing = [field.lstrip('-') for field in self.ordering if field.lstrip('-') not in queryset._fields]
+            if missing:
+                queryset = queryset.values(*queryset._fields, *missing)
+        if cursor:
+            queryset = queryset.filter(self._keyset_filter(queryset.model, ordering, cursor['v']))
+        return queryset, cursor, reverse
+
+    def _finish(self, results, cursor, reverse):
+        has_more = len(results) > self.page_size
+        results = results[:self.page_size]
+
+        if reverse:
+            results.reverse()
+            self.has_next = True
+            self.has_previous = has_more
+        else:
+            self.has_next = has_more
+            self.has_previous = cursor is not None
+
+        self.page = results
+        return results
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+            ('results', data),
+        ]))
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(self.page[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous or not self.page:
+            return None
+        return self.encode_cursor(self.page[0], reverse=True)
+
+    def encode_cursor(self, item, reverse):
+        values = [self._serialize_value(self._get_value(item, field.lstrip('-'))) for field in self.ordering]
+        payload = json.dumps({'v': values, 'r': int(reverse)}, separators=(',', ':'))
+        token = base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii')
+        return replace_query_param(self.request.build_absolute_uri(), self.cursor_query_param, token)
+
+    def decode_cursor(self, request):
+        token = request.query_params.get(self.cursor_query_param)
+        if not token:
+            return None
+        try:
+            cursor = json.loads(base64.urlsafe_b64decode(token.encode('ascii')).decode('utf-8'))
+        except (TypeError, ValueError, UnicodeError):
+            raise NotFound(self.invalid_cursor_message)
+        # Kurzor je od klienta - tvar se ověří celý, jinak by KeyError/TypeError skončil jako 500
+        if (not isinstance(cursor, dict) or not isinstance(cursor.get('v'), list)
+                or len(cursor['v']) != len(self.ordering) or cursor.get('r') not in (0, 1)):
+            raise NotFound(self.invalid_cursor_message)
+        return cursor
+
+    def _keyset_filter(self, model, ordering, raw_values):
+        """
+        Sestaví podmínku (a < x) OR (a = x AND b > y) OR ... pro libovolné řazení.
+        """
+        values = []
+        for field, raw in zip(ordering, raw_values):
+            model_field = model._meta.get_field(field.lstrip('-'))
+            try:
+                value = model_field.to_python(raw)
+            except Exception:
+                raise NotFound(self.invalid_cursor_message)
+            # Řadicí pole nejsou nullable, None by filtr nepřijal
+            if value is None:
+                raise NotFound(self.invalid_cursor_message)
+            values.append(value)
+
+        conditions = []
+        for index, field in enumerate(ordering):
+            name = field.lstrip('-')
+            lookup = 'lt' if field.startswith('-') else 'gt'
+            equal = {ordering[i].lstrip('-'): values[i] for i in range(index)}
+            conditions.append(Q(**equal, **{f'{name}__{lookup}': values[index]}))
+        return reduce(operator.or_, conditions)
+
+    @staticmethod
+    def _invert(field):
+        return field[1:] if field.startswith('-') else f'-{field}'
+
+    @staticmethod
+    def _get_value(item, name):
+        # Rychlé serializéry (fast_serializers.py) stránkují řádky z .values()
+        if isinstance(item, dict):
+            return item[name]
+        return getattr(item, name)
+
+    @staticmethod
+    def _serialize_value(value):
+        # isoformat zachová mikrosekundy, na rozdíl od DjangoJSONEncoder
+        if hasattr(value, 'isoformat'):
+            return value.isoformat()
+        return value
+
+
+class SelectablePagination(PageNumberPagination):
+    """
+    Výchozí je stránkování podle čísla stránky. Parametrem ?pagination=cursor
+    (nebo předáním ?cursor=) si klient vyžádá stránkování podle klíče bez COUNT(*).
+    V režimu kurzoru se výsledky vždy řadí podle keyset_ordering.
+    """
+    mode_query_param = 'pagination'
+    keyset_ordering = ('-id',)
+    keyset = None
+
+    def use_keyset(self, request):
+        return (
+            request.query_params.get(self.mode_query_param) == 'cursor'
+            or KeysetPagination.cursor_query_param in request.query_params
+        )
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.keyset = None
+        if self.use_keyset(request):
+            self.keyset = KeysetPagination()
+            self.keyset.ordering = self.keyset_ordering
+            return self.keyset.paginate_queryset(queryset, request, view)
+        return super().paginate_queryset(queryset, request, view)
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        """
+        Async varianta paginate_queryset - COUNT(*) i stránka přes async ORM.
+        """
+        self.keyset = None
+        if self.use_keyset(request):
+            self.keyset = KeysetPagination()
+            self.keyset.ordering = self.keyset_ordering
+            return await self.keyset.apaginate_queryset(queryset, request, view)
+
+        self.request = request
+        paginator = self.django_paginator_class(queryset, self.get_page_size(request))
+        # count je cached_property - předvyplněním se vyhneme synchronnímu COUNT(*)
+        paginator.count = await queryset.acount()
+        page_number = self.get_page_number(request, paginator)
+        try:
+            self.page = paginator.page(page_number)
+        except InvalidPage as exc:
+            raise NotFound(self.invalid_page_message.format(page_number=page_number, message=str(exc)))
+        self.page.object_list = [item async for item in self.page.object_list]
+        return list(self.page)
+
+    def get_paginated_response(self, data):
+        if self.keyset is not None:
+            return self.keyset.get_paginated_response(data)
+        return super().get_paginated_response(data)
+
+
+class ProjectPagination(SelectablePagination):
+    keyset_ordering = ('-year', 'title', 'id')
+
+
+class CommentPagination(SelectablePagination):
+    keyset_ordering = ('-created_at', 'id')
+
+
+class MilestonePagination(SelectablePagination):
+    keyset_ordering = ('deadline', 'id')
@@ -0,0 +1,71 @@
+import re
+import time
+from collections import Counter
+from contextvars import ContextVar
+
+from django.conf import settings
+
+
+# Metriky právě zpracovávaného requestu. ContextVar se přenáší i do vláken
+# sync_to_async, takže se počítají i dotazy async views.
+current_metrics = ContextVar('request_metrics', default=None)
+
+IN_LIST_RE = re.compile(r'\bIN \((?:%s, )*%s\)')
+WHITESPACE_RE = re.compile(r'\s+')
+
+
+class QueryBudgetExceeded(Exception):
+    pass
+
+
+def fingerprint(sql):
+    """
+    Otisk dotazu bez parametrů - stejné dotazy s jinými hodnotami (N+1) mají stejný otisk.
+    """
+    return IN_LIST_RE.sub('IN (...)', WHITESPACE_RE.sub(' ', sql).strip())
+
+
+class RequestMetrics:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.db_time = 0.0
+        self.fingerprints = Counter()
+
+    @property
+    def query_count(self):
+        return sum(self.fingerprints.values())
+
+    @property
+    def wall_time(self):
+        return time.perf_counter() - self.started
+
+    def duplicates(self, threshold):
+        """
+        Otisky spuštěné aspoň threshold-krát, od nejčastějšího.
+        """
+        return [(sql, count) for sql, count in self.fingerprints.most_common() if count >= threshold]
+
+
+def record_query(execute, sql, params, many, context):
+    """
+    Execute wrapper (connection.execute_wrappers) - měří dotazy pro metriky aktuálního requestu.
+    """
+    metrics = current_metrics.get()
+    if metrics is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        metrics.db_time += time.perf_counter() - started
+        metrics.fingerprints[fingerprint(sql)] += 1
+
+
+def instrument_connection(connection):
+    # execute_wrappers přežijí reconnect, wrapper se přidá jen jednou
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+def get_query_budget(endpoint):
+    return settings.QUERY_BUDGETS.get(endpoint, settings.QUERY_BUDGET_DEFAULT)
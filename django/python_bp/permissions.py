@@ -1,5 +1,6 @@
 from rest_framework import permissions
-from .models import ProjectTeacher, Project
+from .models import Project
+from .access import get_project_access
 
 
 class IsTeacherOrAdminOrReadOnly(permissions.BasePermission):
@@ -38,9 +39,7 @@ class IsTeacherForProject(permissions.BasePermission):
             # U vytváření zkontrolujeme, zda je učitel přiřazen k projektu
             project_id = request.data.get('project')
             if project_id:
-                return ProjectTeacher.objects.filter(
-                    project_id=project_id, teacher=request.user
-                ).exists()
+                return get_project_access(request).is_teacher_of(project_id)
             return False
         
         # Pro ostatní metody zkontrolujeme v has_object_permission
@@ -57,17 +56,15 @@ class IsTeacherForProject(permissions.BasePermission):
         
         # Učitelé mohou upravovat záznamy pouze pro projekty, ke kterým jsou přiřazeni
         if request.user.role == 'teacher':
-            # Získání projektu podle typu objektu
-            if hasattr(obj, 'project'):
-                project = obj.project
+            # Získání id projektu podle typu objektu (bez načítání projektu z DB)
+            if hasattr(obj, 'project_id'):
+                project_id = obj.project_id
             elif isinstance(obj, Project):
-                project = obj
+                project_id = obj.pk
             else:
                 return False
             
-            return ProjectTeacher.objects.filter(
-                project=project, teacher=request.user
-            ).exists()
+            return get_project_access(request).is_teacher_of(project_id)
         
         return False
 
@@ -106,13 +103,11 @@ class IsOwnerOrTeacherOrReadOnly(permissions.BasePermission):
         
         # Studenti mohou upravovat pouze své vlastní projekty
         if request.user.role == 'student':
-            return obj.student == request.user
+            return obj.student_id == request.user.pk
         
         # Učitelé mohou upravovat projekty, ke kterým jsou přiřazeni
         if request.user.role == 'teacher':
-            return ProjectTeacher.objects.filter(
-                project=obj, teacher=request.user
-            ).exists()
+            return get_project_access(request).is_teacher_of(obj.pk)
         
         return False
     
@@ -139,11 +134,7 @@ class StudentCanAssignTeacherPermission(permissions.BasePermission):
             if request.user.role == 'student':
                 project_id = request.data.get('project')
                 if project_id:
-                    try:
-                        project = Project.objects.get(id=project_id)
-                        return project.student == request.user
-                    except Project.DoesNotExist:
-                        return False
+                    return get_project_access(request).is_student_of(project_id)
                 return False
                 
             # Teachers can create assignments too (e.g., volunteering)
@@ -163,10 +154,10 @@ class StudentCanAssignTeacherPermission(permissions.BasePermission):
             
         # Students can only modify assignments for their own projects
         if request.user.role == 'student':
-            return obj.project.student == request.user
+            return get_project_access(request).is_student_of(obj.project_id)
             
         # Teachers can modify assignments where they are the teacher
         if request.user.role == 'teacher':
-            return obj.teacher == request.user
+            return obj.teacher_id == request.user.pk
             
         return False
\ No newline at end of file
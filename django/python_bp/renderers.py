@@ -0,0 +1,43 @@
+import time
+
+from django.conf import settings
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+ORJSON_OPTIONS = orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS if orjson is not None else 0
+
+
+def use_orjson():
+    return orjson is not None and settings.JSON_RENDERER_BACKEND == 'orjson'
+
+
+class FastJSONRenderer(JSONRenderer):
+    """
+    JSONRenderer s orjson (JSON_RENDERER_BACKEND='orjson'), jinak standardní json.
+    Výstup je stejný jako u DRF: kompaktní UTF-8, datetime v ISO 8601 se 'Z' pro UTC,
+    ostatní typy (Decimal, lazy překlady, QuerySet...) převede DRF JSONEncoder.
+    Odsazení (?format=json; indent=4, browsable API) zůstává na standardním json.
+    Doba renderování se ukládá na odpověď (render_time) pro měření v middleware.
+    """
+    encoder_default = JSONEncoder().default
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        started = time.perf_counter()
+        renderer_context = renderer_context or {}
+        if data is not None and use_orjson() and self.get_indent(accepted_media_type, renderer_context) is None:
+            # Stejně jako DRF escapujeme \u2028 a \u2029 (validní JavaScript)
+            content = orjson.dumps(data, default=self.encoder_default, option=ORJSON_OPTIONS)
+            content = content.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+        else:
+            content = super().render(data, accepted_media_type, renderer_context)
+
+        response = renderer_context.get('response')
+        if response is not None:
+            response.render_time = getattr(response, 'render_time', 0.0) + time.perf_counter() - started
+        return content
@@ -0,0 +1,210 @@
+import os
+import re
+import shutil
+import uuid
+
+from django.conf import settings
+from django.db import transaction
+from django.shortcuts import get_object_or_404
+from rest_framework import status
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+
+from .derivatives import DERIVATIVE_FIELDS, schedule_derivatives
+from .file_upload import blob_response_data, validate_file_type
+from .media_store import store_file
+from .models import UploadSession
+from .upload_handlers import get_staging_dir
+
+
+CONTENT_RANGE_RE = re.compile(r'^bytes (?P<start>\d+)-(?P<end>\d+)/(?P<total>\d+)$')
+READ_CHUNK_SIZE = 64 * 1024
+
+
+def get_session_path(session):
+    """
+    Dočasný (řídký) soubor obnovitelného uploadu.
+    """
+    return os.path.join(get_staging_dir(), f'{session.id}.session')
+
+
+def delete_session(session):
+    try:
+        os.remove(get_session_path(session))
+    except FileNotFoundError:
+        pass
+    session.delete()
+
+
+def session_data(session):
+    return {
+        'id': str(session.id),
+        'type': session.file_type,
+        'file_name': session.file_name,
+        'size': session.size,
+        'offset': session.offset,
+    }
+
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def create_upload_session(request):
+    """
+    Založí obnovitelný upload. Očekává type, file_name a size (v bajtech).
+    Soubor se předalokuje jako řídký, části lze pak zapisovat na daný offset.
+    """
+    file_type = request.data.get('type', '')
+    file_name = request.data.get('file_name', '')
+
+    error = validate_file_type(file_type, file_name)
+    if error:
+        return Response({'error': error}, status=status.HTTP_400_BAD_REQUEST)
+
+    try:
+        size = int(request.data.get('size'))
+    except (TypeError, ValueError):
+        return Response({'error': 'Chybí velikost souboru.'}, status=status.HTTP_400_BAD_REQUEST)
+
+    max_size = settings.MAX_RESUMABLE_UPLOAD_SIZE
+    if size <= 0 or size > max_size:
+        return Response(
+            {'error': f'Soubor je příliš velký. Maximální povolená velikost je {max_size / (1024 * 1024)} MB.'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+    # Každá relace drží předalokovaný soubor až do MAX_RESUMABLE_UPLOAD_SIZE
+    max_sessions = settings.UPLOAD_SESSION_MAX_PER_USER
+    if UploadSession.objects.filter(user=request.user).count() >= max_sessions:
+        return Response(
+            {'error': f'Příliš mnoho rozpracovaných uploadů. Nejvýše {max_sessions} najednou, nejdřív některý dokončete nebo zrušte.'},
+            status=status.HTTP_429_TOO_MANY_REQUESTS
+        )
+
+    session = UploadSession.objects.create(
+        user=request.user, file_type=file_type, file_name=file_name, size=size
+    )
+    os.makedirs(get_staging_dir(), exist_ok=True)
+    with open(get_session_path(session), 'wb') as destination:
+        destination.truncate(size)
+
+    return Response(session_data(session), status=status.HTTP_201_CREATED,
+                    headers={'Upload-Offset': str(session.offset)})
+
+
+@api_view(['GET', 'PUT', 'DELETE'])
+@permission_classes([IsAuthenticated])
+def upload_session_detail(request, pk):
+    """
+    GET/HEAD vrátí aktuální offset, PUT zapíše část souboru
+    (hlavička Content-Range: bytes start-end/total), DELETE upload zruší.
+    """
+    if request.method == 'DELETE':
+        session = get_object_or_404(UploadSession, pk=pk, user=request.user)
+        delete_session(session)
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+    if request.method != 'PUT':
+        session = get_object_or_404(UploadSession, pk=pk, user=request.user)
+        return Response(session_data(session), headers={'Upload-Offset': str(session.offset)})
+
+    match = CONTENT_RANGE_RE.match(request.META.get('HTTP_CONTENT_RANGE', ''))
+    if not match:
+        return Response({'error': 'Chybí nebo je neplatná hlavička Content-Range.'},
+                        status=status.HTTP_400_BAD_REQUEST)
+    start, end, total = (int(match.group(name)) for name in ('start', 'end', 'total'))
+    length = end - start + 1
+    try:
+        content_length = int(request.META.get('CONTENT_LENGTH') or 0)
+    except ValueError:
+        content_length = 0
+
+    if length <= 0 or content_length != length:
+        return Response({'error': 'Délka těla neodpovídá hlavičce Content-Range.'},
+                        status=status.HTTP_400_BAD_REQUEST)
+    if length > settings.UPLOAD_CHUNK_MAX_SIZE:
+        return Response({'error': 'Část souboru je příliš velká.'},
+                        status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
+
+    session = get_object_or_404(UploadSession, pk=pk, user=request.user)
+    error = check_chunk_range(session, start, end, total)
+    if error is not None:
+        return error
+
+    # Tělo se čte mimo transakci do vlastního souboru části - pomalý klient tak nedrží
+    # zámek řádku ani DB spojení, souběžné PUT na stejný offset si data nepřepíšou
+    chunk_path = os.path.join(get_staging_dir(), f'{session.id}.{uuid.uuid4()}.chunk')
+    try:
+        written = 0
+        with open(chunk_path, 'wb') as chunk_file:
+            while written < length:
+                chunk = request.stream.read(min(READ_CHUNK_SIZE, length - written))
+                if not chunk:
+                    break
+                chunk_file.write(chunk)
+                written += len(chunk)
+
+        with transaction.atomic():
+            # Zámek jen na ověření a posun offsetu - souběžné PUT se zařadí za sebe
+            session = get_object_or_404(UploadSession.objects.select_for_update(), pk=pk, user=request.user)
+            error = check_chunk_range(session, start, end, total)
+            if error is not None:
+                return error
+
+            with open(chunk_path, 'rb') as source, open(get_session_path(session), 'r+b') as destination:
+                destination.seek(start)
+                shutil.copyfileobj(source, destination, READ_CHUNK_SIZE)
+
+            # Přerušený přenos - offset posuneme jen o skutečně přijatá data
+            session.offset = start + written
+            session.save(update_fields=['offset', 'updated_at'])
+    finally:
+        try:
+            os.remove(chunk_path)
+        except FileNotFoundError:
+            pass
+
+    return Response(session_data(session), headers={'Upload-Offset': str(session.offset)})
+
+
+def check_chunk_range(session, start, end, total):
+    """
+    Chybová odpověď pro část mimo soubor (416) nebo na jiném než aktuálním offsetu (409), jinak None.
+    """
+    if total != session.size or end >= session.size:
+        return Response({'error': 'Rozsah je mimo velikost souboru.'},
+                        status=status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE)
+    if start != session.offset:
+        return Response(session_data(session), status=status.HTTP_409_CONFLICT,
+                        headers={'Upload-Offset': str(session.offset)})
+    return None
+
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def finalize_upload_session(request, pk):
+    """
+    Dokončí upload: ověří úplnost, typ a příponu a přesune soubor
+    do obsahově adresovaného úložiště.
+    """
+    with transaction.atomic():
+        session = get_object_or_404(UploadSession.objects.select_for_update(), pk=pk, user=request.user)
+
+        if session.offset != session.size:
+            return Response(session_data(session), status=status.HTTP_409_CONFLICT,
+                            headers={'Upload-Offset': str(session.offset)})
+
+        error = validate_file_type(session.file_type, session.file_name)
+        if error:
+            delete_session(session)
+            return Response({'error': error}, status=status.HTTP_400_BAD_REQUEST)
+
+        # SHA-256 se spočítá v store_file, stejný obsah se uloží jen jednou
+        blob = store_file(get_session_path(session), session.file_name, uploader=request.user)
+        file_type = session.file_type
+        session.delete()
+
+    if file_type in DERIVATIVE_FIELDS:
+        schedule_derivatives(blob.path)
+
+    return Response(blob_response_data(blob), status=status.HTTP_201_CREATED)
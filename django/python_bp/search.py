@@ -0,0 +1,99 @@
+from django.conf import settings
+from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector
+from django.db import DataError, ProgrammingError, connection, transaction
+from django.db.models import F, Func, TextField, Value
+from rest_framework import filters
+from rest_framework.exceptions import ValidationError
+
+
+# Režimy odpovídají parametru search_type u SearchQuery.
+# 'raw' předává text přímo jako syntaxi to_tsquery - jen pro přihlášené uživatele
+SEARCH_MODES = ('websearch', 'plain', 'phrase', 'raw')
+PUBLIC_SEARCH_MODES = ('websearch', 'plain', 'phrase')
+DEFAULT_SEARCH_MODE = 'websearch'
+
+
+def get_search_config():
+    """
+    Vrací konfiguraci fulltextového vyhledávání PostgreSQL.
+    Konfiguraci 'czech' je nutné v databázi nejdříve vytvořit (slovníky nejsou součástí PostgreSQL).
+    """
+    return getattr(settings, 'PROJECT_SEARCH_CONFIG', 'simple')
+
+
+def project_search_vector():
+    """
+    Vážený vektor pro projekty: název (A) > klíčová slova (B) > popis (C).
+    """
+    config = get_search_config()
+    keywords = Func(F('keywords'), Value(' '), function='array_to_string', output_field=TextField())
+    return (
+        SearchVector('title', weight='A', config=config)
+        + SearchVector(keywords, weight='B', config=config)
+        + SearchVector('description', weight='C', config=config)
+    )
+
+
+def update_search_vector(queryset):
+    """
+    Přepočítá uložený search_vector pro zadané projekty jedním UPDATE dotazem.
+    """
+    return queryset.update(search_vector=project_search_vector())
+
+
+def validate_raw_query(search, config):
+    """
+    Chybná syntaxe to_tsquery (např. 'a & | b') by shodila až hlavní dotaz (500),
+    proto se dotaz v režimu raw ověří předem v samostatném savepointu.
+    """
+    try:
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute('SELECT to_tsquery(%s::regconfig, %s)', [config, search])
+    except (DataError, ProgrammingError):
+        raise ValidationError({'search': 'Neplatná syntaxe dotazu pro režim raw.'})
+
+
+def search_projects(queryset, search, search_mode=None, allow_raw=False):
+    """
+    Filtruje projekty podle fulltextového dotazu a přidá anotaci search_rank.
+    Režim raw je povolen jen s allow_raw (endpointy pro přihlášené uživatele).
+    """
+    search_mode = search_mode or DEFAULT_SEARCH_MODE
+    modes = SEARCH_MODES if allow_raw else PUBLIC_SEARCH_MODES
+    if search_mode not in modes:
+        raise ValidationError({
+            'search_mode': f"Neplatný režim vyhledávání. Povolené hodnoty jsou: {', '.join(modes)}."
+        })
+    if search_mode == 'raw':
+        validate_raw_query(search, get_search_config())
+
+    query = SearchQuery(search, search_type=search_mode, config=get_search_config())
+    return queryset.filter(search_vector=query).annotate(
+        search_rank=SearchRank(F('search_vector'), query)
+    )
+
+
+class ProjectSearchFilter(filters.SearchFilter):
+    """
+    Náhrada SearchFilter, která místo ICONTAINS používá uložený search_vector.
+    """
+    search_mode_param = 'search_mode'
+
+    def filter_queryset(self, request, queryset, view):
+        search = request.query_params.get(self.search_param, '').strip()
+        if not search:
+            return queryset
+        return search_projects(queryset, search, request.query_params.get(self.search_mode_param),
+                               allow_raw=request.user.is_authenticated)
+
+
+class RankedOrderingFilter(filters.OrderingFilter):
+    """
+    Pokud klient neurčí řazení, výsledky hledání se řadí podle relevance.
+    """
+    def get_default_ordering(self, view):
+        ordering = super().get_default_ordering(view) or []
+        search = view.request.query_params.get(filters.SearchFilter.search_param, '').strip()
+        if search:
+            return ['-search_rank', *ordering]
+        return ordering or None
@@ -1,8 +1,84 @@
 from rest_framework import serializers
 from django.contrib.auth.password_validation import validate_password
+from django.db.models import Prefetch
+from .derivatives import get_variant_urls, is_variants_ready, variants_ready, variants_ready_name
+from .fieldsets import only_fields
 from .models import User, Project, ProjectTeacher, Milestone, Comment, Consultation, ProjectEvaluation
 
 
+class EagerLoadingMixin:
+    """
+    Plán načítání querysetu pro serializér.
+    select_related_fields se načtou JOINem, vnořené serializéry (many=True)
+    se načtou přes Prefetch s vlastním plánem, takže počet dotazů nezávisí na počtu záznamů.
+    S fields (sparse fieldset, viz fieldsets.py) serializér vrací jen vybraná pole
+    a plán vynechá nepotřebné JOINy a prefetche a zúží SELECT přes .only().
+    """
+    select_related_fields = ()
+    prefetch_related_fields = ()
+
+    def __init__(self, *args, fields=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+
+    @classmethod
+    def setup_eager_loading(cls, queryset, fields=None):
+        select_related = cls.select_related_fields
+        if fields is not None:
+            only = only_fields(cls, fields)
+            if only is not None:
+                queryset = queryset.only(*only)
+                select_related = [name for name in select_related if any(path.startswith(f'{name}__') for path in only)]
+        if select_related:
+            queryset = queryset.select_related(*select_related)
+
+        # Připravenost variant obrázků jako anotace (EXISTS do media_blobs), ne dotaz na řádek
+        for name, field in cls._declared_fields.items():
+            if isinstance(field, ImageVariantsField) and (fields is None or name in fields):
+                queryset = queryset.annotate(**{variants_ready_name(field.source): variants_ready(field.source)})
+
+        prefetches = list(cls.prefetch_related_fields)
+        for name, field in cls._declared_fields.items():
+            if not isinstance(field, serializers.ListSerializer):
+                continue
+            if fields is not None and name not in fields:
+                continue
+            child = field.child
+            related_model = child.Meta.model
+            # Pevné pořadí vnořených položek (modely nemají Meta.ordering) - shodné s fast_serializers
+            related_queryset = related_model.objects.order_by('pk')
+            if isinstance(child, EagerLoadingMixin):
+                related_queryset = child.setup_eager_loading(related_queryset)
+            prefetches.append(Prefetch(field.source or name, queryset=related_queryset))
+
+        if prefetches:
+            queryset = queryset.prefetch_related(*prefetches)
+        return queryset
+
+
+class ImageVariantsField(serializers.Field):
+    """
+    URL zmenšených variant obrázku (viz derivatives.py), None dokud nejsou vygenerované.
+    Připravenost čte z anotace <pole>_variants_ready (setup_eager_loading),
+    u instance bez anotace jedním dotazem.
+    """
+    def __init__(self, **kwargs):
+        kwargs['read_only'] = True
+        super().__init__(**kwargs)
+
+    def get_attribute(self, instance):
+        path = super().get_attribute(instance)
+        ready = getattr(instance, variants_ready_name(self.source), None)
+        if ready is None:
+            ready = is_variants_ready(path)
+        return path, ready
+
+    def to_representation(self, value):
+        return get_variant_urls(*value)
+
+
 class UserSerializer(serializers.ModelSerializer):
     class Meta:
         model = User
@@ -34,7 +110,8 @@ class UserCreateSerializer(serializers.ModelSerializer):
         return user
 
 
-class ProjectTeacherSerializer(serializers.ModelSerializer):
+class ProjectTeacherSerializer(EagerLoadingMixin, serializers.ModelSerializer):
+    select_related_fields = ('teacher',)
     teacher_name = serializers.ReadOnlyField(source='teacher.username')
     role_display = serializers.ReadOnlyField(source='get_role_display')
 
@@ -44,7 +121,7 @@ class ProjectTeacherSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'assigned_at', 'updated_at']
 
 
-class MilestoneSerializer(serializers.ModelSerializer):
+class MilestoneSerializer(EagerLoadingMixin, serializers.ModelSerializer):
     status_display = serializers.ReadOnlyField(source='get_status_display')
 
     class Meta:
@@ -53,7 +130,8 @@ class MilestoneSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'created_at', 'updated_at']
 
 
-class CommentSerializer(serializers.ModelSerializer):
+class CommentSerializer(EagerLoadingMixin, serializers.ModelSerializer):
+    select_related_fields = ('user',)
     user_name = serializers.ReadOnlyField(source='user.username')
     user_role = serializers.ReadOnlyField(source='user.role')
 
@@ -63,7 +141,8 @@ class CommentSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'created_at', 'updated_at']
 
 
-class ConsultationSerializer(serializers.ModelSerializer):
+class ConsultationSerializer(EagerLoadingMixin, serializers.ModelSerializer):
+    select_related_fields = ('teacher',)
     teacher_name = serializers.ReadOnlyField(source='teacher.username')
 
     class Meta:
@@ -72,7 +151,8 @@ class ConsultationSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'created_at', 'updated_at']
 
 
-class ProjectEvaluationSerializer(serializers.ModelSerializer):
+class ProjectEvaluationSerializer(EagerLoadingMixin, serializers.ModelSerializer):
+    select_related_fields = ('teacher',)
     teacher_name = serializers.ReadOnlyField(source='teacher.username')
 
     class Meta:
@@ -81,7 +161,8 @@ class ProjectEvaluationSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'created_at', 'updated_at']
 
 
-class ProjectDetailSerializer(serializers.ModelSerializer):
+class ProjectDetailSerializer(EagerLoadingMixin, serializers.ModelSerializer):
+    select_related_fields = ('student',)
     student_name = serializers.ReadOnlyField(source='student.username')
     status_display = serializers.ReadOnlyField(source='get_status_display')
     type_display = serializers.ReadOnlyField(source='get_type_of_work_display')
@@ -90,13 +171,15 @@ class ProjectDetailSerializer(serializers.ModelSerializer):
     comments = CommentSerializer(many=True, read_only=True)
     consultations = ConsultationSerializer(many=True, read_only=True)
     evaluations = ProjectEvaluationSerializer(many=True, read_only=True)
+    thumbnail_variants = ImageVariantsField(source='thumbnail')
+    poster_variants = ImageVariantsField(source='poster')
 
     class Meta:
         model = Project
         fields = [
             'id', 'title', 'description', 'year', 'field', 'keywords', 
-            'student', 'student_name', 'thumbnail', 'document', 
-            'poster', 'video', 'public_visibility', 'status', 
+            'student', 'student_name', 'thumbnail', 'thumbnail_variants', 'document', 
+            'poster', 'poster_variants', 'video', 'public_visibility', 'status', 
             'status_display', 'type_of_work', 'type_display', 
             'created_at', 'updated_at', 'teachers', 'milestones', 
             'comments', 'consultations', 'evaluations'
@@ -104,22 +187,33 @@ class ProjectDetailSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'created_at', 'updated_at']
 
 
-class ProjectListSerializer(serializers.ModelSerializer):
+class ProjectListSerializer(EagerLoadingMixin, serializers.ModelSerializer):
+    select_related_fields = ('student',)
     student_name = serializers.ReadOnlyField(source='student.username')
     status_display = serializers.ReadOnlyField(source='get_status_display')
     type_display = serializers.ReadOnlyField(source='get_type_of_work_display')
+    thumbnail_variants = ImageVariantsField(source='thumbnail')
 
     class Meta:
         model = Project
         fields = [
             'id', 'title', 'description', 'year', 'field', 'keywords',
-            'student', 'student_name', 'thumbnail', 'status',
+            'student', 'student_name', 'thumbnail', 'thumbnail_variants', 'status',
             'status_display', 'type_of_work', 'type_display',
             'created_at', 'updated_at'
         ]
         read_only_fields = ['id', 'created_at', 'updated_at']
 
 
+class SimilarProjectSerializer(serializers.ModelSerializer):
+    thumbnail_variants = ImageVariantsField(source='thumbnail')
+
+    class Meta:
+        model = Project
+        fields = ['id', 'title', 'year', 'field', 'keywords', 'thumbnail', 'thumbnail_variants']
+        read_only_fields = fields
+
+
 class ProjectCreateUpdateSerializer(serializers.ModelSerializer):
     class Meta:
         model = Project
@@ -138,7 +232,8 @@ class ProjectCreateUpdateSerializer(serializers.ModelSerializer):
 
 # Přidejte tento nový serializér do souboru serializer.py
 
-class ProjectTeacherSimpleSerializer(serializers.ModelSerializer):
+class ProjectTeacherSimpleSerializer(EagerLoadingMixin, serializers.ModelSerializer):
+    select_related_fields = ('teacher',)
     teacher_name = serializers.ReadOnlyField(source='teacher.username')
     role_display = serializers.ReadOnlyField(source='get_role_display')
 
@@ -147,17 +242,19 @@ class ProjectTeacherSimpleSerializer(serializers.ModelSerializer):
         fields = ['teacher', 'teacher_name', 'role', 'role_display']
 
 
-class ProjectWithTeachersSerializer(serializers.ModelSerializer):
+class ProjectWithTeachersSerializer(EagerLoadingMixin, serializers.ModelSerializer):
+    select_related_fields = ('student',)
     student_name = serializers.ReadOnlyField(source='student.username')
     status_display = serializers.ReadOnlyField(source='get_status_display')
     type_display = serializers.ReadOnlyField(source='get_type_of_work_display')
     teachers = ProjectTeacherSimpleSerializer(many=True, read_only=True)
+    thumbnail_variants = ImageVariantsField(source='thumbnail')
 
     class Meta:
         model = Project
         fields = [
             'id', 'title', 'description', 'year', 'field', 'keywords',
-            'student', 'student_name', 'thumbnail', 'status',
+            'student', 'student_name', 'thumbnail', 'thumbnail_variants', 'status',
             'status_display', 'type_of_work', 'type_display',
             'created_at', 'updated_at', 'teachers'
         ]
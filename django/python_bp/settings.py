@@ -25,6 +25,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     
     # Third party apps
     'rest_framework',
@@ -39,6 +40,8 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'python_bp.middleware.PerformanceMiddleware',
+    'python_bp.middleware.CompressionMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -67,6 +70,8 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = 'python_bp.wsgi.application'
+# SSE stream (projects/<id>/events/) vyžaduje ASGI server, např. uvicorn python_bp.asgi:application
+ASGI_APPLICATION = 'python_bp.asgi.application'
 
 # Database
 DATABASES = {
@@ -83,6 +88,28 @@ DATABASES = {
     }
 }
 
+# Cache
+# LocMemCache vyřazuje nejdéle nepoužité záznamy (LRU), ale je samostatná pro každý proces.
+# Při více workerech gunicornu lze nastavit FileBasedCache nebo Redis, aby invalidace platila pro všechny.
+CACHES = {
+    'default': {
+        'BACKEND': os.environ.get('DEFAULT_CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.environ.get('DEFAULT_CACHE_LOCATION', 'default'),
+    },
+    'public': {
+        'BACKEND': os.environ.get('PUBLIC_CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.environ.get('PUBLIC_CACHE_LOCATION', 'public-projects'),
+        'TIMEOUT': int(os.environ.get('PUBLIC_CACHE_TIMEOUT', 300)),
+        'OPTIONS': {
+            'MAX_ENTRIES': int(os.environ.get('PUBLIC_CACHE_MAX_ENTRIES', 1000)),
+        },
+    },
+}
+
+# Krátkodobá cache množiny projektů uživatele (access.py), 0 = cache vypnuta.
+# Platí jen se sdíleným DEFAULT_CACHE_BACKEND, nad LocMemCache zůstává vypnutá.
+PROJECT_ACCESS_CACHE_TIMEOUT = int(os.environ.get('PROJECT_ACCESS_CACHE_TIMEOUT', 0))
+
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -112,6 +139,14 @@ STATIC_ROOT = os.environ.get('STATIC_ROOT', os.path.join(BASE_DIR, 'staticfiles'
 # Media files
 MEDIA_URL = os.environ.get('MEDIA_URL', '/media/')
 MEDIA_ROOT = os.environ.get('MEDIA_ROOT', os.path.join(BASE_DIR, 'media'))
+# Soubory servíruje aplikace s kontrolou přístupu (media_serving.py):
+# 'django' = FileResponse s podporou Range, 'x-accel' = nginx (X-Accel-Redirect), 'x-sendfile' = Apache/lighttpd
+MEDIA_SERVE_MODE = os.environ.get('MEDIA_SERVE_MODE', 'django')
+# Interní location v nginx (alias na MEDIA_ROOT), použije se jen v režimu 'x-accel'
+MEDIA_ACCEL_PREFIX = os.environ.get('MEDIA_ACCEL_PREFIX', '/protected-media/')
+MEDIA_CACHE_MAX_AGE = int(os.environ.get('MEDIA_CACHE_MAX_AGE', 3600))
+# Platnost MediaTokenu (?token= u médií a EventSource, viz authentication.py) v sekundách
+MEDIA_TOKEN_LIFETIME = int(os.environ.get('MEDIA_TOKEN_LIFETIME', 600))
 
 # Default primary key field type
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
@@ -130,6 +165,10 @@ REST_FRAMEWORK = {
     'DEFAULT_FILTER_BACKENDS': [
         'django_filters.rest_framework.DjangoFilterBackend',
     ],
+    'DEFAULT_RENDERER_CLASSES': (
+        'python_bp.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ),
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 20,
 }
@@ -158,11 +197,84 @@ CORS_ALLOWED_ORIGINS = cors_origins.split(',') if cors_origins else [
 ]
 
 # File upload settings
+# Soubory se zapisují rovnou do MEDIA_ROOT a počítá se jejich SHA-256 (viz upload_handlers.py)
 FILE_UPLOAD_HANDLERS = [
-    'django.core.files.uploadhandler.MemoryFileUploadHandler',
-    'django.core.files.uploadhandler.TemporaryFileUploadHandler',
+    'python_bp.upload_handlers.StreamingFileUploadHandler',
 ]
 MAX_UPLOAD_SIZE = int(os.environ.get('MAX_UPLOAD_SIZE', 10 * 1024 * 1024))  # Default 10 MB
+# Rozpracované soubory - musí být na stejném souborovém systému jako MEDIA_ROOT
+UPLOAD_STAGING_DIR = os.environ.get('UPLOAD_STAGING_DIR', os.path.join(MEDIA_ROOT, '.uploads'))
+# Obnovitelný upload po částech (viz resumable_upload.py)
+MAX_RESUMABLE_UPLOAD_SIZE = int(os.environ.get('MAX_RESUMABLE_UPLOAD_SIZE', 2 * 1024 * 1024 * 1024))  # Default 2 GB
+UPLOAD_CHUNK_MAX_SIZE = int(os.environ.get('UPLOAD_CHUNK_MAX_SIZE', 16 * 1024 * 1024))  # Default 16 MB
+UPLOAD_SESSION_MAX_AGE_HOURS = int(os.environ.get('UPLOAD_SESSION_MAX_AGE_HOURS', 24))
+# Nejvýše rozpracovaných obnovitelných uploadů na uživatele
+UPLOAD_SESSION_MAX_PER_USER = int(os.environ.get('UPLOAD_SESSION_MAX_PER_USER', 5))
+# Pool procesů pro úlohy na pozadí (tasks.py) - např. generování variant obrázků
+BACKGROUND_WORKERS = int(os.environ.get('BACKGROUND_WORKERS', 2))
+BACKGROUND_QUEUE_SIZE = int(os.environ.get('BACKGROUND_QUEUE_SIZE', 100))
+# Úklid obsahově adresovaného úložiště (gc_media_blobs)
+MEDIA_DELETED_RETENTION_DAYS = int(os.environ.get('MEDIA_DELETED_RETENTION_DAYS', 30))
+MEDIA_BLOB_GRACE_HOURS = int(os.environ.get('MEDIA_BLOB_GRACE_HOURS', 24))
+
+# Fulltextové vyhledávání ('czech' vyžaduje v PostgreSQL nainstalované české slovníky)
+PROJECT_SEARCH_CONFIG = os.environ.get('PROJECT_SEARCH_CONFIG', 'simple')
+# Našeptávání klíčových slov - větší slovník se v paměti procesu nedrží (hledá se jen indexem)
+KEYWORD_TRIE_MAX_SIZE = int(os.environ.get('KEYWORD_TRIE_MAX_SIZE', 50000))
+# Podobné projekty (similarity.py) - počet uložených sousedů a minimální kosinová podobnost
+SIMILAR_PROJECTS_K = int(os.environ.get('SIMILAR_PROJECTS_K', 10))
+SIMILAR_PROJECTS_MIN_SCORE = float(os.environ.get('SIMILAR_PROJECTS_MIN_SCORE', 0.05))
+# Delta synchronizace (sync.py) - max. změn jednoho typu v odpovědi, zpoždění kurzoru
+# za aktuálním časem (nepotvrzené transakce) a doba uchování tombstonů (prune_tombstones)
+SYNC_MAX_CHANGES = int(os.environ.get('SYNC_MAX_CHANGES', 500))
+SYNC_CURSOR_LAG_SECONDS = int(os.environ.get('SYNC_CURSOR_LAG_SECONDS', 5))
+SYNC_TOMBSTONE_RETENTION_DAYS = int(os.environ.get('SYNC_TOMBSTONE_RETENTION_DAYS', 90))
+# Živé události projektu přes SSE (events.py) - 'local' = pub/sub v procesu,
+# 'postgres' = LISTEN/NOTIFY mezi více workery
+EVENTS_BACKEND = os.environ.get('EVENTS_BACKEND', 'local')
+EVENTS_CHANNEL = os.environ.get('EVENTS_CHANNEL', 'project_events')
+SSE_HEARTBEAT_SECONDS = int(os.environ.get('SSE_HEARTBEAT_SECONDS', 15))
+SSE_QUEUE_SIZE = int(os.environ.get('SSE_QUEUE_SIZE', 100))
+SSE_RETRY_MS = int(os.environ.get('SSE_RETRY_MS', 3000))
+# Veřejné endpointy (seznam, facety, detail) jako async views (async_views.py).
+# Vyplatí se jen pod ASGI serverem, pod WSGI by každý request spouštěl vlastní event loop.
+ASYNC_PUBLIC_VIEWS = os.environ.get('ASYNC_PUBLIC_VIEWS', 'False') == 'True'
+# List endpointy projektů serializují řádky z .values() (fast_serializers.py) místo ModelSerializeru
+FAST_LIST_SERIALIZERS = os.environ.get('FAST_LIST_SERIALIZERS', 'False') == 'True'
+
+# JSON renderer: 'orjson' (pokud je nainstalovaný), jinak standardní json
+JSON_RENDERER_BACKEND = os.environ.get('JSON_RENDERER_BACKEND', 'orjson')
+# Komprese odpovědí (gzip, brotli pokud je nainstalovaný) od této velikosti v bajtech
+COMPRESSION_MIN_SIZE = int(os.environ.get('COMPRESSION_MIN_SIZE', 1024))
+COMPRESSION_GZIP_LEVEL = int(os.environ.get('COMPRESSION_GZIP_LEVEL', 6))
+COMPRESSION_BROTLI_QUALITY = int(os.environ.get('COMPRESSION_BROTLI_QUALITY', 5))
+
+# Měření requestů (PerformanceMiddleware): hlavička Server-Timing s časy a počtem dotazů.
+# Výchozí jen s DEBUG - v produkci by časy DB a počty dotazů viděl každý anonymní klient
+SERVER_TIMING = os.environ.get('SERVER_TIMING', str(DEBUG)) == 'True'
+# Rozpočet SQL dotazů podle názvu URL; překročení se zaloguje ('log'), v testech vyhodí výjimku ('raise')
+QUERY_BUDGET_MODE = os.environ.get('QUERY_BUDGET_MODE', 'log')
+QUERY_BUDGET_DEFAULT = None
+QUERY_BUDGETS = {
+    'public-projects-list': 5,
+    'public-projects-facets': 4,
+    'public-project-detail': 10,
+    'visible-projects-list': 8,
+    'project-list': 8,
+    'project-detail': 12,
+    'keyword-autocomplete': 4,
+}
+# Dotaz se stejným otiskem spuštěný aspoň tolikrát se zaloguje jako možné N+1
+QUERY_DUPLICATE_THRESHOLD = int(os.environ.get('QUERY_DUPLICATE_THRESHOLD', 5))
+
+# Metriky pro Prometheus na /metrics/ (metrics.py). Každý proces zapisuje do vlastního
+# souboru v METRICS_DIR - před startem serveru adresář vyčistit (clear_metrics), za běhu
+# soubory ukončených workerů pravidelně slučovat (clear_metrics --dead, např. z cronu).
+METRICS_ENABLED = os.environ.get('METRICS_ENABLED', 'True') == 'True'
+METRICS_DIR = os.environ.get('METRICS_DIR', os.path.join(BASE_DIR, 'metrics'))
+# Pokud je nastaven, /metrics/ vyžaduje hlavičku 'Authorization: Bearer <token>';
+# bez tokenu je /metrics/ dostupné jen s DEBUG=True
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN', '')
 
 # Logging
 LOGGING = {
@@ -0,0 +1,291 @@
+from django.db import transaction
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_delete, post_init, post_save
+from django.dispatch import receiver
+
+from .access import invalidate_project_access
+from .cache import invalidate_public_detail, invalidate_public_list
+from .events import publish_event
+from .keywords import project_keywords, update_keyword_usage
+from .media_store import PROJECT_MEDIA_FIELDS, get_media_refs, update_ref_counts
+from .models import Project, ProjectTeacher, Milestone, Comment, Consultation, ProjectEvaluation, Tombstone
+from .performance import instrument_connection
+from .search import update_search_vector
+from .serializer import CommentSerializer
+from .similarity import schedule_similarity_update
+from .sync import SYNC_TYPE_NAMES
+
+
+SEARCH_SOURCE_FIELDS = {'title', 'description', 'keywords'}
+# Pole, která ovlivňují doporučení podobných projektů (text a to, zda je projekt kandidátem)
+SIMILARITY_SOURCE_FIELDS = SEARCH_SOURCE_FIELDS | {'public_visibility', 'deleted'}
+PROJECT_CHILD_MODELS = (ProjectTeacher, Milestone, Comment, Consultation, ProjectEvaluation)
+
+
+def _is_public(public_visibility, deleted):
+    return bool(public_visibility) and not deleted
+
+
+def _field_state(project, fields):
+    # None, pokud některé pole není načtené (only/defer) - změnu pak nepoznáme
+    if not all(field in project.__dict__ for field in fields):
+        return None
+    # Kopie seznamu keywords - úprava na místě (append) by jinak změnila i uložený stav
+    return tuple(
+        list(value) if isinstance(value, list) else value
+        for value in (project.__dict__[field] for field in sorted(fields))
+    )
+
+
+def _active_keywords(project):
+    # Smazané projekty se do usage_count nepočítají
+    return {} if project.deleted else project_keywords(project.keywords)
+
+
+@receiver(post_init, sender=Project)
+def remember_project_state(sender, instance, **kwargs):
+    """
+    Uloží stav projektu při načtení, aby šlo po uložení poznat změnu viditelnosti.
+    U odložených polí (only/defer) stav neznáme a cache se zneplatní preventivně.
+    """
+    if 'public_visibility' in instance.__dict__ and 'deleted' in instance.__dict__:
+        instance._was_public = _is_public(instance.public_visibility, instance.deleted)
+    else:
+        instance._was_public = None
+    instance._original_student_id = instance.__dict__.get('student_id')
+    instance._original_media = {
+        field: instance.__dict__[field] for field in PROJECT_MEDIA_FIELDS if field in instance.__dict__
+    }
+    if 'keywords' in instance.__dict__ and 'deleted' in instance.__dict__:
+        instance._original_keywords = _active_keywords(instance)
+    else:
+        instance._original_keywords = None
+    instance._original_search = _field_state(instance, SEARCH_SOURCE_FIELDS)
+    instance._original_similarity = _field_state(instance, SIMILARITY_SOURCE_FIELDS)
+
+
+@receiver(post_save, sender=Project)
+def refresh_project_search_vector(sender, instance, created, update_fields=None, **kwargs):
+    """
+    Udržuje search_vector aktuální po změně textových polí projektu. Uložení, které název,
+    popis ani klíčová slova nezměnilo (set_visibility, submit, soft delete), UPDATE nespouští.
+    QuerySet.update() a bulk_create signál nevyvolají - po nich rebuild_search_vectors.
+    """
+    if update_fields is not None and not SEARCH_SOURCE_FIELDS.intersection(update_fields):
+        return
+    state = _field_state(instance, SEARCH_SOURCE_FIELDS)
+    if not created and state is not None and state == instance._original_search:
+        return
+    instance._original_search = state
+    update_search_vector(Project.objects.filter(pk=instance.pk))
+
+
+@receiver(post_save, sender=Project)
+def refresh_project_similarities(sender, instance, created, update_fields=None, **kwargs):
+    """
+    Přepočet sousedů projektu na pozadí (pool procesů) až po commitu transakce,
+    jen pokud se změnil text, klíčová slova, viditelnost nebo smazání.
+    """
+    if update_fields is not None and not SIMILARITY_SOURCE_FIELDS.intersection(update_fields):
+        return
+    state = _field_state(instance, SIMILARITY_SOURCE_FIELDS)
+    if not created and state is not None and state == instance._original_similarity:
+        return
+    instance._original_similarity = state
+    project_id = instance.pk
+    transaction.on_commit(lambda: schedule_similarity_update(project_id))
+
+
+@receiver(post_save, sender=Project)
+def record_hidden_project(sender, instance, created, **kwargs):
+    """
+    Skrytí veřejného projektu zapíše tombstone, aby ho delta synchronizace odebrala
+    uživatelům, kteří ho viděli jen jako veřejný. Musí běžet před invalidate_public_project_cache.
+    """
+    if not created and instance._was_public and not instance.public_visibility and not instance.deleted:
+        Tombstone.objects.create(model='project', object_id=instance.pk, project_id=instance.pk,
+                                 user_id=instance.student_id, reason='hidden')
+
+
+@receiver(post_save, sender=Project)
+def invalidate_public_project_cache(sender, instance, created, **kwargs):
+    """
+    Veřejnou cache je nutné zneplatnit, pokud projekt byl nebo je veřejný
+    (změna obsahu, set_visibility i soft delete).
+    """
+    is_public = _is_public(instance.public_visibility, instance.deleted)
+    was_public = not created and instance._was_public is not False
+    if is_public or was_public:
+        invalidate_public_list()
+        invalidate_public_detail(instance.pk)
+    instance._was_public = is_public
+
+
+@receiver(post_delete, sender=Project)
+def invalidate_deleted_project_cache(sender, instance, **kwargs):
+    if instance._was_public is not False:
+        invalidate_public_list()
+        invalidate_public_detail(instance.pk)
+
+
+def record_revoked_access(project_id, user_id):
+    """
+    Tombstone projektu pro uživatele, který k němu přišel o přístup - delta synchronizace
+    mu tak odebere projekt i jeho podřízená data. Nic nezapíše, pokud přístup trvá
+    (jiné přiřazení učitele nebo autor projektu).
+    """
+    if user_id is None:
+        return
+    if (ProjectTeacher.objects.filter(project_id=project_id, teacher_id=user_id).exists()
+            or Project.objects.filter(pk=project_id, student_id=user_id).exists()):
+        return
+    Tombstone.objects.create(model='project', object_id=project_id, project_id=project_id,
+                             user_id=user_id, reason='revoked')
+
+
+@receiver(post_save, sender=Project)
+def invalidate_student_access(sender, instance, created, **kwargs):
+    """
+    Změna autora projektu mění množinu projektů původního i nového studenta.
+    """
+    if created or instance.student_id != instance._original_student_id:
+        invalidate_project_access(instance.student_id, instance._original_student_id)
+        if not created:
+            record_revoked_access(instance.pk, instance._original_student_id)
+    instance._original_student_id = instance.student_id
+
+
+def record_tombstone(sender, instance, **kwargs):
+    """
+    Tvrdé smazání projektu nebo podřízeného objektu (včetně kaskády) pro delta synchronizaci.
+    """
+    public = False
+    if sender is Project:
+        project_id, user_id = instance.pk, instance.student_id
+        # Neznámý stav (only/defer) bereme jako veřejný - klient by jinak projekt nikdy neodebral
+        public = instance._was_public is not False
+    else:
+        project_id, user_id = instance.project_id, getattr(instance, 'teacher_id', None)
+    Tombstone.objects.create(model=SYNC_TYPE_NAMES[sender], object_id=instance.pk,
+                             project_id=project_id, user_id=user_id, public=public)
+
+
+for sync_model in SYNC_TYPE_NAMES:
+    post_delete.connect(record_tombstone, sender=sync_model,
+                        dispatch_uid=f'record_tombstone_{sync_model.__name__}')
+
+
+@receiver(post_delete, sender=Project)
+def invalidate_deleted_project_access(sender, instance, **kwargs):
+    invalidate_project_access(instance.student_id)
+
+
+@receiver(post_save, sender=Project)
+def update_media_blob_refs(sender, instance, created, update_fields=None, **kwargs):
+    """
+    Udržuje ref_count blobů, na které odkazují pole souborů projektu.
+    Pole, jejichž původní hodnotu neznáme (defer), přeskočí - srovná je gc_media_blobs.
+    """
+    original = {} if created else instance._original_media
+    fields = [
+        field for field in PROJECT_MEDIA_FIELDS
+        if (created or field in original) and (update_fields is None or field in update_fields)
+    ]
+    saved = {field: getattr(instance, field) for field in fields}
+    if saved:
+        update_ref_counts(
+            get_media_refs(saved.values()),
+            get_media_refs(original.get(field) for field in fields),
+        )
+    instance._original_media = {**original, **saved}
+
+
+@receiver(post_delete, sender=Project)
+def release_media_blob_refs(sender, instance, **kwargs):
+    update_ref_counts(get_media_refs([]), get_media_refs(instance._original_media.values()))
+
+
+@receiver(post_save, sender=Project)
+def update_keyword_dictionary(sender, instance, created, update_fields=None, **kwargs):
+    """
+    Udržuje usage_count slovníku klíčových slov (našeptávání).
+    Bez známého původního stavu (defer) se nic nemění - srovná to rebuild_keywords.
+    """
+    if update_fields is not None and not {'keywords', 'deleted'}.intersection(update_fields):
+        return
+    original = {} if created else instance._original_keywords
+    if original is None:
+        return
+    current = _active_keywords(instance)
+    update_keyword_usage(current, original)
+    instance._original_keywords = current
+
+
+@receiver(post_delete, sender=Project)
+def release_project_keywords(sender, instance, **kwargs):
+    if instance._original_keywords:
+        update_keyword_usage({}, instance._original_keywords)
+
+
+@receiver(post_init, sender=ProjectTeacher)
+def remember_assigned_teacher(sender, instance, **kwargs):
+    instance._original_teacher_id = instance.__dict__.get('teacher_id')
+
+
+@receiver(post_save, sender=ProjectTeacher)
+@receiver(post_delete, sender=ProjectTeacher)
+def invalidate_teacher_access(sender, instance, **kwargs):
+    invalidate_project_access(instance.teacher_id, instance._original_teacher_id)
+    if kwargs['signal'] is post_delete:
+        record_revoked_access(instance.project_id, instance.teacher_id)
+    elif not kwargs['created'] and instance.teacher_id != instance._original_teacher_id:
+        # Přiřazení převedené na jiného učitele
+        record_revoked_access(instance.project_id, instance._original_teacher_id)
+    instance._original_teacher_id = instance.teacher_id
+
+
+@receiver(post_save, sender=Comment)
+def publish_comment_created(sender, instance, created, **kwargs):
+    if created:
+        publish_event(instance.project_id, 'comment.created', CommentSerializer(instance).data)
+
+
+@receiver(post_init, sender=Milestone)
+def remember_milestone_progress(sender, instance, **kwargs):
+    instance._original_progress = (instance.__dict__.get('completion'), instance.__dict__.get('status'))
+
+
+@receiver(post_save, sender=Milestone)
+def publish_milestone_progress(sender, instance, created, **kwargs):
+    """
+    Změna dokončení nebo stavu milníku (update_completion i běžná úprava) pro SSE odběratele projektu.
+    """
+    progress = (instance.completion, instance.status)
+    if created or progress != instance._original_progress:
+        publish_event(instance.project_id, 'milestone.updated', {
+            'id': instance.pk, 'title': instance.title, 'completion': instance.completion,
+            'status': instance.status, 'updated_at': instance.updated_at,
+        })
+    instance._original_progress = progress
+
+
+def invalidate_project_child_cache(sender, instance, **kwargs):
+    """
+    Změna milníku, komentáře, konzultace, hodnocení nebo učitele se projeví jen v detailu projektu.
+    """
+    invalidate_public_detail(instance.project_id)
+
+
+for child_model in PROJECT_CHILD_MODELS:
+    post_save.connect(invalidate_project_child_cache, sender=child_model,
+                      dispatch_uid=f'invalidate_public_cache_{child_model.__name__}_save')
+    post_delete.connect(invalidate_project_child_cache, sender=child_model,
+                        dispatch_uid=f'invalidate_public_cache_{child_model.__name__}_delete')
+
+
+@receiver(connection_created)
+def instrument_new_connection(sender, connection, **kwargs):
+    """
+    Měření dotazů pro PerformanceMiddleware na každém DB spojení (i ve vláknech sync_to_async).
+    """
+    instrument_connection(connection)
@@ -0,0 +1,361 @@
+import math
+import re
+from collections import Counter
+
+import numpy as np
+from scipy import sparse
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Count, F, Min, Value
+from django.db.models.functions import Greatest
+
+from .cache import invalidate_public_detail
+from .derivatives import variants_ready, variants_ready_name
+from .keywords import normalize_keyword
+from .models import Project, ProjectSimilarity, ProjectTermWeight, SimilarityTerm
+from .tasks import submit
+
+
+TOKEN_RE = re.compile(r'\w{2,}')
+STOP_WORDS = frozenset((
+    'a', 'aby', 'ale', 'ani', 'az', 'až', 'by', 'do', 'jak', 'jako', 'je', 'jeho', 'její', 'jsou',
+    'ke', 'na', 'nebo', 'od', 'po', 'pro', 'se', 'si', 'ta', 'tak', 'také', 'to', 'tu', 've', 'za',
+    'ze', 'že', 'co', 'což', 'který', 'která', 'které', 'byl', 'byla', 'bylo', 'být', 'při', 'mezi',
+    'and', 'of', 'in', 'for', 'with', 'the', 'on', 'to', 'is', 'are',
+))
+# Váha výskytu slova podle pole projektu (jednotlivá slova z klíčových slov mají váhu popisu)
+FIELD_WEIGHTS = {'title': 2.0, 'keywords': 3.0, 'description': 1.0}
+# Počet doporučení v detailu veřejného projektu
+SHOWN_SIMILAR_PROJECTS = 5
+# Počet řádků matice násobených najednou (omezuje paměť při plném přepočtu)
+BLOCK_SIZE = 512
+# Delší termy (SimilarityTerm.term) se do vektoru nepočítají
+MAX_TERM_LENGTH = 200
+
+# Skalární součin uloženého vektoru projektu s vektory ostatních projektů (jen sdílené termy).
+# {candidates} omezuje výsledek na veřejné projekty (kandidáty na doporučení).
+SCORES_SQL = """
+SELECT other.project_id, SUM(own.weight * other.weight) AS score
+FROM project_term_weights own
+JOIN project_term_weights other ON other.term_id = own.term_id AND other.project_id <> own.project_id
+{candidates}
+WHERE own.project_id = %s
+GROUP BY other.project_id
+HAVING SUM(own.weight * other.weight) >= %s
+ORDER BY score DESC, other.project_id
+{limit}
+"""
+CANDIDATES_JOIN = (
+    'JOIN projects candidate ON candidate.id = other.project_id '
+    'AND candidate.public_visibility AND NOT candidate.deleted'
+)
+
+
+def tokenize(text):
+    return [token for token in TOKEN_RE.findall(text.casefold()) if token not in STOP_WORDS and not token.isdigit()]
+
+
+def document_terms(title, description, keywords):
+    """
+    Vážené četnosti termů projektu. Klíčové slovo se počítá jako celek (kw:...)
+    i po jednotlivých slovech, aby se shodly i víceslovné varianty.
+    """
+    terms = Counter()
+    for token in tokenize(title or ''):
+        terms[token] += FIELD_WEIGHTS['title']
+    for token in tokenize(description or ''):
+        terms[token] += FIELD_WEIGHTS['description']
+    for keyword in keywords or []:
+        normalized = normalize_keyword(keyword)
+        if normalized:
+            terms[f'kw:{normalized}'] += FIELD_WEIGHTS['keywords']
+        for token in tokenize(keyword):
+            terms[token] += FIELD_WEIGHTS['description']
+    return Counter({term: weight for term, weight in terms.items() if len(term) <= MAX_TERM_LENGTH})
+
+
+def idf(document_frequency, project_count):
+    return math.log((1.0 + project_count) / (1.0 + document_frequency)) + 1.0
+
+
+class TfidfIndex:
+    """
+    L2-normalizovaná TF-IDF matice (scipy CSR) nesmazaných projektů pro plný přepočet.
+    Kandidáty na doporučení jsou jen veřejné projekty.
+    """
+    def __init__(self, ids, public, matrix, terms, document_frequency):
+        self.ids = ids
+        self.public = public
+        self.matrix = matrix
+        self.terms = terms
+        self.document_frequency = document_frequency
+        self.positions = {project_id: position for position, project_id in enumerate(ids.tolist())}
+        self.candidate_ids = ids[public]
+        self.candidates_t = matrix[public].T.tocsc()
+
+    @classmethod
+    def build(cls, rows):
+        ids, public = [], []
+        vocabulary = {}
+        indptr, indices, data = [0], [], []
+        for project_id, title, description, keywords, is_public in rows:
+            for term, weight in document_terms(title, description, keywords).items():
+                indices.append(vocabulary.setdefault(term, len(vocabulary)))
+                # Sublineární TF - desetkrát opakované slovo neváží desetkrát víc
+                data.append(1.0 + math.log(weight))
+            indptr.append(len(indices))
+            ids.append(project_id)
+            public.append(is_public)
+
+        matrix = sparse.csr_matrix(
+            (np.asarray(data, dtype=np.float32), np.asarray(indices, dtype=np.int32), np.asarray(indptr, dtype=np.int64)),
+            shape=(len(ids), max(len(vocabulary), 1)),
+        )
+        document_frequency = np.bincount(matrix.indices, minlength=matrix.shape[1])
+        weights = np.log((1.0 + len(ids)) / (1.0 + document_frequency)) + 1.0
+        matrix = (matrix @ sparse.diags(weights.astype(np.float32))).tocsr()
+
+        norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=1)).ravel())
+        norms[norms == 0] = 1.0
+        matrix = (sparse.diags((1.0 / norms).astype(np.float32)) @ matrix).tocsr()
+        return cls(np.asarray(ids, dtype=np.int64), np.asarray(public, dtype=bool), matrix,
+                   list(vocabulary), document_frequency)
+
+    @classmethod
+    def load(cls):
+        rows = Project.objects.filter(deleted=False).order_by('id').values_list(
+            'id', 'title', 'description', 'keywords', 'public_visibility'
+        )
+        return cls.build(rows.iterator(chunk_size=2000))
+
+    def neighbors(self, project_ids, k, min_score):
+        """
+        Pro každý projekt vrací (id, [(id souseda, skóre), ...]) s nejvýše k sousedy.
+        Násobí se po blocích BLOCK_SIZE řádků, výsledek zůstává řídký.
+        """
+        positions = [self.positions[project_id] for project_id in project_ids if project_id in self.positions]
+        for start in range(0, len(positions), BLOCK_SIZE):
+            block = positions[start:start + BLOCK_SIZE]
+            scores = (self.matrix[block] @ self.candidates_t).tocsr()
+            for row, position in enumerate(block):
+                columns = scores.indices[scores.indptr[row]:scores.indptr[row + 1]]
+                values = scores.data[scores.indptr[row]:scores.indptr[row + 1]]
+                neighbor_ids = self.candidate_ids[columns]
+                keep = (neighbor_ids != self.ids[position]) & (values >= min_score)
+                neighbor_ids, values = neighbor_ids[keep], values[keep]
+                if len(values) > k:
+                    top = np.argpartition(-values, k)[:k]
+                    neighbor_ids, values = neighbor_ids[top], values[top]
+                order = np.lexsort((neighbor_ids, -values))
+                yield int(self.ids[position]), [
+                    (int(neighbor_ids[i]), float(values[i])) for i in order
+                ]
+
+    def save_vectors(self):
+        """
+        Nahradí uložený slovník a vektory projektů (základ přírůstkových aktualizací).
+        """
+        ProjectTermWeight.objects.all().delete()
+        SimilarityTerm.objects.all().delete()
+        terms = SimilarityTerm.objects.bulk_create([
+            SimilarityTerm(term=term, document_frequency=int(frequency))
+            for term, frequency in zip(self.terms, self.document_frequency.tolist())
+        ], batch_size=5000)
+        term_ids = [term.pk for term in terms]
+
+        batch = []
+        for position, project_id in enumerate(self.ids.tolist()):
+            start, end = self.matrix.indptr[position], self.matrix.indptr[position + 1]
+            batch += [
+                ProjectTermWeight(project_id=project_id, term_id=term_ids[column], weight=float(weight))
+                for column, weight in zip(self.matrix.indices[start:end].tolist(), self.matrix.data[start:end].tolist())
+            ]
+            if len(batch) >= 5000:
+                ProjectTermWeight.objects.bulk_create(batch)
+                batch = []
+        ProjectTermWeight.objects.bulk_create(batch)
+
+
+def save_neighbors(neighbors, replace_all=False):
+    """
+    Uloží sousedy (dvojice id projektu, seznam sousedů) po dávkách. Vrací id uložených projektů.
+    replace_all nejdřív smaže celou tabulku (plný přepočet).
+    """
+    project_ids = []
+    batch = []
+    with transaction.atomic():
+        if replace_all:
+            ProjectSimilarity.objects.all().delete()
+        for item in neighbors:
+            batch.append(item)
+            if len(batch) >= BLOCK_SIZE:
+                project_ids += _save_batch(batch, replace_all)
+                batch = []
+        project_ids += _save_batch(batch, replace_all)
+    return project_ids
+
+
+def _save_batch(batch, replace_all):
+    project_ids = [project_id for project_id, _ in batch]
+    if not replace_all:
+        ProjectSimilarity.objects.filter(project_id__in=project_ids).delete()
+    ProjectSimilarity.objects.bulk_create([
+        ProjectSimilarity(project_id=project_id, similar_id=similar_id, rank=rank, score=score)
+        for project_id, similar in batch
+        for rank, (similar_id, score) in enumerate(similar)
+    ], batch_size=1000)
+    return project_ids
+
+
+def rebuild_similarities():
+    """
+    Plný přepočet tabulky sousedů i uložených vektorů (aktuální IDF pro všechny projekty).
+    Vrací počet zpracovaných projektů.
+    """
+    index = TfidfIndex.load()
+    neighbors = index.neighbors(index.ids.tolist(), settings.SIMILAR_PROJECTS_K, settings.SIMILAR_PROJECTS_MIN_SCORE)
+    with transaction.atomic():
+        index.save_vectors()
+        return len(save_neighbors(neighbors, replace_all=True))
+
+
+def save_project_vector(project_id, terms):
+    """
+    Přepočítá uložený vektor jednoho projektu. Četnosti ve slovníku se upraví o rozdíl
+    termů, IDF se spočítá z aktuálního slovníku. Vektory ostatních projektů zůstávají
+    s IDF z doby svého výpočtu - sjednotí je plný přepočet (build_similar_projects).
+    Vrací True, pokud má projekt neprázdný vektor.
+    """
+    old_terms = set(ProjectTermWeight.objects.filter(project_id=project_id).values_list('term__term', flat=True))
+    added, removed = set(terms) - old_terms, old_terms - set(terms)
+    if added:
+        SimilarityTerm.objects.bulk_create([SimilarityTerm(term=term) for term in added], ignore_conflicts=True)
+        SimilarityTerm.objects.filter(term__in=added).update(document_frequency=F('document_frequency') + 1)
+    if removed:
+        SimilarityTerm.objects.filter(term__in=removed).update(
+            document_frequency=Greatest(F('document_frequency') - 1, Value(0))
+        )
+
+    ProjectTermWeight.objects.filter(project_id=project_id).delete()
+    if not terms:
+        return False
+
+    vocabulary = {
+        term: (term_id, frequency)
+        for term_id, term, frequency in SimilarityTerm.objects.filter(term__in=terms).values_list(
+            'id', 'term', 'document_frequency'
+        )
+    }
+    project_count = Project.objects.filter(deleted=False).count()
+    weights = {
+        term: (1.0 + math.log(weight)) * idf(vocabulary[term][1], project_count)
+        for term, weight in terms.items()
+    }
+    norm = math.sqrt(sum(weight * weight for weight in weights.values())) or 1.0
+    ProjectTermWeight.objects.bulk_create([
+        ProjectTermWeight(project_id=project_id, term_id=vocabulary[term][0], weight=weight / norm)
+        for term, weight in weights.items()
+    ])
+    return True
+
+
+def project_scores(project_id, min_score, candidates_only=False, limit=None):
+    """
+    [(id projektu, kosinová podobnost)] k uloženému vektoru projektu, od nejpodobnějšího.
+    """
+    sql = SCORES_SQL.format(
+        candidates=CANDIDATES_JOIN if candidates_only else '',
+        limit='LIMIT %s' if limit is not None else '',
+    )
+    params = [project_id, min_score] + ([limit] if limit is not None else [])
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return [(other_id, float(score)) for other_id, score in cursor.fetchall()]
+
+
+def update_project_similarities(project_id):
+    """
+    Přírůstková aktualizace po změně projektu (běží v poolu procesů, viz tasks.py).
+    Znovu se vektorizuje jen změněný projekt, podobnosti počítá DB z uložených vektorů.
+    Přepíší se řádky projektů, kterých se změna týká: samotný projekt, projekty, které ho
+    mají mezi sousedy, a projekty, do jejichž top-K by nově patřil.
+    Vrací id dotčených projektů (invalidace veřejné cache ve webovém procesu).
+    """
+    k = settings.SIMILAR_PROJECTS_K
+    min_score = settings.SIMILAR_PROJECTS_MIN_SCORE
+
+    with transaction.atomic():
+        # Zámek řádku - souběžné úlohy téhož projektu by slovník upravily dvakrát
+        project = Project.objects.select_for_update().filter(pk=project_id).values(
+            'title', 'description', 'keywords', 'public_visibility', 'deleted'
+        ).first()
+        active = project is not None and not project['deleted']
+        terms = document_terms(project['title'], project['description'], project['keywords']) if active else {}
+        has_vector = save_project_vector(project_id, terms)
+
+        affected = set(ProjectSimilarity.objects.filter(similar_id=project_id).values_list('project_id', flat=True))
+        if active:
+            affected.add(project_id)
+        else:
+            # Smazaný projekt už nemá vlastní sousedy
+            ProjectSimilarity.objects.filter(project_id=project_id).delete()
+
+        if has_vector and project['public_visibility']:
+            scores = dict(project_scores(project_id, min_score))
+            current = {
+                row['project']: (row['lowest'], row['count'])
+                for row in ProjectSimilarity.objects.filter(project_id__in=scores).order_by().values('project').annotate(
+                    lowest=Min('score'), count=Count('id')
+                )
+            }
+            for other_id, score in scores.items():
+                lowest, count = current.get(other_id, (0.0, 0))
+                if count < k or score > lowest:
+                    affected.add(other_id)
+
+        save_neighbors(
+            (affected_id, project_scores(affected_id, min_score, candidates_only=True, limit=k))
+            for affected_id in sorted(affected)
+        )
+    return sorted(affected)
+
+
+def _similarities_done(future):
+    # Callback běží ve webovém procesu - invalidace tak dosáhne i na jeho LocMem cache
+    if future.cancelled() or future.exception() is not None:
+        return
+    for project_id in future.result():
+        invalidate_public_detail(project_id)
+
+
+def schedule_similarity_update(project_id):
+    future = submit(update_project_similarities, project_id)
+    if future is not None:
+        future.add_done_callback(_similarities_done)
+    return future
+
+
+def _similar_links(project_id, limit):
+    return ProjectSimilarity.objects.filter(
+        project_id=project_id, similar__public_visibility=True, similar__deleted=False,
+    ).select_related('similar').annotate(
+        **{variants_ready_name('thumbnail'): variants_ready('similar__thumbnail')}
+    ).order_by('rank')[:limit]
+
+
+def _similar_project(link):
+    # Anotace je na vazbě, SimilarProjectSerializer ji čte z projektu
+    name = variants_ready_name('thumbnail')
+    setattr(link.similar, name, getattr(link, name))
+    return link.similar
+
+
+def similar_projects(project_id, limit):
+    """
+    Veřejní nejbližší sousedé projektu - jediný indexovaný dotaz do project_similarities.
+    """
+    return [_similar_project(link) for link in _similar_links(project_id, limit)]
+
+
+async def asimilar_projects(project_id, limit):
+    return [_similar_project(link) async for link in _similar_links(project_id, limit)]
@@ -0,0 +1,226 @@
+import base64
+import json
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .access import get_project_access
+from .models import Project, ProjectTeacher, Milestone, Comment, Consultation, ProjectEvaluation, Tombstone
+from .serializer import (
+    ProjectListSerializer, ProjectTeacherSerializer, MilestoneSerializer, CommentSerializer,
+    ConsultationSerializer, ProjectEvaluationSerializer
+)
+
+
+# Typ změny -> (model, serializér); stejné názvy používá Tombstone.model
+SYNC_TYPES = {
+    'project': (Project, ProjectListSerializer),
+    'project_teacher': (ProjectTeacher, ProjectTeacherSerializer),
+    'milestone': (Milestone, MilestoneSerializer),
+    'comment': (Comment, CommentSerializer),
+    'consultation': (Consultation, ConsultationSerializer),
+    'evaluation': (ProjectEvaluation, ProjectEvaluationSerializer),
+}
+SYNC_TYPE_NAMES = {model: name for name, (model, _) in SYNC_TYPES.items()}
+SYNC_EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+
+
+class InvalidSyncToken(ValueError):
+    pass
+
+
+def encode_sync_token(moment, after=None):
+    payload = {'t': moment.isoformat()}
+    if after:
+        payload['a'] = after
+    payload = json.dumps(payload, separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii')
+
+
+def decode_sync_token(token):
+    """
+    Kurzor je neprůhledný token s časem, od kterého se změny vrací (včetně), a pro typy
+    s víc změnami v jedné mikrosekundě id posledního odeslaného řádku s tímto časem.
+    Bez tokenu se vrací vše (první synchronizace). Vrací (čas, {typ: id}).
+    """
+    if not token:
+        return SYNC_EPOCH, {}
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(token.encode('ascii')).decode('utf-8'))
+        moment = parse_datetime(payload['t'])
+        after = payload.get('a', {})
+    except (TypeError, ValueError, KeyError, UnicodeError, AttributeError):
+        raise InvalidSyncToken('Invalid sync token.')
+    if moment is None or timezone.is_naive(moment):
+        raise InvalidSyncToken('Invalid sync token.')
+    if not isinstance(after, dict) or not all(
+        (name in SYNC_TYPES or name == 'tombstone') and type(pk) is int for name, pk in after.items()
+    ):
+        raise InvalidSyncToken('Invalid sync token.')
+    return moment, after
+
+
+def is_token_expired(since):
+    """
+    Tombstony starší než SYNC_TOMBSTONE_RETENTION_DAYS se mažou (prune_tombstones),
+    klient se starším kurzorem proto musí načíst vše znovu.
+    """
+    if since == SYNC_EPOCH:
+        return False
+    return since < timezone.now() - timedelta(days=settings.SYNC_TOMBSTONE_RETENTION_DAYS)
+
+
+def visible_querysets(request):
+    """
+    Řádky, které uživatel smí synchronizovat - stejná pravidla jako get_queryset
+    jednotlivých viewsetů, projekty jako visible_projects_list (vlastní + veřejné).
+    Projekty zahrnují i smazané, ty se vrací jako tombstone.
+    """
+    user = request.user
+    if user.role == 'admin':
+        return {name: model.objects.all() for name, (model, _) in SYNC_TYPES.items()}
+
+    access = get_project_access(request)
+    if user.role == 'teacher':
+        project_ids = access.teacher_project_ids
+        return {
+            'project': Project.objects.filter(Q(id__in=project_ids) | Q(public_visibility=True)),
+            'project_teacher': ProjectTeacher.objects.filter(teacher=user),
+            'milestone': Milestone.objects.filter(project_id__in=project_ids),
+            'comment': Comment.objects.filter(project_id__in=project_ids, project__deleted=False),
+            'consultation': Consultation.objects.filter(Q(teacher=user) | Q(project_id__in=project_ids)),
+            'evaluation': ProjectEvaluation.objects.filter(Q(teacher=user) | Q(project_id__in=project_ids)),
+        }
+
+    project_ids = access.student_project_ids
+    return {
+        'project': Project.objects.filter(Q(student=user) | Q(public_visibility=True)),
+        'project_teacher': ProjectTeacher.objects.filter(project_id__in=project_ids),
+        'milestone': Milestone.objects.filter(project_id__in=project_ids),
+        'comment': Comment.objects.filter(project_id__in=project_ids, project__deleted=False),
+        'consultation': Consultation.objects.filter(project_id__in=project_ids),
+        'evaluation': ProjectEvaluation.objects.filter(project_id__in=project_ids),
+    }
+
+
+def visible_tombstones(request):
+    """
+    Smazaný veřejný projekt (jen id) dostane každý, soukromý jen autor a učitelé, kteří
+    k němu byli přiřazení (tombstone přiřazení ze stejné kaskády). Skrytí veřejného projektu
+    jen ten, kdo k němu nemá přístup. Odebraný přístup (reason='revoked') dostane jen dotčený uživatel, pokud
+    přístup znovu nezískal - klient odebere podřízená data projektu a projekt samotný,
+    pokud není veřejný. Smazané podřízené objekty vidí uživatelé projektu a dotčený uživatel.
+    """
+    user = request.user
+    if user.role == 'admin':
+        return Tombstone.objects.filter(reason='deleted')
+
+    project_ids = get_project_access(request).project_ids
+    assigned_project_ids = Tombstone.objects.filter(model='project_teacher', user_id=user.pk).values('project_id')
+    return Tombstone.objects.filter(
+        Q(model='project', reason='deleted') & (
+            Q(public=True) | Q(user_id=user.pk) | Q(project_id__in=project_ids)
+            | Q(project_id__in=assigned_project_ids)
+        )
+        | Q(model='project', reason='hidden') & ~Q(project_id__in=project_ids)
+        | Q(model='project', reason='revoked', user_id=user.pk) & ~Q(project_id__in=project_ids)
+        | ~Q(model='project') & (Q(project_id__in=project_ids) | Q(user_id=user.pk))
+    )
+
+
+def _fetch_window(querysets, since, until, limit, after):
+    """
+    Nejvýše limit + 1 řádků každého typu v okně [since, until) v pořadí (čas, id).
+    Řádky s časem since a id do after[typ] už klient dostal.
+    """
+    fetched = {}
+    for name, (queryset, field) in querysets.items():
+        window = queryset.filter(**{f'{field}__lt': until})
+        if name in after:
+            window = window.filter(Q(**{f'{field}__gt': since}) | Q(**{field: since, 'pk__gt': after[name]}))
+        else:
+            window = window.filter(**{f'{field}__gte': since})
+        fetched[name] = list(window.order_by(field, 'pk')[:limit + 1])
+    return fetched
+
+
+def collect_changes(request, since, limit, after=None):
+    """
+    Změny v okně [since, until) jedním dotazem na typ (index updated_at, id)
+    a dotazy plánu načítání serializéru.
+    Když některý typ překročí limit, okno se zkrátí pro všechny typy, takže odpověď
+    je vždy úplný stav za souvislý časový úsek a další stránka navazuje kurzorem next.
+    Horní hranice zaostává o SYNC_CURSOR_LAG_SECONDS za aktuálním časem, aby se nepřeskočily
+    řádky z transakcí, které se v okamžiku dotazu ještě nepotvrdily.
+    Víc než limit změn se stejným časem se stránkuje podle id (after, vrací se pro kurzor).
+    """
+    after = after or {}
+    until = timezone.now() - timedelta(seconds=settings.SYNC_CURSOR_LAG_SECONDS)
+    if until <= since:
+        return {'changes': {name: [] for name in SYNC_TYPES}, 'deleted': [], 'next': since, 'after': after,
+                'has_more': False}
+
+    querysets = {
+        name: (SYNC_TYPES[name][1].setup_eager_loading(queryset), 'updated_at')
+        for name, queryset in visible_querysets(request).items()
+    }
+    querysets['tombstone'] = (visible_tombstones(request), 'deleted_at')
+    fetched = _fetch_window(querysets, since, until, limit, after)
+
+    overflow = [
+        getattr(rows[limit], querysets[name][1]) for name, rows in fetched.items() if len(rows) > limit
+    ]
+    has_more = bool(overflow)
+    next_after = {}
+    if has_more:
+        until = min(overflow)
+        if until <= since:
+            # Víc než limit změn se stejným časem - stránka končí uvnitř mikrosekundy since
+            # a kurzor si pro každý typ pamatuje id posledního odeslaného řádku
+            fetched = {
+                name: [row for row in rows[:limit] if getattr(row, querysets[name][1]) == since]
+                for name, rows in fetched.items()
+            }
+            next_after = dict(after)
+            next_after.update({name: rows[-1].pk for name, rows in fetched.items() if rows})
+        else:
+            fetched = {
+                name: [row for row in rows if getattr(row, querysets[name][1]) < until]
+                for name, rows in fetched.items()
+            }
+
+    # Pro každý objekt platí novější ze změny a tombstonu
+    deleted = {}
+    for tombstone in fetched.pop('tombstone'):
+        deleted[(tombstone.model, tombstone.object_id)] = {
+            'type': tombstone.model, 'id': tombstone.object_id, 'project': tombstone.project_id,
+            'reason': tombstone.reason, 'deleted_at': tombstone.deleted_at,
+        }
+    for project in fetched['project']:
+        if project.deleted:
+            deleted[('project', project.pk)] = {
+                'type': 'project', 'id': project.pk, 'project': project.pk,
+                'reason': 'deleted', 'deleted_at': project.updated_at,
+            }
+
+    changes = {}
+    for name, rows in fetched.items():
+        current = []
+        for row in rows:
+            tombstone = deleted.get((name, row.pk))
+            if tombstone is not None and tombstone['deleted_at'] >= row.updated_at:
+                continue
+            deleted.pop((name, row.pk), None)
+            current.append(row)
+        changes[name] = SYNC_TYPES[name][1](current, many=True).data
+
+    return {
+        'changes': changes,
+        'deleted': sorted(deleted.values(), key=lambda item: item['deleted_at']),
+        'next': until,
+        'after': next_after,
+        'has_more': has_more,
+    }
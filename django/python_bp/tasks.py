@@ -0,0 +1,62 @@
+import logging
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+from django.conf import settings
+
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+_slots = None
+_lock = threading.Lock()
+
+
+def _init_worker():
+    # Spawn proces začíná s prázdným interpretem - DJANGO_SETTINGS_MODULE zdědí z prostředí
+    import django
+    django.setup()
+
+
+def get_executor():
+    """
+    Sdílený pool procesů pro práci mimo request (CPU náročné úlohy).
+    Procesy se spouští metodou spawn - nedědí otevřená DB spojení ani vlákna serveru,
+    každý si po django.setup() otevře vlastní spojení.
+    """
+    global _executor, _slots
+    with _lock:
+        if _executor is None:
+            _executor = ProcessPoolExecutor(
+                max_workers=settings.BACKGROUND_WORKERS,
+                mp_context=multiprocessing.get_context('spawn'),
+                initializer=_init_worker,
+            )
+            _slots = threading.BoundedSemaphore(settings.BACKGROUND_QUEUE_SIZE)
+        return _executor
+
+
+def submit(fn, *args):
+    """
+    Zařadí úlohu do poolu. Fronta je omezená BACKGROUND_QUEUE_SIZE - při zahlcení
+    se úloha zahodí (vrací None) a request se nezdrží; dopočítá ji backfill příkaz.
+    """
+    executor = get_executor()
+    if not _slots.acquire(blocking=False):
+        logger.warning('Fronta úloh na pozadí je plná, úloha %s se přeskočí.', fn.__name__)
+        return None
+
+    try:
+        future = executor.submit(fn, *args)
+    except Exception:
+        _slots.release()
+        raise
+    future.add_done_callback(_task_done)
+    return future
+
+
+def _task_done(future):
+    _slots.release()
+    if not future.cancelled() and future.exception() is not None:
+        logger.error('Úloha na pozadí selhala: %s', future.exception())
@@ -0,0 +1,1466 @@
+import base64
+import gzip
+import hashlib
+import io
+import json
+import os
+import random
+import tempfile
+import uuid
+import zipfile
+from collections import Counter
+from datetime import datetime, timedelta, timezone as dt_timezone
+from decimal import Decimal
+from unittest import mock, skipIf
+
+from asgiref.sync import async_to_sync, sync_to_async
+
+from django.core.cache import caches
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.http import HttpResponse, StreamingHttpResponse
+from django.http.multipartparser import MultiPartParser
+from django.db import connection
+from django.test import AsyncClient, RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIClient, APIRequestFactory
+from rest_framework_simplejwt.tokens import AccessToken
+
+from . import async_views
+from .authentication import MediaToken
+from .derivatives import mark_derivatives_ready
+from .events import event_stream
+from .exports import iter_csv
+from .facets import FACET_FIELDS, KEYWORD_FACET_LIMIT
+from .fast_serializers import FastProjectListSerializer, FastProjectWithTeachersSerializer
+from .keywords import suggest_keywords, update_keyword_usage
+from .media_store import store_uploaded_file
+from .metrics import MERGED_FILE, REQUEST_DURATION, REQUESTS, MmapValues, generate_latest, metric_key
+from .middleware import CompressionMiddleware, brotli, choose_encoding, get_method
+from .performance import QueryBudgetExceeded, RequestMetrics, current_metrics, fingerprint
+from .renderers import FastJSONRenderer
+from .similarity import rebuild_similarities, similar_projects, update_project_similarities
+from .models import (
+    Comment, Consultation, MediaBlob, Milestone, Project, ProjectEvaluation, ProjectSimilarity, ProjectTeacher,
+    ProjectTermWeight, Tombstone, UploadSession, User,
+)
+from .search import update_search_vector
+from .serializer import ProjectListSerializer, ProjectWithTeachersSerializer
+from .upload_handlers import StreamingFileUploadHandler, get_staging_dir
+from .views import filter_public_projects, get_visible_projects
+
+
+def clear_caches():
+    for alias in ('default', 'public'):
+        caches[alias].clear()
+
+
+@override_settings(PROJECT_ACCESS_CACHE_TIMEOUT=0, QUERY_BUDGET_MODE='raise')
+class ProjectDetailQueryCountTests(TestCase):
+    """
+    Počet dotazů detailu projektu nezávisí na počtu učitelů, milníků, komentářů,
+    konzultací a hodnocení (plán načítání serializéru, viz EagerLoadingMixin).
+    """
+    @classmethod
+    def setUpTestData(cls):
+        cls.student = User.objects.create_user('student', role='student')
+        cls.teachers = [User.objects.create_user(f'teacher{index}', role='teacher') for index in range(3)]
+        cls.small = cls.create_project('Malý projekt', 1)
+        cls.large = cls.create_project('Velký projekt', 3)
+
+    @classmethod
+    def create_project(cls, title, size):
+        project = Project.objects.create(
+            title=title, description='Popis projektu', year=2024, field='Informatika',
+            keywords=['python'], student=cls.student, public_visibility=True,
+        )
+        now = timezone.now()
+        for teacher in cls.teachers[:size]:
+            ProjectTeacher.objects.create(project=project, teacher=teacher, role='consultant', accepted=True)
+        for index in range(size):
+            Milestone.objects.create(project=project, title=f'Milník {index}', description='Popis', deadline=now)
+            Comment.objects.create(project=project, user=cls.student, comment_text=f'Komentář {index}')
+            Consultation.objects.create(project=project, teacher=cls.teachers[0], consultation_date=now)
+            ProjectEvaluation.objects.create(project=project, teacher=cls.teachers[0], evaluation='Hodnocení', score=1)
+        return project
+
+    def setUp(self):
+        clear_caches()
+        self.client = APIClient()
+
+    def get(self, url):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return response
+
+    def assertConstantQueryCount(self, url_name):
+        with CaptureQueriesContext(connection) as small_queries:
+            small = self.get(reverse(url_name, args=[self.small.pk]))
+        self.assertEqual(len(small.data['comments']), 1)
+
+        clear_caches()
+        with self.assertNumQueries(len(small_queries)):
+            large = self.get(reverse(url_name, args=[self.large.pk]))
+        for collection in ('teachers', 'milestones', 'comments', 'consultations', 'evaluations'):
+            self.assertEqual(len(large.data[collection]), 3)
+
+    def test_public_project_detail(self):
+        self.assertConstantQueryCount('public-project-detail')
+
+    def test_project_viewset_retrieve(self):
+        self.client.force_authenticate(self.teachers[0])
+        self.assertConstantQueryCount('project-detail')
+
+
+class KeysetPaginationTests(TestCase):
+    """
+    Stránkování podle kurzoru na veřejném seznamu (-year, title, id) včetně shodných klíčů.
+    """
+    @classmethod
+    def setUpTestData(cls):
+        Project.objects.bulk_create([
+            Project(title=f'Projekt {index % 3}', description='Popis', year=2023 + index % 2, field='Informatika',
+                    keywords=[], public_visibility=True)
+            for index in range(45)
+        ])
+        cls.expected = list(Project.objects.order_by('-year', 'title', 'id').values_list('id', flat=True))
+
+    def setUp(self):
+        clear_caches()
+
+    def get_page(self, url, params=None):
+        response = self.client.get(url, params)
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_forward_and_back(self):
+        pages = [self.get_page(reverse('public-projects-list'), {'pagination': 'cursor'})]
+        self.assertIsNone(pages[0]['previous'])
+        while pages[-1]['next']:
+            pages.append(self.get_page(pages[-1]['next']))
+        self.assertEqual([len(page['results']) for page in pages], [20, 20, 5])
+        self.assertEqual([item['id'] for page in pages for item in page['results']], self.expected)
+
+        backwards = [pages[-1]]
+        while backwards[-1]['previous']:
+            backwards.append(self.get_page(backwards[-1]['previous']))
+        self.assertEqual([item['id'] for page in reversed(backwards) for item in page['results']], self.expected)
+        self.assertEqual(backwards[-1]['results'], pages[0]['results'])
+
+    def test_invalid_cursor(self):
+        def encode(payload):
+            return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode()
+
+        cursors = [
+            'not base64!', encode('text'), encode([2024, 'Projekt 0', 1]), encode({'v': [2024, 'Projekt 0', 1]}),
+            encode({'v': [2024], 'r': 0}), encode({'v': 'abc', 'r': 0}), encode({'v': [2024, 'Projekt 0', 1], 'r': 'x'}),
+            encode({'v': [None, 'Projekt 0', 1], 'r': 0}), encode({'v': ['rok', 'Projekt 0', 1], 'r': 0}),
+        ]
+        for cursor in cursors:
+            with self.subTest(cursor=cursor):
+                response = self.client.get(reverse('public-projects-list'), {'cursor': cursor})
+                self.assertEqual(response.status_code, 404)
+
+
+class SearchTests(TestCase):
+    """
+    Fulltext nad uloženým search_vector: váhy název > klíčová slova > popis a jeho údržba signálem.
+    """
+    @classmethod
+    def setUpTestData(cls):
+        def create(title, description, keywords):
+            return Project.objects.create(
+                title=title, description=description, year=2024, field='Informatika', keywords=keywords,
+                public_visibility=True,
+            )
+        cls.by_description = create('Zavlažování', 'Řízení čerpadla robotem', ['voda'])
+        cls.by_keyword = create('Sklad', 'Evidence zboží', ['robotem', 'logistika'])
+        cls.by_title = create('Stavba robotem', 'Montáž dílů', ['stavba'])
+        create('Herbář', 'Sbírka rostlin', ['biologie'])
+
+    def setUp(self):
+        clear_caches()
+
+    def search(self, text):
+        response = self.client.get(reverse('public-projects-list'), {'search': text})
+        self.assertEqual(response.status_code, 200)
+        return [item['id'] for item in response.json()['results']]
+
+    def test_results_are_ranked_by_field_weight(self):
+        self.assertEqual(self.search('robotem'), [self.by_title.pk, self.by_keyword.pk, self.by_description.pk])
+        self.assertEqual(self.search('robotem -zboží'), [self.by_title.pk, self.by_description.pk])
+
+    def test_text_change_updates_vector(self):
+        project = Project.objects.get(pk=self.by_keyword.pk)
+        project.keywords.append('dron')
+        project.save()
+        clear_caches()
+        self.assertEqual(self.search('dron'), [project.pk])
+
+    def test_save_without_text_change_skips_update(self):
+        project = Project.objects.get(pk=self.by_title.pk)
+        project.status = 'submitted'
+        with CaptureQueriesContext(connection) as queries:
+            project.save()
+        self.assertFalse([query for query in queries if 'to_tsvector' in query['sql']])
+
+    def test_rebuild_after_bulk_update(self):
+        Project.objects.filter(pk=self.by_description.pk).update(title='Dron nad polem')
+        self.assertEqual(self.search('dron'), [])
+        call_command('rebuild_search_vectors', stdout=io.StringIO())
+        clear_caches()
+        self.assertEqual(self.search('dron'), [self.by_description.pk])
+
+
+class ConditionalDetailTests(TestCase):
+    """
+    Detail projektu má jen ETag - mění se i po smazání vnořeného objektu a přepočtu podobných projektů.
+    """
+    @classmethod
+    def setUpTestData(cls):
+        cls.student = User.objects.create_user('student', role='student')
+        cls.project = Project.objects.create(
+            title='Projekt', description='Popis', year=2024, field='Informatika', keywords=[],
+            student=cls.student, public_visibility=True,
+        )
+        cls.comment = Comment.objects.create(project=cls.project, user=cls.student, comment_text='Komentář')
+
+    def setUp(self):
+        clear_caches()
+        self.url = reverse('public-project-detail', args=[self.project.pk])
+
+    def get(self, **headers):
+        return self.client.get(self.url, headers=headers)
+
+    def test_matching_etag(self):
+        response = self.get()
+        self.assertNotIn('Last-Modified', response)
+        self.assertEqual(self.get(if_none_match=response['ETag']).status_code, 304)
+
+    def test_deleted_child_changes_etag(self):
+        etag = self.get()['ETag']
+        self.comment.delete()
+        self.assertEqual(self.get(if_none_match=etag).status_code, 200)
+
+    def test_similar_projects_change_etag(self):
+        etag = self.get()['ETag']
+        similar = Project.objects.create(
+            title='Podobný', description='Popis', year=2024, field='Informatika', keywords=[], public_visibility=True,
+        )
+        ProjectSimilarity.objects.create(project=self.project, similar=similar, rank=0, score=0.5)
+        clear_caches()
+        response = self.get(if_none_match=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([item['id'] for item in response.data['similar_projects']], [similar.pk])
+
+    def test_if_modified_since_alone_is_ignored(self):
+        self.assertEqual(self.get(if_modified_since='Fri, 01 Jan 2100 00:00:00 GMT').status_code, 200)
+
+
+class PublicCacheTests(TestCase):
+    """
+    Cache veřejných odpovědí: uložení projektu posune generaci seznamu i detailu, soukromé změny ne.
+    """
+    @classmethod
+    def setUpTestData(cls):
+        cls.student = User.objects.create_user('student', role='student')
+        cls.project = Project.objects.create(
+            title='Původní název', description='Popis', year=2024, field='Informatika', keywords=[],
+            student=cls.student, public_visibility=True,
+        )
+        cls.private = Project.objects.create(
+            title='Soukromý', description='Popis', year=2024, field='Informatika', keywords=[], student=cls.student,
+        )
+
+    def setUp(self):
+        clear_caches()
+        self.list_url = reverse('public-projects-list')
+        self.detail_url = reverse('public-project-detail', args=[self.project.pk])
+
+    def listed_titles(self):
+        return [item['title'] for item in self.client.get(self.list_url).data['results']]
+
+    def detail_title(self):
+        return self.client.get(self.detail_url).data['title']
+
+    def test_cached_responses_skip_database(self):
+        self.listed_titles()
+        self.detail_title()
+        with self.assertNumQueries(0):
+            self.assertEqual(self.listed_titles(), ['Původní název'])
+            self.assertEqual(self.detail_title(), 'Původní název')
+
+    def test_save_invalidates_list_and_detail(self):
+        self.listed_titles()
+        self.detail_title()
+        self.project.title = 'Nový název'
+        self.project.save()
+        self.assertEqual(self.listed_titles(), ['Nový název'])
+        self.assertEqual(self.detail_title(), 'Nový název')
+
+    def test_hidden_project_leaves_cache(self):
+        self.listed_titles()
+        self.detail_title()
+        self.project.public_visibility = False
+        self.project.save()
+        self.assertEqual(self.listed_titles(), [])
+        self.assertEqual(self.client.get(self.detail_url).status_code, 404)
+
+    def test_private_project_save_keeps_cache(self):
+        self.listed_titles()
+        self.private.title = 'Jiný název'
+        self.private.save()
+        with self.assertNumQueries(0):
+            self.listed_titles()
+
+
+@override_settings(FAST_LIST_SERIALIZERS=True)
+class ImageVariantsTests(TestCase):
+    """
+    Varianty obrázků se hlásí podle MediaBlob.derivatives_ready, ne podle souborů na disku.
+    """
+    THUMBNAIL = 'blobs/ab/ab12.png'
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.blob = MediaBlob.objects.create(sha256='ab12', path=cls.THUMBNAIL, size=1)
+        cls.project = Project.objects.create(
+            title='Projekt s náhledem', description='Popis', year=2024, field='Informatika',
+            keywords=['python'], student=User.objects.create_user('student', role='student'),
+            thumbnail=cls.THUMBNAIL, public_visibility=True,
+        )
+
+    def setUp(self):
+        clear_caches()
+        self.client = APIClient()
+
+    def get_variants(self):
+        detail = self.client.get(reverse('public-project-detail', args=[self.project.pk])).data
+        listed = self.client.get(reverse('public-projects-list')).data['results'][0]
+        self.assertEqual(detail['thumbnail_variants'], listed['thumbnail_variants'])
+        return detail['thumbnail_variants']
+
+    def test_variants_hidden_until_ready(self):
+        self.assertIsNone(self.get_variants())
+
+    def test_mark_derivatives_ready(self):
+        updated_at = self.project.updated_at
+        self.assertEqual(mark_derivatives_ready(self.THUMBNAIL), [self.project.pk])
+        self.project.refresh_from_db()
+        self.assertGreater(self.project.updated_at, updated_at)
+
+        clear_caches()
+        variants = self.get_variants()
+        self.assertEqual(set(variants), {'card', 'detail'})
+        self.assertTrue(variants['card']['webp'].endswith('derivatives/blobs/ab/ab12/card.webp'))
+
+
+class FastSerializerTests(TestCase):
+    """
+    Rychlé serializéry nad .values() vrací stejný JSON (včetně pořadí klíčů) jako ModelSerializery.
+    """
+    @classmethod
+    def setUpTestData(cls):
+        student = User.objects.create_user('student', role='student')
+        MediaBlob.objects.create(sha256='ab12', path='blobs/ab/ab12.png', size=1, derivatives_ready=True)
+        MediaBlob.objects.create(sha256='cd34', path='blobs/cd/cd34.png', size=1)
+        with_student = Project.objects.create(
+            title='Se studentem', description='Popis', year=2024, field='Informatika', keywords=['python', 'ai'],
+            student=student, thumbnail='blobs/ab/ab12.png', status='submitted', type_of_work='seminar',
+        )
+        without_student = Project.objects.create(
+            title='Bez studenta', description='Popis', year=2023, field='Fyzika', keywords=[],
+            thumbnail='blobs/cd/cd34.png',
+        )
+        Project.objects.create(title='Bez náhledu', description='Popis', year=2022, field='Chemie', keywords=['x'])
+        # Letní čas v Europe/Prague a mikrosekundy
+        Project.objects.filter(pk=with_student.pk).update(
+            created_at=datetime(2024, 7, 1, 10, 30, 15, 123456, tzinfo=dt_timezone.utc),
+        )
+        teachers = [User.objects.create_user(f'teacher{index}', role='teacher') for index in range(3)]
+        for teacher, role in zip(reversed(teachers), ('opponent', 'supervisor', 'consultant')):
+            ProjectTeacher.objects.create(project=with_student, teacher=teacher, role=role)
+        ProjectTeacher.objects.create(project=without_student, teacher=teachers[0], role='supervisor')
+
+    def assertSameJson(self, serializer_class, fast_class, fields=None):
+        projects = Project.objects.order_by('id')
+        expected = serializer_class(
+            serializer_class.setup_eager_loading(projects, fields=fields), many=True, fields=fields
+        ).data
+        actual = fast_class(fast_class.setup_eager_loading(projects, fields=fields), many=True, fields=fields).data
+        self.assertEqual(json.dumps(actual), json.dumps(expected))
+
+    def test_project_list(self):
+        self.assertSameJson(ProjectListSerializer, FastProjectListSerializer)
+
+    def test_project_with_teachers(self):
+        self.assertSameJson(ProjectWithTeachersSerializer, FastProjectWithTeachersSerializer)
+
+    def test_sparse_fieldset(self):
+        self.assertSameJson(ProjectWithTeachersSerializer, FastProjectWithTeachersSerializer,
+                            fields=('id', 'student_name', 'teachers'))
+
+
+@override_settings(PROJECT_ACCESS_CACHE_TIMEOUT=0)
+class SparseFieldsetTests(TestCase):
+    """
+    fields= a expand= zúží výstup i SQL dotazy, neznámé pole vrací 400.
+    """
+    @classmethod
+    def setUpTestData(cls):
+        cls.student = User.objects.create_user('student', role='student')
+        cls.project = Project.objects.create(
+            title='Projekt', description='Dlouhý popis', year=2024, field='Informatika', keywords=['python'],
+            student=cls.student, public_visibility=True,
+        )
+        ProjectTeacher.objects.create(project=cls.project, teacher=User.objects.create_user('teacher', role='teacher'),
+                                      role='supervisor')
+        Milestone.objects.create(project=cls.project, title='Milník', description='Popis', deadline=timezone.now())
+        Comment.objects.create(project=cls.project, user=cls.student, comment_text='Komentář')
+
+    def setUp(self):
+        clear_caches()
+        self.client = APIClient()
+        self.client.force_authenticate(self.student)
+
+    def get(self, url, **params):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, params)
+        # Bez dotazu na validátory (ETag, Last-Modified) - ten čte časy změn všech vnořených tabulek vždy
+        return response, ' '.join(
+            query['sql'] for query in queries.captured_queries if '_modified"' not in query['sql']
+        )
+
+    def test_fields_narrow_list_output_and_sql(self):
+        url = reverse('visible-projects-list')
+        response, sql = self.get(url)
+        self.assertIn('teachers', response.data['results'][0])
+        self.assertIn('"projects"."description"', sql)
+        self.assertIn('"project_teachers"', sql)
+
+        for fast in (False, True):
+            with self.subTest(fast=fast), override_settings(FAST_LIST_SERIALIZERS=fast):
+                response, sql = self.get(url, fields='id,title')
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(list(response.data['results'][0]), ['id', 'title'])
+                self.assertNotIn('"projects"."description"', sql)
+                self.assertNotIn('"project_teachers"', sql)
+
+                response, sql = self.get(url, fields='title', pagination='cursor')
+                self.assertEqual(response.data['results'], [{'title': 'Projekt'}])
+                self.assertNotIn('"projects"."description"', sql)
+
+    @override_settings(FAST_LIST_SERIALIZERS=True)
+    def test_cursor_pagination_of_narrowed_values(self):
+        Project.objects.bulk_create([
+            Project(title=f'Další {index:02}', description='Popis', year=2023, field='Informatika', keywords=[],
+                    public_visibility=True)
+            for index in range(20)
+        ])
+        first = self.client.get(reverse('visible-projects-list'), {'fields': 'title', 'pagination': 'cursor'}).data
+        second = self.client.get(first['next']).data
+        titles = [item['title'] for page in (first, second) for item in page['results']]
+        self.assertEqual(titles, ['Projekt', *(f'Další {index:02}' for index in range(20))])
+        self.assertEqual(list(second['results'][0]), ['title'])
+
+    def test_expand_loads_only_requested_collections(self):
+        response, sql = self.get(reverse('public-project-detail', args=[self.project.pk]),
+                                 fields='id,title', expand='milestones')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(list(response.data), ['id', 'title', 'milestones'])
+        self.assertEqual(len(response.data['milestones']), 1)
+        self.assertIn('"milestones"', sql)
+        for table in ('"comments"', '"project_teachers"', '"project_similarities"'):
+            self.assertNotIn(table, sql)
+
+    def test_viewset_retrieve(self):
+        response, sql = self.get(reverse('project-detail', args=[self.project.pk]), fields='title,teachers')
+        self.assertEqual(list(response.data), ['title', 'teachers'])
+        self.assertEqual(len(response.data['teachers']), 1)
+        self.assertNotIn('"comments"', sql)
+
+    def test_unknown_fields_are_rejected(self):
+        cases = (
+            (reverse('visible-projects-list'), {'fields': 'id,secret'}),
+            (reverse('visible-projects-list'), {'expand': 'title'}),
+            (reverse('public-project-detail', args=[self.project.pk]), {'fields': 'password'}),
+            (reverse('project-detail', args=[self.project.pk]), {'expand': 'unknown'}),
+        )
+        for url, params in cases:
+            with self.subTest(url=url, params=params):
+                response = self.client.get(url, params)
+                self.assertEqual(response.status_code, 400)
+                self.assertIn('Available' if 'fields' in params else 'Expandable', response.data['detail'])
+
+
+class MediaAccessTests(TestCase):
+    """
+    Soubor bez projektu smí stahovat jen ten, kdo ho nahrál, a administrátor.
+    ?token= přijímá jen krátkodobý MediaToken, ne přístupový JWT.
+    """
+    PATH = 'blobs/cd/cd34.pdf'
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.uploader = User.objects.create_user('uploader', role='student')
+        cls.other = User.objects.create_user('other', role='student')
+        cls.admin = User.objects.create_user('admin', role='admin')
+        blob = MediaBlob.objects.create(sha256='cd34', path=cls.PATH, size=4)
+        blob.uploaders.add(cls.uploader)
+
+    def setUp(self):
+        media_root = tempfile.TemporaryDirectory()
+        self.addCleanup(media_root.cleanup)
+        self.enterContext(override_settings(MEDIA_ROOT=media_root.name))
+        os.makedirs(os.path.join(media_root.name, 'blobs', 'cd'))
+        with open(os.path.join(media_root.name, self.PATH), 'wb') as file:
+            file.write(b'%PDF')
+
+    def get_status(self, token=None):
+        url = reverse('serve_media', args=[self.PATH])
+        return self.client.get(url, {'token': str(token)} if token else {}).status_code
+
+    def test_unreferenced_file(self):
+        self.assertEqual(self.get_status(), 404)
+        self.assertEqual(self.get_status(MediaToken.for_user(self.other)), 404)
+        self.assertEqual(self.get_status(MediaToken.for_user(self.uploader)), 200)
+        self.assertEqual(self.get_status(MediaToken.for_user(self.admin)), 200)
+
+    def test_access_token_in_query_is_rejected(self):
+        self.assertEqual(self.get_status(AccessToken.for_user(self.uploader)), 404)
+
+    def test_media_token_is_not_an_access_token(self):
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {MediaToken.for_user(self.uploader)}')
+        self.assertEqual(client.get(reverse('media_token')).status_code, 401)
+
+    def test_public_project_file(self):
+        Project.objects.create(
+            title='Veřejný projekt', description='Popis', year=2024, field='Informatika',
+            keywords=[], student=self.other, document=self.PATH, public_visibility=True,
+        )
+        self.assertEqual(self.get_status(), 200)
+
+
+class MediaStoreTests(TestCase):
+    """
+    Obsahově adresované úložiště: deduplikace, ref_count podle polí projektů a úklid gc_media_blobs.
+    """
+    @classmethod
+    def setUpTestData(cls):
+        cls.student = User.objects.create_user('student', role='student')
+        cls.other = User.objects.create_user('other', role='student')
+
+    def setUp(self):
+        media_root = tempfile.TemporaryDirectory()
+        self.addCleanup(media_root.cleanup)
+        self.media_root = media_root.name
+        self.enterContext(override_settings(
+            MEDIA_ROOT=media_root.name, UPLOAD_STAGING_DIR=os.path.join(media_root.name, '.uploads'),
+        ))
+
+    def store(self, content, user, name='prace.pdf'):
+        return store_uploaded_file(SimpleUploadedFile(name, content), uploader=user)
+
+    def create_project(self, **kwargs):
+        return Project.objects.create(
+            title='Projekt', description='Popis', year=2024, field='Informatika', keywords=[],
+            student=self.student, **kwargs
+        )
+
+    def test_identical_uploads_share_blob(self):
+        first = self.store(b'%PDF-same', self.student)
+        second = self.store(b'%PDF-same', self.other, name='kopie.PDF')
+        self.assertEqual(first.pk, second.pk)
+        self.assertEqual(MediaBlob.objects.count(), 1)
+        self.assertEqual(set(first.uploaders.all()), {self.student, self.other})
+        with open(os.path.join(self.media_root, first.path), 'rb') as file:
+            self.assertEqual(file.read(), b'%PDF-same')
+        self.assertEqual(os.listdir(get_staging_dir()), [])
+
+    def test_ref_count_follows_project_fields(self):
+        blob = self.store(b'%PDF-ref', self.student)
+
+        def ref_count():
+            return MediaBlob.objects.get(pk=blob.pk).ref_count
+
+        project = self.create_project(document=blob.path, poster=blob.path)
+        self.assertEqual(ref_count(), 2)
+        other = self.create_project(document=blob.path)
+        self.assertEqual(ref_count(), 3)
+        project.poster = None
+        project.save()
+        self.assertEqual(ref_count(), 2)
+        project.delete()
+        self.assertEqual(ref_count(), 1)
+        other.document = ''
+        other.save(update_fields=['document'])
+        self.assertEqual(ref_count(), 0)
+
+    def gc(self):
+        call_command('gc_media_blobs', stdout=io.StringIO())
+
+    def age(self, *blobs, hours=48):
+        MediaBlob.objects.filter(pk__in=[blob.pk for blob in blobs]).update(
+            updated_at=timezone.now() - timedelta(hours=hours)
+        )
+
+    def test_gc_respects_grace_period(self):
+        old = self.store(b'old', self.student, name='old.txt')
+        fresh = self.store(b'fresh', self.student, name='fresh.txt')
+        referenced = self.store(b'referenced', self.student, name='used.txt')
+        self.create_project(document=referenced.path)
+        self.age(old, referenced)
+
+        self.gc()
+        self.assertEqual(set(MediaBlob.objects.values_list('pk', flat=True)), {fresh.pk, referenced.pk})
+        self.assertFalse(os.path.exists(os.path.join(self.media_root, old.path)))
+        self.assertTrue(os.path.exists(os.path.join(self.media_root, fresh.path)))
+
+    def test_gc_keeps_blob_uploaded_again_during_run(self):
+        blobs = [self.store(content, self.student, name='a.txt') for content in (b'first', b'second')]
+        self.age(*blobs)
+
+        def upload_again(path):
+            # Druhý blob nahraje někdo znovu, zatímco úklid maže první
+            MediaBlob.objects.exclude(path=path).update(updated_at=timezone.now())
+
+        with mock.patch('python_bp.management.commands.gc_media_blobs.delete_derivatives', side_effect=upload_again):
+            self.gc()
+        self.assertEqual(MediaBlob.objects.count(), 1)
+        remaining = MediaBlob.objects.get()
+        self.assertTrue(os.path.exists(os.path.join(self.media_root, remaining.path)))
+
+
+class ResumableUploadTests(TestCase):
+    """
+    Obnovitelný upload po částech: offset, navázání po přerušení, dokončení a limit relací.
+    """
+    CONTENT = b'%PDF-' + bytes(range(256)) * 4
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.student = User.objects.create_user('student', role='student')
+
+    def setUp(self):
+        media_root = tempfile.TemporaryDirectory()
+        self.addCleanup(media_root.cleanup)
+        self.enterContext(override_settings(
+            MEDIA_ROOT=media_root.name, UPLOAD_STAGING_DIR=os.path.join(media_root.name, '.uploads'),
+        ))
+        self.client = APIClient()
+        self.client.force_authenticate(self.student)
+
+    def create_session(self, size=None):
+        return self.client.post(reverse('upload_session_create'), {
+            'type': 'document', 'file_name': 'prace.pdf', 'size': size or len(self.CONTENT),
+        }, format='json')
+
+    def put_chunk(self, session_id, start, end):
+        return self.client.put(
+            reverse('upload_session_detail', args=[session_id]), data=self.CONTENT[start:end + 1],
+            content_type='application/octet-stream',
+            HTTP_CONTENT_RANGE=f'bytes {start}-{end}/{len(self.CONTENT)}',
+        )
+
+    def finalize(self, session_id):
+        return self.client.post(reverse('upload_session_finalize', args=[session_id]))
+
+    def test_chunk_at_wrong_offset_is_rejected(self):
+        session_id = self.create_session().json()['id']
+        response = self.put_chunk(session_id, 100, 199)
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response['Upload-Offset'], '0')
+        self.assertEqual(UploadSession.objects.get(pk=session_id).offset, 0)
+
+    def test_resume_and_finalize(self):
+        session_id = self.create_session().json()['id']
+        middle = len(self.CONTENT) // 2
+        self.assertEqual(self.put_chunk(session_id, 0, middle - 1)['Upload-Offset'], str(middle))
+
+        # Po přerušení klient zjistí offset a pokračuje od něj
+        response = self.client.get(reverse('upload_session_detail', args=[session_id]))
+        self.assertEqual(response.json()['offset'], middle)
+        self.assertEqual(self.finalize(session_id).status_code, 409)
+        self.assertEqual(self.put_chunk(session_id, 0, middle - 1).status_code, 409)
+
+        response = self.put_chunk(session_id, middle, len(self.CONTENT) - 1)
+        self.assertEqual(response.json()['offset'], len(self.CONTENT))
+        # Soubory částí se po zápisu mažou, zůstává jen soubor relace
+        self.assertEqual(os.listdir(get_staging_dir()), [f'{session_id}.session'])
+
+        response = self.finalize(session_id)
+        self.assertEqual(response.status_code, 201)
+        blob = MediaBlob.objects.get()
+        self.assertEqual(blob.sha256, hashlib.sha256(self.CONTENT).hexdigest())
+        self.assertEqual(list(blob.uploaders.all()), [self.student])
+        self.assertFalse(UploadSession.objects.exists())
+        self.assertEqual(os.listdir(get_staging_dir()), [])
+
+    @override_settings(UPLOAD_SESSION_MAX_PER_USER=2)
+    def test_open_sessions_are_limited_per_user(self):
+        first = self.create_session().json()['id']
+        self.create_session()
+        self.assertEqual(self.create_session().status_code, 429)
+
+        self.client.delete(reverse('upload_session_detail', args=[first]))
+        self.assertEqual(self.create_session().status_code, 201)
+
+
+class StreamingUploadHandlerTests(SimpleTestCase):
+    """
+    Upload handler zapisuje soubory do staging adresáře, počítá SHA-256 a po překročení limitu přenos ukončí.
+    """
+    def setUp(self):
+        staging_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(staging_dir.cleanup)
+        self.staging_dir = staging_dir.name
+        self.enterContext(override_settings(UPLOAD_STAGING_DIR=staging_dir.name, MAX_UPLOAD_SIZE=100 * 1024))
+
+    def parse(self, **files):
+        request = RequestFactory().post('/', {
+            name: SimpleUploadedFile(f'{name}.bin', content) for name, content in files.items()
+        })
+        return self.parse_body(request, request.body)
+
+    def parse_body(self, request, body):
+        parser = MultiPartParser(request.META, io.BytesIO(body), [StreamingFileUploadHandler(request)])
+        _, parsed = parser.parse()
+        return request, parsed
+
+    def test_sha256_and_staging_cleanup(self):
+        content = os.urandom(150 * 1024 // 2)
+        request, parsed = self.parse(file=content)
+        uploaded = parsed['file']
+        self.assertFalse(getattr(request, 'upload_too_large', False))
+        self.assertEqual(uploaded.sha256, hashlib.sha256(content).hexdigest())
+        self.assertEqual(uploaded.size, len(content))
+        self.assertEqual(uploaded.read(), content)
+        uploaded.close()
+        self.assertEqual(os.listdir(self.staging_dir), [])
+
+    def test_oversized_body_is_rejected(self):
+        request, parsed = self.parse(file=b'x' * 200 * 1024)
+        self.assertTrue(request.upload_too_large)
+        self.assertNotIn('file', parsed)
+        self.assertEqual(os.listdir(self.staging_dir), [])
+
+    def assertKeepsCompletedFile(self, request, parsed):
+        self.assertTrue(request.upload_too_large)
+        first = parsed['first']
+        self.assertEqual(os.listdir(self.staging_dir), [os.path.basename(first.temporary_file_path())])
+        self.assertEqual(first.read(), b'first')
+        first.close()
+
+    def test_rejected_file_keeps_completed_one(self):
+        # Tělo se vejde do limitu s rezervou, druhý soubor překročí limit až během příjmu
+        self.assertKeepsCompletedFile(*self.parse(first=b'first', second=b'y' * 130 * 1024))
+
+    def test_rejected_part_header_keeps_completed_one(self):
+        # Druhá část ohlásí v hlavičce Content-Length nad limit - odmítne se už v new_file
+        request = RequestFactory().post('/', {'first': SimpleUploadedFile('first.bin', b'first')})
+        boundary = request.content_params['boundary']
+        closing = f'--{boundary}--'.encode()
+        second = (
+            f'--{boundary}\r\nContent-Disposition: form-data; name="second"; filename="second.bin"\r\n'
+            f'Content-Type: application/octet-stream\r\nContent-Length: {200 * 1024}\r\n\r\n'
+        ).encode() + b'y' * 10 + b'\r\n'
+        body = request.body.replace(closing, second + closing)
+        request.META['CONTENT_LENGTH'] = str(len(body))
+        self.assertKeepsCompletedFile(*self.parse_body(request, body))
+
+
+class CsvExportTests(SimpleTestCase):
+    def test_formula_values_are_escaped(self):
+        rows = [{'title': '=HYPERLINK("http://example.com")', 'keywords': ['@a', 'b'], 'average_score': -1.5}]
+        lines = ''.join(iter_csv(rows, ('title', 'keywords', 'average_score'))).splitlines()
+        self.assertEqual(lines[1], '"\'=HYPERLINK(""http://example.com"")",\'@a; b,-1.5')
+
+
+class BundleExportTests(TestCase):
+    """
+    ZIP export projektu a celého ročníku. Přibalují se jen soubory evidovaných blobů uvnitř MEDIA_ROOT.
+    """
+    PATH = 'blobs/ef/ef56.pdf'
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.student = User.objects.create_user('student', role='student')
+        cls.admin = User.objects.create_user('admin', role='admin')
+        MediaBlob.objects.create(sha256='ef56', path=cls.PATH, size=8)
+        # Záznamy s cestou mimo MEDIA_ROOT - export je musí odmítnout i tak
+        MediaBlob.objects.create(sha256='up', path='../secret.txt', size=6)
+        MediaBlob.objects.create(sha256='abs', path='/etc/passwd', size=1)
+        cls.project = Project.objects.create(
+            title='Exportovaný projekt', description='Popis', year=2024, field='Informatika',
+            keywords=[], student=cls.student, document=cls.PATH,
+        )
+        cls.other = Project.objects.create(
+            title='Druhý projekt', description='Popis', year=2024, field='Informatika', keywords=[],
+        )
+        Project.objects.create(title='Jiný ročník', description='Popis', year=2023, field='Informatika', keywords=[])
+
+    def setUp(self):
+        root = tempfile.TemporaryDirectory()
+        self.addCleanup(root.cleanup)
+        media_root = os.path.join(root.name, 'media')
+        self.enterContext(override_settings(MEDIA_ROOT=media_root))
+        os.makedirs(os.path.join(media_root, 'blobs', 'ef'))
+        with open(os.path.join(media_root, self.PATH), 'wb') as file:
+            file.write(b'%PDF-doc')
+        with open(os.path.join(root.name, 'secret.txt'), 'wb') as file:
+            file.write(b'secret')
+        self.client = APIClient()
+
+    def get_archive(self, user, url, params=None):
+        self.client.force_authenticate(user)
+        response = self.client.get(url, params)
+        self.assertEqual(response.status_code, 200)
+        return zipfile.ZipFile(io.BytesIO(b''.join(response.streaming_content)))
+
+    def project_archive(self):
+        return self.get_archive(self.student, reverse('project-bundle', args=[self.project.pk]))
+
+    def test_project_bundle(self):
+        archive = self.project_archive()
+        self.assertEqual(set(archive.namelist()), {'project.json', 'project.md', 'document.pdf'})
+        self.assertEqual(archive.read('document.pdf'), b'%PDF-doc')
+        self.assertIn('# Exportovaný projekt', archive.read('project.md').decode())
+
+    def test_paths_outside_media_root_are_skipped(self):
+        for path in ('/etc/passwd', '../secret.txt', '../../../../../etc/passwd'):
+            with self.subTest(path=path):
+                Project.objects.filter(pk=self.project.pk).update(document=path)
+                self.assertEqual(set(self.project_archive().namelist()), {'project.json', 'project.md'})
+
+    def test_year_bundle(self):
+        archive = self.get_archive(self.admin, reverse('project-bulk-bundle'), {'year': 2024})
+        folders = {name.split('/')[0] for name in archive.namelist()}
+        self.assertEqual(folders, {f'{self.project.pk}-exportovany-projekt', f'{self.other.pk}-druhy-projekt'})
+        self.assertEqual(archive.read(f'{self.project.pk}-exportovany-projekt/document.pdf'), b'%PDF-doc')
+
+    def test_year_bundle_errors(self):
+        self.client.force_authenticate(self.student)
+        self.assertEqual(self.client.get(reverse('project-bulk-bundle'), {'year': 2024}).status_code, 403)
+        self.client.force_authenticate(self.admin)
+        for params in ({}, {'year': 'abc'}):
+            with self.subTest(params=params):
+                self.assertEqual(self.client.get(reverse('project-bulk-bundle'), params).status_code, 400)
+
+
+class FacetTests(TestCase):
+    """
+    Facety odpovídají počtům nad stejně vyfiltrovaným querysetem, klíčová slova jen top N.
+    """
+    KEYWORDS = ('ai', 'data', 'drony', 'python', 'roboti', 'web')
+
+    @classmethod
+    def setUpTestData(cls):
+        student = User.objects.create_user('student', role='student')
+        rng = random.Random(15)
+        for index in range(40):
+            keywords = rng.sample(cls.KEYWORDS, rng.randint(0, 3))
+            Project.objects.create(
+                title=f'Projekt {index}', description='Popis', year=rng.choice((2023, 2024)),
+                field=rng.choice(('Informatika', 'Fyzika')), keywords=keywords + keywords[:1],
+                status=rng.choice(('draft', 'completed')), type_of_work=rng.choice(('SOČ', 'seminar')),
+                student=student, public_visibility=index % 5 != 0, deleted=index % 7 == 0,
+            )
+
+    def setUp(self):
+        clear_caches()
+
+    def facets(self, **params):
+        response = self.client.get(reverse('public-projects-facets'), params)
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def expected(self, projects, keyword_limit):
+        counts = {field: Counter(getattr(project, field) for project in projects) for field in FACET_FIELDS}
+        counts['keywords'] = Counter(keyword for project in projects for keyword in set(project.keywords))
+        expected = {
+            facet: sorted(counter.items(), key=lambda item: (-item[1], item[0]))
+            for facet, counter in counts.items()
+        }
+        expected['keywords'] = expected['keywords'][:keyword_limit]
+        return expected
+
+    def assertFacetsMatch(self, data, projects, keyword_limit):
+        self.assertEqual(data['total'], len(projects))
+        facets = {
+            facet: [(item['value'], item['count']) for item in items] for facet, items in data['facets'].items()
+        }
+        self.assertEqual(facets, self.expected(projects, keyword_limit))
+
+    def test_counts_match_filtered_projects(self):
+        projects = list(Project.objects.filter(public_visibility=True, deleted=False, year=2024, field='Informatika'))
+        self.assertFacetsMatch(self.facets(year=2024, field='Informatika'), projects, KEYWORD_FACET_LIMIT)
+
+    def test_keyword_filter_and_top_n(self):
+        projects = list(Project.objects.filter(public_visibility=True, deleted=False, keywords__contains=['python']))
+        with mock.patch('python_bp.facets.KEYWORD_FACET_LIMIT', 3):
+            data = self.facets(keywords='python')
+        self.assertEqual(len(data['facets']['keywords']), 3)
+        self.assertFacetsMatch(data, projects, 3)
+        status = data['facets']['status'][0]
+        self.assertEqual(status['label'], dict(Project.STATUS_CHOICES)[status['value']])
+
+
+class KeywordTrieTests(TestCase):
+    def test_trie_follows_database_changes(self):
+        update_keyword_usage({'robotika': 'Robotika'}, set())
+        self.assertEqual(suggest_keywords('rob'), [{'keyword': 'Robotika', 'count': 1}])
+
+        # Změna z jiného procesu se projeví jen v DB - trie ji musí poznat podle verze z DB
+        update_keyword_usage({'robotika': 'Robotika', 'robot': 'Robot'}, set())
+        self.assertEqual(suggest_keywords('rob'), [
+            {'keyword': 'Robotika', 'count': 2}, {'keyword': 'Robot', 'count': 1},
+        ])
+
+
+class SimilarityTests(TestCase):
+    """
+    Přírůstková aktualizace podobných projektů vektorizuje jen změněný projekt
+    a podobnosti počítá z uložených vektorů.
+    """
+    TEXTS = {
+        'robot': ('Mobilní robot', 'Řízení mobilního robota pomocí senzorů', ['robotika', 'senzory']),
+        'drone': ('Autonomní dron', 'Navigace dronu podle senzorů a kamery', ['robotika', 'drony']),
+        'plants': ('Růst rostlin', 'Vliv světla na růst pokojových rostlin', ['biologie', 'rostliny']),
+        'soil': ('Půda a rostliny', 'Kvalita půdy a výnos rostlin na zahradě', ['biologie', 'půda']),
+    }
+
+    @classmethod
+    def setUpTestData(cls):
+        student = User.objects.create_user('student', role='student')
+        cls.projects = {
+            name: Project.objects.create(
+                title=title, description=description, year=2024, field='Informatika',
+                keywords=keywords, student=student, public_visibility=True,
+            )
+            for name, (title, description, keywords) in cls.TEXTS.items()
+        }
+        rebuild_similarities()
+
+    def similar(self, name):
+        return [project.pk for project in similar_projects(self.projects[name].pk, 3)]
+
+    def test_rebuild(self):
+        self.assertEqual(self.similar('robot')[0], self.projects['drone'].pk)
+        self.assertEqual(self.similar('plants')[0], self.projects['soil'].pk)
+
+    def test_update_changed_project_only(self):
+        drone = self.projects['drone']
+        others = list(ProjectTermWeight.objects.exclude(project=drone).order_by('pk').values_list('term_id', 'weight'))
+
+        Project.objects.filter(pk=drone.pk).update(
+            title='Rostliny ve skleníku', description='Automatická zálivka rostlin', keywords=['biologie', 'rostliny'],
+        )
+        affected = update_project_similarities(drone.pk)
+
+        self.assertIn(self.projects['robot'].pk, affected)
+        self.assertIn(self.projects['plants'].pk, affected)
+        self.assertEqual(self.similar('drone')[0], self.projects['plants'].pk)
+        self.assertNotIn(drone.pk, self.similar('robot'))
+        self.assertIn(drone.pk, self.similar('plants'))
+        self.assertEqual(
+            list(ProjectTermWeight.objects.exclude(project=drone).order_by('pk').values_list('term_id', 'weight')),
+            others,
+        )
+
+    def test_hidden_project_is_not_recommended(self):
+        drone = self.projects['drone']
+        Project.objects.filter(pk=drone.pk).update(public_visibility=False)
+        update_project_similarities(drone.pk)
+        self.assertNotIn(drone.pk, self.similar('robot'))
+
+    @mock.patch('python_bp.signals.schedule_similarity_update')
+    def test_signal_only_on_relevant_change(self, schedule):
+        project = Project.objects.get(pk=self.projects['robot'].pk)
+        with self.captureOnCommitCallbacks(execute=True):
+            project.status = 'submitted'
+            project.save()
+        schedule.assert_not_called()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            project.title = 'Mobilní robot s kamerou'
+            project.save()
+        schedule.assert_called_once_with(project.pk)
+
+
+@override_settings(PROJECT_ACCESS_CACHE_TIMEOUT=0, SYNC_CURSOR_LAG_SECONDS=0)
+class RevokedAccessSyncTests(TestCase):
+    """
+    Učitel, který přišel o přiřazení k projektu, dostane v synchronizaci tombstone projektu.
+    """
+    @classmethod
+    def setUpTestData(cls):
+        cls.teacher = User.objects.create_user('teacher', role='teacher')
+        cls.project = Project.objects.create(
+            title='Soukromý projekt', description='Popis', year=2024, field='Informatika', keywords=[],
+            student=User.objects.create_user('student', role='student'),
+        )
+
+    def revoked_projects(self):
+        client = APIClient()
+        client.force_authenticate(self.teacher)
+        deleted = client.get(reverse('sync-changes')).data['deleted']
+        return [item['id'] for item in deleted if item['type'] == 'project' and item['reason'] == 'revoked']
+
+    def test_removed_teacher_gets_project_tombstone(self):
+        ProjectTeacher.objects.create(project=self.project, teacher=self.teacher, role='supervisor').delete()
+        self.assertEqual(self.revoked_projects(), [self.project.pk])
+
+    def test_remaining_assignment_keeps_access(self):
+        ProjectTeacher.objects.create(project=self.project, teacher=self.teacher, role='supervisor')
+        ProjectTeacher.objects.create(project=self.project, teacher=self.teacher, role='opponent').delete()
+        self.assertFalse(Tombstone.objects.filter(reason='revoked').exists())
+        self.assertEqual(self.revoked_projects(), [])
+
+    def test_reassigned_teacher_gets_project_tombstone(self):
+        assignment = ProjectTeacher.objects.create(project=self.project, teacher=self.teacher, role='supervisor')
+        assignment.teacher = User.objects.create_user('other-teacher', role='teacher')
+        assignment.save()
+        self.assertEqual(self.revoked_projects(), [self.project.pk])
+
+
+@override_settings(SYNC_CURSOR_LAG_SECONDS=0)
+class SyncChangesTests(TestCase):
+    """
+    Delta synchronizace: stránkování změn se stejným časem a komu patří tombstone smazaného projektu.
+    """
+    @classmethod
+    def setUpTestData(cls):
+        cls.student = User.objects.create_user('student', role='student')
+        cls.teacher = User.objects.create_user('teacher', role='teacher')
+        cls.stranger = User.objects.create_user('stranger', role='student')
+
+    def create_project(self, **kwargs):
+        return Project.objects.create(
+            title='Projekt', description='Popis', year=2024, field='Informatika', keywords=[],
+            student=self.student, **kwargs
+        )
+
+    def sync(self, user, **params):
+        client = APIClient()
+        client.force_authenticate(user)
+        response = client.get(reverse('sync-changes'), params)
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def deleted_projects(self, user):
+        return [item['id'] for item in self.sync(user)['deleted'] if item['type'] == 'project']
+
+    def test_changes_within_one_microsecond_are_paginated(self):
+        project = self.create_project()
+        milestones = [
+            Milestone.objects.create(project=project, title=f'Milník {i}', description='', deadline=timezone.now())
+            for i in range(5)
+        ]
+        moment = timezone.now() - timedelta(minutes=1)
+        Milestone.objects.update(updated_at=moment)
+        Project.objects.update(updated_at=moment)
+
+        seen, token = [], None
+        for _ in range(10):
+            data = self.sync(self.student, limit=2, **({'since': token} if token else {}))
+            self.assertLessEqual(len(data['changes']['milestone']), 2)
+            seen += [item['id'] for item in data['changes']['milestone']]
+            token = data['next']
+            if not data['has_more']:
+                break
+        self.assertFalse(data['has_more'])
+        self.assertEqual(seen, [milestone.pk for milestone in milestones])
+
+    def test_private_project_deletion_reaches_only_its_users(self):
+        project = self.create_project()
+        ProjectTeacher.objects.create(project=project, teacher=self.teacher, role='supervisor')
+        project_id = project.pk
+        project.delete()
+        self.assertEqual(self.deleted_projects(self.student), [project_id])
+        self.assertEqual(self.deleted_projects(self.teacher), [project_id])
+        self.assertEqual(self.deleted_projects(self.stranger), [])
+
+    def test_public_project_deletion_reaches_everyone(self):
+        project = self.create_project(public_visibility=True)
+        project_id = project.pk
+        project.delete()
+        self.assertEqual(self.deleted_projects(self.stranger), [project_id])
+
+    def test_invalid_position_in_token_is_rejected(self):
+        token = base64.urlsafe_b64encode(json.dumps({'t': timezone.now().isoformat(), 'a': {'project': 'x'}}).encode())
+        client = APIClient()
+        client.force_authenticate(self.student)
+        self.assertEqual(client.get(reverse('sync-changes'), {'since': token.decode()}).status_code, 400)
+
+
+@override_settings(PROJECT_ACCESS_CACHE_TIMEOUT=0, SSE_HEARTBEAT_SECONDS=0)
+class EventStreamAccessTests(TestCase):
+    """
+    SSE stream ověřuje přístup při každém heartbeatu a po jeho ztrátě skončí.
+    """
+    @classmethod
+    def setUpTestData(cls):
+        cls.teacher = User.objects.create_user('teacher', role='teacher')
+        cls.project = Project.objects.create(
+            title='Soukromý projekt', description='Popis', year=2024, field='Informatika', keywords=[],
+        )
+        cls.assignment = ProjectTeacher.objects.create(project=cls.project, teacher=cls.teacher, role='supervisor')
+
+    def read_stream(self, revoke):
+        """
+        Přečte úvod streamu, odebere přístup (revoke) a vrátí všechny další části až do konce streamu.
+        """
+        async def read():
+            stream = event_stream(self.project.pk, self.teacher)
+            head = [await stream.__anext__(), await stream.__anext__()]
+            await sync_to_async(revoke)()
+            return head, [chunk async for chunk in stream]
+        return async_to_sync(read)()
+
+    def test_stream_ends_when_access_is_revoked(self):
+        head, tail = self.read_stream(self.assignment.delete)
+        self.assertTrue(head[0].startswith('retry:'))
+        self.assertEqual(head[1], ': keepalive\n\n')
+        self.assertEqual(len(tail), 1)
+        self.assertTrue(tail[0].startswith('event: revoked\n'))
+
+    def test_stream_ends_for_deactivated_user(self):
+        _, tail = self.read_stream(lambda: User.objects.filter(pk=self.teacher.pk).update(is_active=False))
+        self.assertEqual(len(tail), 1)
+        self.assertTrue(tail[0].startswith('event: revoked\n'))
+
+    def test_wsgi_request_is_rejected(self):
+        self.client.force_login(self.teacher)
+        self.assertEqual(self.client.get(reverse('project-events', args=[self.project.pk])).status_code, 501)
+
+    def test_asgi_request_is_checked(self):
+        response = async_to_sync(AsyncClient().get)(reverse('project-events', args=[self.project.pk]))
+        self.assertEqual(response.status_code, 401)
+
+
+class AsyncPublicViewsTests(TestCase):
+    """
+    Chyby validace parametrů vrací async varianty veřejných endpointů jako 400, ne 500.
+    """
+    def test_invalid_search_mode(self):
+        request = RequestFactory().get('/', {'search': 'robot', 'search_mode': 'raw'})
+        for view in (async_views.public_projects_list, async_views.public_projects_facets):
+            with self.subTest(view=view.__name__):
+                response = async_to_sync(view)(request)
+                self.assertEqual(response.status_code, 400)
+                self.assertIn('search_mode', response.content.decode())
+
+
+@override_settings(COMPRESSION_MIN_SIZE=100)
+class CompressionMiddlewareTests(SimpleTestCase):
+    """
+    Komprese podle Accept-Encoding: výběr kódování, slabý ETag a vynechání streamovaných odpovědí.
+    """
+    CONTENT = json.dumps([{'title': f'Projekt {index}', 'field': 'Informatika'} for index in range(50)]).encode()
+
+    def process(self, response, accept_encoding):
+        request = RequestFactory().get('/', HTTP_ACCEPT_ENCODING=accept_encoding)
+        return CompressionMiddleware(lambda request: response).process_response(request, response)
+
+    def json_response(self, content=CONTENT):
+        response = HttpResponse(content, content_type='application/json')
+        response['ETag'] = '"abc"'
+        return response
+
+    def test_choose_encoding(self):
+        self.assertEqual(choose_encoding('gzip;q=0.8, br;q=0.5'), 'gzip')
+        self.assertEqual(choose_encoding('gzip, deflate'), 'gzip')
+        self.assertEqual(choose_encoding('*;q=0.5'), 'br' if brotli is not None else 'gzip')
+        self.assertIsNone(choose_encoding('identity'))
+        self.assertIsNone(choose_encoding('gzip;q=0, br;q=0'))
+        self.assertIsNone(choose_encoding(None))
+
+    def test_gzip(self):
+        response = self.process(self.json_response(), 'gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(response.content), self.CONTENT)
+        self.assertEqual(response['Content-Length'], str(len(response.content)))
+        self.assertEqual(response['ETag'], 'W/"abc"')
+        self.assertEqual(response['Vary'], 'Accept-Encoding')
+
+    @skipIf(brotli is None, 'brotli není nainstalovaný')
+    def test_brotli_preferred_on_tie(self):
+        response = self.process(self.json_response(), 'gzip, br')
+        self.assertEqual(response['Content-Encoding'], 'br')
+        self.assertEqual(brotli.decompress(response.content), self.CONTENT)
+        self.assertEqual(response['ETag'], 'W/"abc"')
+
+    def test_small_and_unaccepted_responses_are_untouched(self):
+        for response in (self.process(self.json_response(b'{}'), 'gzip'), self.process(self.json_response(), '')):
+            self.assertFalse(response.has_header('Content-Encoding'))
+            self.assertEqual(response['ETag'], '"abc"')
+
+    def test_streaming_response_is_untouched(self):
+        response = self.process(StreamingHttpResponse(iter([self.CONTENT]), content_type='text/event-stream'), 'gzip')
+        self.assertFalse(response.has_header('Content-Encoding'))
+        self.assertEqual(b''.join(response.streaming_content), self.CONTENT)
+
+
+@override_settings(JSON_RENDERER_BACKEND='orjson')
+class FastJSONRendererTests(TestCase):
+    """
+    orjson renderer vrací bajtově stejný JSON jako DRF JSONRenderer.
+    """
+    def assertSameJSON(self, data):
+        self.assertEqual(FastJSONRenderer().render(data), JSONRenderer().render(data))
+
+    def test_plain_values(self):
+        self.assertSameJSON({
+            'text': 'Příliš žluťoučký kůň \u2028 \u2029 "uvozovky"', 'none': None, 'bool': True,
+            'int': 12, 'float': 0.5, 'list': [1, 'a', {'b': []}], 2024: 'číselný klíč',
+        })
+
+    def test_python_types(self):
+        self.assertSameJSON({
+            'utc': datetime(2024, 5, 1, 12, 30, 15, 123456, tzinfo=dt_timezone.utc),
+            'offset': datetime(2024, 5, 1, 12, 30, tzinfo=dt_timezone(timedelta(hours=2))),
+            'date': datetime(2024, 5, 1).date(),
+            'decimal': Decimal('1.50'),
+            'uuid': uuid.UUID('12345678-1234-5678-1234-567812345678'),
+        })
+
+    def test_serialized_project(self):
+        student = User.objects.create_user('student', role='student', first_name='Jan', last_name='Novák')
+        project = Project.objects.create(
+            title='Projekt', description='Popis', year=2024, field='Informatika', keywords=['python', 'ai'],
+            student=student, public_visibility=True,
+        )
+        ProjectTeacher.objects.create(project=project, teacher=User.objects.create_user('teacher', role='teacher'),
+                                      role='supervisor')
+        self.assertSameJSON(ProjectWithTeachersSerializer(project).data)
+
+        response = self.client.get(reverse('public-projects-list'))
+        self.assertEqual(response.content, JSONRenderer().render(response.data))
+
+
+class PerformanceMiddlewareTests(TestCase):
+    """
+    Rozpočty SQL dotazů, hlavička Server-Timing a detekce opakovaných dotazů (N+1).
+    """
+    def setUp(self):
+        clear_caches()
+
+    @override_settings(QUERY_BUDGETS={'public-projects-list': 0}, QUERY_BUDGET_MODE='raise')
+    def test_budget_exceeded_raises(self):
+        with self.assertRaisesMessage(QueryBudgetExceeded, 'public-projects-list'):
+            self.client.get(reverse('public-projects-list'))
+
+    @override_settings(QUERY_BUDGETS={'public-projects-list': 0}, QUERY_BUDGET_MODE='log')
+    def test_budget_exceeded_logs(self):
+        with self.assertLogs('python_bp.middleware', 'WARNING') as logs:
+            self.assertEqual(self.client.get(reverse('public-projects-list')).status_code, 200)
+        self.assertIn('rozpočet je 0', logs.output[0])
+
+    @override_settings(QUERY_BUDGETS={'public-projects-list': 100}, QUERY_BUDGET_MODE='raise')
+    def test_budget_within_limit(self):
+        self.assertEqual(self.client.get(reverse('public-projects-list')).status_code, 200)
+
+    def test_server_timing_header(self):
+        with override_settings(SERVER_TIMING=True):
+            self.assertRegex(self.client.get(reverse('public-projects-list'))['Server-Timing'],
+                             r'db;dur=[\d.]+;desc="\d+ queries, 0 duplicate", total;dur=')
+        clear_caches()
+        with override_settings(SERVER_TIMING=False):
+            self.assertNotIn('Server-Timing', self.client.get(reverse('public-projects-list')))
+
+    def test_duplicate_queries_are_detected(self):
+        self.assertEqual(fingerprint('SELECT 1 WHERE id IN (%s, %s)'), fingerprint('SELECT 1\n WHERE id IN (%s)'))
+        metrics = RequestMetrics()
+        token = current_metrics.set(metrics)
+        try:
+            for pk in range(3):
+                list(User.objects.filter(pk=pk))
+            list(Project.objects.all())
+        finally:
+            current_metrics.reset(token)
+        self.assertEqual(metrics.query_count, 4)
+        [(sql, count)] = metrics.duplicates(2)
+        self.assertEqual(count, 3)
+        self.assertIn('FROM "users"', sql)
+
+
+class MetricsTests(TestCase):
+    def test_method_label_is_bounded(self):
+        factory = RequestFactory()
+        self.assertEqual(get_method(factory.patch('/')), 'PATCH')
+        self.assertEqual(get_method(factory.generic('PROPFIND', '/')), 'other')
+        self.assertEqual(get_method(factory.generic('X' * 100, '/')), 'other')
+
+    @override_settings(DEBUG=False, METRICS_TOKEN='')
+    def test_metrics_closed_without_token_in_production(self):
+        self.assertEqual(self.client.get(reverse('metrics')).status_code, 403)
+
+    @override_settings(METRICS_TOKEN='secret')
+    def test_metrics_require_token(self):
+        self.assertEqual(self.client.get(reverse('metrics')).status_code, 401)
+        response = self.client.get(reverse('metrics'), headers={'Authorization': 'Bearer secret'})
+        self.assertEqual(response.status_code, 200)
+
+    def write_process_file(self, directory, pid, values):
+        process_values = MmapValues(os.path.join(directory, f'metrics_{pid}.db'))
+        for key, amount in values.items():
+            process_values.inc(key, amount)
+        process_values.close()
+
+    def test_process_files_are_summed(self):
+        requests_key = metric_key(REQUESTS.name, '_total', ['project-list', 'GET', 200])
+        bucket_key = metric_key(REQUEST_DURATION.name, '_bucket', ['project-list', 'GET'], '0.1')
+        with tempfile.TemporaryDirectory() as directory, override_settings(METRICS_DIR=directory):
+            # Neexistující pid - soubory ukončených workerů
+            self.write_process_file(directory, 999999990, {requests_key: 2, bucket_key: 1})
+            self.write_process_file(directory, 999999991, {requests_key: 3, bucket_key: 2})
+            output = generate_latest()
+            self.assertIn('api_requests_total{endpoint="project-list",method="GET",status="200"} 5.0', output)
+            self.assertIn('api_request_duration_seconds_bucket{endpoint="project-list",method="GET",le="0.1"} 3.0',
+                          output)
+
+            call_command('clear_metrics', '--dead', stdout=io.StringIO())
+            self.assertEqual(os.listdir(directory), [MERGED_FILE])
+            self.assertEqual(generate_latest(), output)
+
+    def test_histogram_buckets_are_cumulative(self):
+        labels = ('project-list', 'GET')
+        samples = REQUEST_DURATION.samples({
+            ('_bucket', labels, '0.005'): 1, ('_bucket', labels, '0.1'): 2, ('_bucket', labels, '+Inf'): 1,
+            ('_sum', labels, None): 12.5, ('_count', labels, None): 4,
+        })
+        buckets = {dict(sample_labels)['le']: value for name, sample_labels, value in samples if name.endswith('_bucket')}
+        self.assertEqual([buckets[bound] for bound in ('0.005', '0.01', '0.1', '10.0', '+Inf')], [1, 1, 3, 3, 4])
+        self.assertEqual(samples[-2:], [
+            ('api_request_duration_seconds_sum', tuple(zip(REQUEST_DURATION.labelnames, labels)), 12.5),
+            ('api_request_duration_seconds_count', tuple(zip(REQUEST_DURATION.labelnames, labels)), 4),
+        ])
+
+
+FIELDS = ['Informatika', 'Biologie', 'Chemie', 'Fyzika', 'Matematika', 'Historie', 'Ekonomie', 'Geografie']
+KEYWORDS = ['robotika', 'ekologie', 'python', 'genetika', 'astronomie', 'energie', 'umělá inteligence', 'voda']
+# Selektivní klíčové slovo - u častých hodnot je sekvenční průchod správná volba plánovače
+RARE_KEYWORD = 'astrofyzika'
+STATUSES = [value for value, _ in Project.STATUS_CHOICES]
+WORK_TYPES = [value for value, _ in Project.WORK_TYPES]
+PAGE = 21
+
+
+@override_settings(PROJECT_ACCESS_CACHE_TIMEOUT=0)
+class QueryPlanTests(TestCase):
+    """
+    EXPLAIN dotazů, které generují seznamy projektů (s filtry a řazením -year, title, id),
+    detail a stránkování komentářů a milníků: nad větší sadou dat se hlavní tabulka
+    nesmí číst sekvenčním průchodem (indexy viz models.py, migrace 0003).
+    """
+    PROJECT_COUNT = 20000
+
+    @classmethod
+    def setUpTestData(cls):
+        rng = random.Random(42)
+        cls.student = User.objects.create_user('plan-student', role='student')
+        cls.admin = User.objects.create_user('plan-admin', role='admin')
+        cls.teachers = User.objects.bulk_create([User(username=f'plan-teacher-{i}', role='teacher') for i in range(50)])
+
+        projects = Project.objects.bulk_create([
+            Project(
+                title=f'Projekt {i} {rng.choice(KEYWORDS)}',
+                description=f'Popis projektu {i} z oboru {rng.choice(FIELDS)}',
+                year=rng.randint(2010, 2025),
+                field=rng.choice(FIELDS),
+                status=rng.choice(STATUSES),
+                type_of_work=rng.choice(WORK_TYPES),
+                keywords=rng.sample(KEYWORDS, 2) + ([RARE_KEYWORD] if i % 100 == 0 else []),
+                student=cls.student,
+                public_visibility=rng.random() < 0.3,
+                deleted=rng.random() < 0.05,
+            )
+            for i in range(cls.PROJECT_COUNT)
+        ], batch_size=1000)
+        cls.project = projects[0]
+        ProjectTeacher.objects.bulk_create([
+            ProjectTeacher(project=project, teacher=cls.teachers[i % len(cls.teachers)], role='supervisor')
+            for i, project in enumerate(projects[::2])
+        ], batch_size=1000)
+        Milestone.objects.bulk_create([
+            Milestone(project=project, title='Milník', description='',
+                      deadline=timezone.now() + timedelta(days=rng.randint(-100, 100)))
+            for project in projects[::5]
+        ], batch_size=1000)
+        Comment.objects.bulk_create([
+            Comment(project=project, user=cls.student, comment_text='Komentář')
+            for project in projects[::5]
+        ], batch_size=1000)
+        update_search_vector(Project.objects.all())
+
+        with connection.cursor() as cursor:
+            for table in ('projects', 'project_teachers', 'comments', 'milestones'):
+                cursor.execute(f'ANALYZE {table}')
+
+    def request(self, user=None, **params):
+        request = Request(APIRequestFactory().get('/', params))
+        if user is not None:
+            request.user = user
+        return request
+
+    def public_page(self, **params):
+        return filter_public_projects(self.request(**params)).order_by('-year', 'title', 'id')[:PAGE]
+
+    def visible_page(self, user, **params):
+        return get_visible_projects(self.request(user, **params)).order_by('-year', 'title', 'id')[:PAGE]
+
+    def assertNoSeqScan(self, table, queryset):
+        plan = queryset.explain()
+        self.assertNotIn(f'Seq Scan on {table}', plan, plan)
+
+    def test_public_projects_list(self):
+        cases = {
+            'bez filtrů': {},
+            'year': {'year': 2020},
+            'field': {'field': FIELDS[0]},
+            'status': {'status': STATUSES[0]},
+            'type_of_work': {'type_of_work': WORK_TYPES[1]},
+            'year, field, status, type_of_work': {
+                'year': 2020, 'field': FIELDS[0], 'status': STATUSES[0], 'type_of_work': WORK_TYPES[1],
+            },
+            'keywords': {'keywords': RARE_KEYWORD},
+        }
+        for name, params in cases.items():
+            with self.subTest(name):
+                self.assertNoSeqScan('projects', self.public_page(**params))
+
+    def test_public_projects_search(self):
+        projects = filter_public_projects(self.request(search=RARE_KEYWORD))
+        self.assertNoSeqScan('projects', projects.order_by('-search_rank', '-year', 'title', 'id')[:PAGE])
+
+    def test_visible_projects_list(self):
+        cases = {
+            'admin': (self.admin, {}),
+            'admin, field': (self.admin, {'field': FIELDS[0]}),
+            'admin, status': (self.admin, {'status': STATUSES[0]}),
+            'admin, type_of_work': (self.admin, {'type_of_work': WORK_TYPES[1]}),
+            'admin, year': (self.admin, {'year': 2020}),
+            'teacher': (self.teachers[0], {}),
+            'teacher, status': (self.teachers[0], {'status': STATUSES[0]}),
+            'teacher, type_of_work': (self.teachers[0], {'type_of_work': WORK_TYPES[1]}),
+        }
+        for name, (user, params) in cases.items():
+            with self.subTest(name):
+                self.assertNoSeqScan('projects', self.visible_page(user, **params))
+
+    def test_public_project_detail(self):
+        projects = Project.objects.filter(public_visibility=True, deleted=False, pk=self.project.pk)
+        self.assertNoSeqScan('projects', projects)
+
+    def test_teacher_project_access(self):
+        project_ids = ProjectTeacher.objects.filter(teacher=self.teachers[0]).values_list('project_id', flat=True)
+        self.assertNoSeqScan('project_teachers', project_ids)
+
+    def test_child_cursor_pagination(self):
+        self.assertNoSeqScan('comments', Comment.objects.order_by('-created_at', 'id')[:PAGE])
+        self.assertNoSeqScan('milestones', Milestone.objects.order_by('deadline', 'id')[:PAGE])
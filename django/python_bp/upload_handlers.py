@@ -0,0 +1,119 @@
+import hashlib
+import os
+import uuid
+
+from django.conf import settings
+from django.core.files.uploadedfile import UploadedFile
+from django.core.files.uploadhandler import FileUploadHandler, StopUpload
+
+
+# Rezerva na hlavičky multipart a ostatní pole formuláře
+MULTIPART_OVERHEAD = 64 * 1024
+
+
+def get_staging_dir():
+    """
+    Adresář pro rozpracované soubory. Leží v MEDIA_ROOT, aby přesun na finální
+    cestu byl atomický os.replace() v rámci jednoho souborového systému.
+    """
+    return getattr(settings, 'UPLOAD_STAGING_DIR', None) or os.path.join(settings.MEDIA_ROOT, '.uploads')
+
+
+class StreamedUploadedFile(UploadedFile):
+    """
+    Soubor zapsaný rovnou do úložiště. SHA-256 a velikost jsou spočítané během příjmu.
+    """
+    def __init__(self, file, name, content_type, size, charset, content_type_extra=None, sha256=None):
+        super().__init__(file, name, content_type, size, charset, content_type_extra)
+        self.sha256 = sha256
+
+    def temporary_file_path(self):
+        return self.file.name
+
+    def move_to(self, path):
+        """
+        Atomicky přesune soubor na finální absolutní cestu v MEDIA_ROOT.
+        """
+        self.file.close()
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        os.replace(self.temporary_file_path(), path)
+
+    def close(self):
+        # Nepřesunutý soubor (neplatný typ, chyba ve view) se po skončení requestu smaže
+        try:
+            self.file.close()
+        finally:
+            try:
+                os.remove(self.temporary_file_path())
+            except FileNotFoundError:
+                pass
+
+
+class StreamingFileUploadHandler(FileUploadHandler):
+    """
+    Upload handler, který zapisuje chunky přímo do MEDIA_ROOT a zároveň počítá SHA-256.
+    Po překročení MAX_UPLOAD_SIZE přenos okamžitě ukončí a nastaví request.upload_too_large.
+    """
+    def handle_raw_input(self, input_data, META, content_length, boundary, encoding=None):
+        self.max_size = settings.MAX_UPLOAD_SIZE
+        # Tělo požadavku je větší než limit i s rezervou - odmítneme už u prvního souboru
+        self.body_too_large = content_length > self.max_size + MULTIPART_OVERHEAD
+
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        # Rozpracovaný soubor patří jen aktuální části multipart - dokončené soubory
+        # už vlastní StreamedUploadedFile a úklid při odmítnutí je nesmí smazat
+        self._release_file()
+        if getattr(self, 'body_too_large', False) or (self.content_length or 0) > self.max_size:
+            self._reject()
+
+        staging_dir = get_staging_dir()
+        os.makedirs(staging_dir, exist_ok=True)
+        self.staging_path = os.path.join(staging_dir, f'{uuid.uuid4()}.part')
+        self.file = open(self.staging_path, 'wb+')
+        self.hasher = hashlib.sha256()
+        self.size = 0
+
+    def receive_data_chunk(self, raw_data, start):
+        self.size += len(raw_data)
+        if self.size > self.max_size:
+            self._reject()
+        self.hasher.update(raw_data)
+        self.file.write(raw_data)
+        return None
+
+    def file_complete(self, file_size):
+        self.file.flush()
+        self.file.seek(0)
+        uploaded = StreamedUploadedFile(
+            self.file, self.file_name, self.content_type, self.size,
+            self.charset, self.content_type_extra, sha256=self.hasher.hexdigest(),
+        )
+        self._release_file()
+        return uploaded
+
+    def upload_interrupted(self):
+        self._discard()
+
+    def _discard(self):
+        """
+        Smaže jen rozpracovaný soubor aktuální části.
+        """
+        if hasattr(self, 'file'):
+            self.file.close()
+            try:
+                os.remove(self.staging_path)
+            except FileNotFoundError:
+                pass
+        self._release_file()
+
+    def _release_file(self):
+        # Atribut file musí zmizet úplně - MultiPartParser zavírá handler.file, pokud existuje
+        self.__dict__.pop('file', None)
+        self.__dict__.pop('staging_path', None)
+
+    def _reject(self):
+        self._discard()
+        if self.request is not None:
+            self.request.upload_too_large = True
+        raise StopUpload(connection_reset=True)
@@ -8,9 +8,16 @@ from drf_yasg.views import get_schema_view
 from drf_yasg import openapi
 from rest_framework import permissions
 from django.conf import settings
-from django.conf.urls.static import static
-from . import views
+from . import async_views, views
 from .file_upload import upload_file
+from .authentication import media_token
+from .events import project_events
+from .metrics import metrics_view
+from .media_serving import serve_media
+from .resumable_upload import create_upload_session, upload_session_detail, finalize_upload_session
+
+# Veřejné endpointy - async implementace pro ASGI server (ASYNC_PUBLIC_VIEWS)
+public_views = async_views if settings.ASYNC_PUBLIC_VIEWS else views
 
 # Create router for ViewSets
 router = DefaultRouter()
@@ -25,15 +32,25 @@ router.register(r'evaluations', views.ProjectEvaluationViewSet)
 # Define all URL patterns first (before creating schema_view)
 urlpatterns = [
     # Public API endpoints (no authentication required)
-    path('public/projects/', views.public_projects_list, name='public-projects-list'),
-    path('public/projects/<int:pk>/', views.public_project_detail, name='public-project-detail'),
+    path('public/projects/', public_views.public_projects_list, name='public-projects-list'),
+    path('public/projects/facets/', public_views.public_projects_facets, name='public-projects-facets'),
+    path('public/projects/<int:pk>/', public_views.public_project_detail, name='public-project-detail'),
     path('visible-projects/', views.visible_projects_list, name='visible-projects-list'),
+    path('visible-projects/export/', views.export_visible_projects, name='visible-projects-export'),
+    path('keywords/autocomplete/', views.keyword_autocomplete, name='keyword-autocomplete'),
+    path('changes/', views.sync_changes, name='sync-changes'),
+    path('projects/<int:pk>/events/', project_events, name='project-events'),
+    path('metrics/', metrics_view, name='metrics'),
     
     # Authenticated API endpoints
     path('', include(router.urls)),
     path('auth/token/', TokenObtainPairView.as_view(), name='token_obtain_pair'),
     path('auth/token/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
+    path('auth/media-token/', media_token, name='media_token'),
     path('upload/', upload_file, name='upload_file'),
+    path('upload/sessions/', create_upload_session, name='upload_session_create'),
+    path('upload/sessions/<uuid:pk>/', upload_session_detail, name='upload_session_detail'),
+    path('upload/sessions/<uuid:pk>/finalize/', finalize_upload_session, name='upload_session_finalize'),
 ]
 
 # Create schema view for Swagger (after defining urlpatterns)
@@ -57,6 +74,8 @@ urlpatterns += [
     path('redoc/', schema_view.with_ui('redoc', cache_timeout=0), name='schema-redoc'),
 ]
 
-# Add this at the end of the file to serve media files in development
-if settings.DEBUG:
-    urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
\ No newline at end of file
+# Media soubory s kontrolou přístupu k projektu (i v produkci, viz MEDIA_SERVE_MODE)
+if not settings.MEDIA_URL.startswith(('http://', 'https://')):
+    urlpatterns += [
+        path(f"{settings.MEDIA_URL.strip('/')}/<path:path>", serve_media, name='serve_media'),
+    ]
\ No newline at end of file
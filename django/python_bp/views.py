@@ -3,6 +3,7 @@ from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.decorators import action, api_view, permission_classes
 from django_filters.rest_framework import DjangoFilterBackend
+from django.conf import settings
 from django.db.models import Q
 from django.shortcuts import get_object_or_404
 from drf_yasg.utils import swagger_auto_schema
@@ -12,10 +13,55 @@ from .models import User, Project, ProjectTeacher, Milestone, Comment, Consultat
 from .serializer import (
     UserSerializer, UserCreateSerializer, ProjectListSerializer, 
     ProjectDetailSerializer, ProjectCreateUpdateSerializer, ProjectTeacherSerializer,
-    MilestoneSerializer, CommentSerializer, ConsultationSerializer, ProjectEvaluationSerializer,ProjectWithTeachersSerializer
+    MilestoneSerializer, CommentSerializer, ConsultationSerializer, ProjectEvaluationSerializer,ProjectWithTeachersSerializer,
+    SimilarProjectSerializer
 )
 from .permissions import IsTeacherOrAdminOrReadOnly, IsTeacherForProject, IsOwnerOrTeacherOrReadOnly, StudentCanAssignTeacherPermission
+from .search import search_projects, ProjectSearchFilter, RankedOrderingFilter
+from .pagination import ProjectPagination, CommentPagination, MilestonePagination
+from .cache import cache_public_response
+from .access import get_project_access
+from .events import publish_event
+from .conditional import list_validators, project_validators, not_modified_response, set_validators
+from .facets import project_facets
+from .fieldsets import SPARSE_FIELDSET_PARAMETERS, requested_fields
+from .fast_serializers import list_serializer_class
+from .keywords import TRIE_TOP_N, suggest_keywords
+from .similarity import SHOWN_SIMILAR_PROJECTS, similar_projects
+from .sync import InvalidSyncToken, collect_changes, decode_sync_token, encode_sync_token, is_token_expired
+from .exports import (
+    EXPORT_FORMATS, PROJECT_EXPORT_FIELDS, project_bundle_response, projects_bundle_response,
+    project_export_rows, tabular_export_response
+)
+
+
+class EagerLoadingViewMixin:
+    """
+    Aplikuje plán načítání (setup_eager_loading) serializéru aktuální akce
+    na queryset pro list, retrieve i vlastní akce používající get_object().
+    Akce v sparse_fieldset_actions přijímají fields= a expand= (fieldsets.py).
+    """
+    sparse_fieldset_actions = ()
+
+    def get_requested_fields(self):
+        if self.action not in self.sparse_fieldset_actions or getattr(self, 'swagger_fake_view', False):
+            return None
+        if not hasattr(self, '_requested_fields'):
+            self._requested_fields = requested_fields(self.request, self.get_serializer_class())
+        return self._requested_fields
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        serializer_class = self.get_serializer_class()
+        if hasattr(serializer_class, 'setup_eager_loading'):
+            queryset = serializer_class.setup_eager_loading(queryset, fields=self.get_requested_fields())
+        return queryset
 
+    def get_serializer(self, *args, **kwargs):
+        fields = self.get_requested_fields()
+        if fields is not None:
+            kwargs['fields'] = fields
+        return super().get_serializer(*args, **kwargs)
 
 
 class UserViewSet(viewsets.ModelViewSet):
@@ -47,24 +93,10 @@ class UserViewSet(viewsets.ModelViewSet):
 
 
 # Public API endpoints (no authentication required)
-@swagger_auto_schema(
-    method='get',
-    operation_description="List all public projects (where public_visibility=True)",
-    operation_summary="Get list of all public projects",
-    manual_parameters=[
-        openapi.Parameter('year', openapi.IN_QUERY, description="Filter by year", type=openapi.TYPE_INTEGER),
-        openapi.Parameter('field', openapi.IN_QUERY, description="Filter by field of study", type=openapi.TYPE_STRING),
-        openapi.Parameter('status', openapi.IN_QUERY, description="Filter by status", type=openapi.TYPE_STRING),
-        openapi.Parameter('search', openapi.IN_QUERY, description="Search in title, description, and keywords", type=openapi.TYPE_STRING),
-        openapi.Parameter('ordering', openapi.IN_QUERY, description="Order results by specified fields (e.g. -year,title)", type=openapi.TYPE_STRING),
-    ],
-    responses={200: ProjectListSerializer(many=True)}
-)
-@api_view(['GET'])
-@permission_classes([AllowAny])
-def public_projects_list(request):
+def filter_public_projects(request):
     """
-    List all public projects (where public_visibility=True)
+    Public projects with the showcase filters and full-text search from the query string
+    (shared by the public list and its facets).
     """
     projects = Project.objects.filter(public_visibility=True, deleted=False)
     
@@ -85,35 +117,108 @@ def public_projects_list(request):
     if type_of_work:
         projects = projects.filter(type_of_work=type_of_work)
     
-    # Apply search if provided
-    search = request.query_params.get('search', None)
+    # Apply full-text search if provided
+    search = request.query_params.get('search', '').strip()
     if search:
-        projects = projects.filter(
-            Q(title__icontains=search) | 
-            Q(description__icontains=search) | 
-            Q(keywords__contains=[search])
-        )
+        projects = search_projects(projects, search, request.query_params.get('search_mode'))
+    
+    # Filter by keywords
+    keywords = request.query_params.get('keywords', None)
+    if keywords:
+        for keyword in keywords.split(','):
+            projects = projects.filter(keywords__contains=[keyword.strip()])
+    
+    return projects
+
+
+@swagger_auto_schema(
+    method='get',
+    operation_description="List all public projects (where public_visibility=True)",
+    operation_summary="Get list of all public projects",
+    manual_parameters=[
+        openapi.Parameter('year', openapi.IN_QUERY, description="Filter by year", type=openapi.TYPE_INTEGER),
+        openapi.Parameter('field', openapi.IN_QUERY, description="Filter by field of study", type=openapi.TYPE_STRING),
+        openapi.Parameter('status', openapi.IN_QUERY, description="Filter by status", type=openapi.TYPE_STRING),
+        openapi.Parameter('search', openapi.IN_QUERY, description="Full-text search in title, keywords and description", type=openapi.TYPE_STRING),
+        openapi.Parameter('search_mode', openapi.IN_QUERY, description="Search query syntax: websearch (default), plain or phrase", type=openapi.TYPE_STRING),
+        openapi.Parameter('type_of_work', openapi.IN_QUERY, description="Filter by type of work", type=openapi.TYPE_STRING),
+        openapi.Parameter('keywords', openapi.IN_QUERY, description="Filter by keywords (comma separated)", type=openapi.TYPE_STRING),
+        openapi.Parameter('ordering', openapi.IN_QUERY, description="Order results by specified fields (e.g. -year,title)", type=openapi.TYPE_STRING),
+        openapi.Parameter('pagination', openapi.IN_QUERY, description="Set to 'cursor' for keyset pagination without total count (ordering is then -year,title,id)", type=openapi.TYPE_STRING),
+        openapi.Parameter('cursor', openapi.IN_QUERY, description="Opaque cursor from the next/previous link", type=openapi.TYPE_STRING),
+    ],
+    responses={200: ProjectListSerializer(many=True)}
+)
+@api_view(['GET'])
+@permission_classes([AllowAny])
+@cache_public_response('list')
+def public_projects_list(request):
+    """
+    List all public projects (where public_visibility=True)
+    """
+    serializer_class = list_serializer_class(ProjectListSerializer)
+    projects = serializer_class.setup_eager_loading(filter_public_projects(request))
+    search = request.query_params.get('search', '').strip()
     
-    # Apply ordering
-    ordering = request.query_params.get('ordering', '-year,title')
+    # Apply ordering (search results default to relevance)
+    ordering = request.query_params.get('ordering', '-search_rank,-year,title' if search else '-year,title')
     if ordering:
         ordering_fields = ordering.split(',')
         projects = projects.order_by(*ordering_fields)
     
-    # Apply pagination
-    from rest_framework.pagination import PageNumberPagination
-    paginator = PageNumberPagination()
-    paginator.page_size = 20
+    # Conditional GET - 304 without serialization when nothing changed
+    etag, last_modified = list_validators(request, projects)
+    not_modified = not_modified_response(request, etag, last_modified)
+    if not_modified is not None:
+        return not_modified
+    
+    # Apply pagination (page number or keyset, see ProjectPagination)
+    paginator = ProjectPagination()
     result_page = paginator.paginate_queryset(projects, request)
     
-    serializer = ProjectListSerializer(result_page, many=True)
-    return paginator.get_paginated_response(serializer.data)
+    serializer = serializer_class(result_page, many=True)
+    return set_validators(paginator.get_paginated_response(serializer.data), etag, last_modified)
+
+
+@swagger_auto_schema(
+    method='get',
+    operation_description="Per-value project counts for the showcase filters (year, field, status, type_of_work, "
+                          "keywords) under the currently applied filters. Accepts the same filters as the public list.",
+    operation_summary="Get facet counts for public projects",
+    manual_parameters=[
+        openapi.Parameter('year', openapi.IN_QUERY, description="Filter by year", type=openapi.TYPE_INTEGER),
+        openapi.Parameter('field', openapi.IN_QUERY, description="Filter by field of study", type=openapi.TYPE_STRING),
+        openapi.Parameter('status', openapi.IN_QUERY, description="Filter by status", type=openapi.TYPE_STRING),
+        openapi.Parameter('search', openapi.IN_QUERY, description="Full-text search in title, keywords and description", type=openapi.TYPE_STRING),
+        openapi.Parameter('search_mode', openapi.IN_QUERY, description="Search query syntax: websearch (default), plain or phrase", type=openapi.TYPE_STRING),
+        openapi.Parameter('type_of_work', openapi.IN_QUERY, description="Filter by type of work", type=openapi.TYPE_STRING),
+        openapi.Parameter('keywords', openapi.IN_QUERY, description="Filter by keywords (comma separated)", type=openapi.TYPE_STRING),
+    ],
+    responses={200: "{total, facets: {year|field|status|type_of_work|keywords: [{value, count, label?}]}}"}
+)
+@api_view(['GET'])
+@permission_classes([AllowAny])
+@cache_public_response('facets')
+def public_projects_facets(request):
+    """
+    Facet counts for the public projects list (single GROUPING SETS query)
+    """
+    projects = filter_public_projects(request)
+    
+    # Conditional GET - same validators as the list under the same filters
+    etag, last_modified = list_validators(request, projects)
+    not_modified = not_modified_response(request, etag, last_modified)
+    if not_modified is not None:
+        return not_modified
+    
+    return set_validators(Response(project_facets(projects)), etag, last_modified)
 
 
 @swagger_auto_schema(
     method='get',
-    operation_description="Retrieve a public project by id",
+    operation_description="Retrieve a public project by id, including up to 5 similar public projects (similar_projects)",
     operation_summary="Get public project details by ID",
+    manual_parameters=SPARSE_FIELDSET_PARAMETERS,
     responses={
         200: ProjectDetailSerializer(),
         404: "Project not found or not public"
@@ -121,39 +226,40 @@ def public_projects_list(request):
 )
 @api_view(['GET'])
 @permission_classes([AllowAny])
+@cache_public_response('detail')
 def public_project_detail(request, pk):
     """
     Retrieve a public project by id
     """
+    projects = Project.objects.filter(public_visibility=True, deleted=False)
+    fields = requested_fields(request, ProjectDetailSerializer, extra_expandable=('similar_projects',))
+    
+    # Conditional GET - the ETag covers all nested collections and similar projects
+    etag, last_modified = project_validators(request, projects, pk)
+    if etag is None:
+        return Response({"detail": "Project not found or not public."}, status=status.HTTP_404_NOT_FOUND)
+    not_modified = not_modified_response(request, etag, last_modified)
+    if not_modified is not None:
+        return not_modified
+    
     try:
-        project = Project.objects.get(pk=pk, public_visibility=True, deleted=False)
+        project = ProjectDetailSerializer.setup_eager_loading(projects, fields=fields).get(pk=pk)
     except Project.DoesNotExist:
         return Response({"detail": "Project not found or not public."}, status=status.HTTP_404_NOT_FOUND)
     
-    serializer = ProjectDetailSerializer(project)
-    return Response(serializer.data)
+    data = ProjectDetailSerializer(project, fields=fields).data
+    # Předpočítaná doporučení (build_similar_projects / signály) - jeden indexovaný dotaz
+    if fields is None or 'similar_projects' in fields:
+        data['similar_projects'] = SimilarProjectSerializer(
+            similar_projects(project.pk, SHOWN_SIMILAR_PROJECTS), many=True
+        ).data
+    return set_validators(Response(data), etag, last_modified)
 
 
-@swagger_auto_schema(
-    method='get',
-    operation_description="List all projects visible to current user (own projects + public projects)",
-    operation_summary="Get list of all visible projects",
-    manual_parameters=[
-        openapi.Parameter('year', openapi.IN_QUERY, description="Filter by year", type=openapi.TYPE_INTEGER),
-        openapi.Parameter('field', openapi.IN_QUERY, description="Filter by field of study", type=openapi.TYPE_STRING),
-        openapi.Parameter('status', openapi.IN_QUERY, description="Filter by status", type=openapi.TYPE_STRING),
-        openapi.Parameter('search', openapi.IN_QUERY, description="Search in title, description, and keywords", type=openapi.TYPE_STRING),
-        openapi.Parameter('type_of_work', openapi.IN_QUERY, description="Filter by type of work", type=openapi.TYPE_STRING),
-        openapi.Parameter('keywords', openapi.IN_QUERY, description="Filter by keywords (comma separated)", type=openapi.TYPE_STRING),
-        openapi.Parameter('ordering', openapi.IN_QUERY, description="Order results by specified fields (e.g. -year,title)", type=openapi.TYPE_STRING),
-    ],
-    responses={200: ProjectWithTeachersSerializer(many=True)}
-)
-@api_view(['GET'])
-@permission_classes([IsAuthenticated])
-def visible_projects_list(request):
+def get_visible_projects(request):
     """
-    List all projects visible to current user (own projects + public projects)
+    Projects visible to the current user with the list filters, search and ordering
+    from the query string applied (shared by the visible projects list and its export).
     """
     user = request.user
     
@@ -163,7 +269,7 @@ def visible_projects_list(request):
         projects = Project.objects.filter(deleted=False)
     elif user.role == 'teacher':
         # Teachers see projects they're assigned to + public projects
-        teacher_projects = ProjectTeacher.objects.filter(teacher=user).values_list('project_id', flat=True)
+        teacher_projects = get_project_access(request).teacher_project_ids
         projects = Project.objects.filter(
             Q(id__in=teacher_projects) | Q(public_visibility=True),
             deleted=False
@@ -192,14 +298,10 @@ def visible_projects_list(request):
     if type_of_work:
         projects = projects.filter(type_of_work=type_of_work)
     
-    # Apply search if provided
-    search = request.query_params.get('search', None)
+    # Apply full-text search if provided
+    search = request.query_params.get('search', '').strip()
     if search:
-        projects = projects.filter(
-            Q(title__icontains=search) | 
-            Q(description__icontains=search) | 
-            Q(keywords__contains=[search])
-        )
+        projects = search_projects(projects, search, request.query_params.get('search_mode'), allow_raw=True)
     
     # Filter by keywords
     keywords = request.query_params.get('keywords', None)
@@ -208,25 +310,166 @@ def visible_projects_list(request):
         for keyword in keyword_list:
             projects = projects.filter(keywords__contains=[keyword.strip()])
     
-    # Apply ordering
-    ordering = request.query_params.get('ordering', '-year,title')
+    # Apply ordering (search results default to relevance)
+    ordering = request.query_params.get('ordering', '-search_rank,-year,title' if search else '-year,title')
     if ordering:
         ordering_fields = ordering.split(',')
         projects = projects.order_by(*ordering_fields)
     
-    # Předběžně načteme učitele projektů (optimalizace dotazů)
-    projects = projects.prefetch_related('teachers__teacher')
+    return projects
+
+
+@swagger_auto_schema(
+    method='get',
+    operation_description="List all projects visible to current user (own projects + public projects)",
+    operation_summary="Get list of all visible projects",
+    manual_parameters=[
+        openapi.Parameter('year', openapi.IN_QUERY, description="Filter by year", type=openapi.TYPE_INTEGER),
+        openapi.Parameter('field', openapi.IN_QUERY, description="Filter by field of study", type=openapi.TYPE_STRING),
+        openapi.Parameter('status', openapi.IN_QUERY, description="Filter by status", type=openapi.TYPE_STRING),
+        openapi.Parameter('search', openapi.IN_QUERY, description="Full-text search in title, keywords and description", type=openapi.TYPE_STRING),
+        openapi.Parameter('search_mode', openapi.IN_QUERY, description="Search query syntax: websearch (default), plain, phrase or raw", type=openapi.TYPE_STRING),
+        openapi.Parameter('type_of_work', openapi.IN_QUERY, description="Filter by type of work", type=openapi.TYPE_STRING),
+        openapi.Parameter('keywords', openapi.IN_QUERY, description="Filter by keywords (comma separated)", type=openapi.TYPE_STRING),
+        openapi.Parameter('ordering', openapi.IN_QUERY, description="Order results by specified fields (e.g. -year,title)", type=openapi.TYPE_STRING),
+        openapi.Parameter('pagination', openapi.IN_QUERY, description="Set to 'cursor' for keyset pagination without total count (ordering is then -year,title,id)", type=openapi.TYPE_STRING),
+        openapi.Parameter('cursor', openapi.IN_QUERY, description="Opaque cursor from the next/previous link", type=openapi.TYPE_STRING),
+        *SPARSE_FIELDSET_PARAMETERS,
+    ],
+    responses={200: ProjectWithTeachersSerializer(many=True)}
+)
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def visible_projects_list(request):
+    """
+    List all projects visible to current user (own projects + public projects)
+    """
+    projects = get_visible_projects(request)
+    fields = requested_fields(request, ProjectWithTeachersSerializer)
+    
+    # Předběžně načteme studenta a učitele projektů (optimalizace dotazů)
+    serializer_class = list_serializer_class(ProjectWithTeachersSerializer)
+    projects = serializer_class.setup_eager_loading(projects, fields=fields)
+    
+    # Conditional GET - 304 without serialization when nothing changed
+    etag, last_modified = list_validators(request, projects)
+    not_modified = not_modified_response(request, etag, last_modified)
+    if not_modified is not None:
+        return not_modified
     
-    # Apply pagination
-    from rest_framework.pagination import PageNumberPagination
-    paginator = PageNumberPagination()
-    paginator.page_size = 20
+    # Apply pagination (page number or keyset, see ProjectPagination)
+    paginator = ProjectPagination()
     result_page = paginator.paginate_queryset(projects, request)
     
-    serializer = ProjectWithTeachersSerializer(result_page, many=True)
-    return paginator.get_paginated_response(serializer.data)
+    serializer = serializer_class(result_page, many=True, fields=fields)
+    return set_validators(paginator.get_paginated_response(serializer.data), etag, last_modified)
+
+
+@swagger_auto_schema(
+    method='get',
+    operation_description="Stream visible projects with their teachers and average evaluation score as CSV or NDJSON "
+                          "(admin only). Accepts the same filters, search and ordering as the visible projects list.",
+    operation_summary="Export visible projects",
+    manual_parameters=[
+        openapi.Parameter('export_format', openapi.IN_QUERY, description="csv (default) or ndjson", type=openapi.TYPE_STRING),
+        openapi.Parameter('year', openapi.IN_QUERY, description="Filter by year", type=openapi.TYPE_INTEGER),
+        openapi.Parameter('field', openapi.IN_QUERY, description="Filter by field of study", type=openapi.TYPE_STRING),
+        openapi.Parameter('status', openapi.IN_QUERY, description="Filter by status", type=openapi.TYPE_STRING),
+        openapi.Parameter('search', openapi.IN_QUERY, description="Full-text search in title, keywords and description", type=openapi.TYPE_STRING),
+        openapi.Parameter('type_of_work', openapi.IN_QUERY, description="Filter by type of work", type=openapi.TYPE_STRING),
+        openapi.Parameter('keywords', openapi.IN_QUERY, description="Filter by keywords (comma separated)", type=openapi.TYPE_STRING),
+        openapi.Parameter('ordering', openapi.IN_QUERY, description="Order results by specified fields (e.g. -year,title)", type=openapi.TYPE_STRING),
+    ],
+    responses={200: "CSV or NDJSON (streamed)", 400: "Unsupported export format", 403: "Only administrators can export projects"}
+)
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def export_visible_projects(request):
+    """
+    Streamed CSV/NDJSON export of visible projects (constant memory, server-side cursor)
+    """
+    if not get_project_access(request).is_admin:
+        return Response({"detail": "Only administrators can export projects."}, status=status.HTTP_403_FORBIDDEN)
+    
+    # 'format' is reserved by DRF for renderer selection
+    export_format = request.query_params.get('export_format', 'csv')
+    if export_format not in EXPORT_FORMATS:
+        return Response({"detail": f"Unsupported export format. Use one of: {', '.join(EXPORT_FORMATS)}."},
+                        status=status.HTTP_400_BAD_REQUEST)
+    
+    rows = project_export_rows(get_visible_projects(request))
+    return tabular_export_response(rows, PROJECT_EXPORT_FIELDS, export_format, 'projects')
+
+
+@swagger_auto_schema(
+    method='get',
+    operation_description="Suggest existing project keywords: prefix matches ordered by usage, "
+                          "completed by similar keywords (typos) for queries of 3+ characters",
+    operation_summary="Keyword autocomplete",
+    manual_parameters=[
+        openapi.Parameter('q', openapi.IN_QUERY, description="Typed text", type=openapi.TYPE_STRING, required=True),
+        openapi.Parameter('limit', openapi.IN_QUERY, description=f"Maximum number of suggestions (1-{TRIE_TOP_N})", type=openapi.TYPE_INTEGER),
+    ],
+    responses={200: "[{keyword, count}]"}
+)
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def keyword_autocomplete(request):
+    """
+    Keyword suggestions from the keyword dictionary (in-process trie + pg_trgm)
+    """
+    try:
+        limit = max(1, min(int(request.query_params.get('limit', TRIE_TOP_N)), TRIE_TOP_N))
+    except ValueError:
+        limit = TRIE_TOP_N
+    
+    return Response(suggest_keywords(request.query_params.get('q', ''), limit))
+
+
+@swagger_auto_schema(
+    method='get',
+    operation_description="Changes visible to the current user since a sync token: created or updated projects, "
+                          "teacher assignments, milestones, comments, consultations and evaluations, plus tombstones "
+                          "for deleted (or hidden) objects and for projects the user lost access to (reason 'revoked', "
+                          "drop the project's child data). Omit 'since' for the initial sync, then pass back 'next' "
+                          "and repeat while 'has_more' is true.",
+    operation_summary="Delta sync",
+    manual_parameters=[
+        openapi.Parameter('since', openapi.IN_QUERY, description="Sync token from the previous response", type=openapi.TYPE_STRING),
+        openapi.Parameter('limit', openapi.IN_QUERY, description="Maximum number of changes per object type", type=openapi.TYPE_INTEGER),
+    ],
+    responses={
+        200: "{changes: {project: [...], project_teacher: [...], milestone: [...], comment: [...], "
+             "consultation: [...], evaluation: [...]}, deleted: [{type, id, project, reason, deleted_at}], "
+             "next, has_more}",
+        400: "Invalid sync token",
+        410: "Sync token expired - full resync required",
+    }
+)
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def sync_changes(request):
+    """
+    Delta sync - load depends on the number of changes, not on the size of the data set
+    """
+    try:
+        since, after = decode_sync_token(request.query_params.get('since'))
+    except InvalidSyncToken as e:
+        return Response({'detail': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    if is_token_expired(since):
+        return Response({'detail': 'Sync token expired, full resync required.'}, status=status.HTTP_410_GONE)
+    
+    try:
+        limit = max(1, min(int(request.query_params.get('limit', settings.SYNC_MAX_CHANGES)), settings.SYNC_MAX_CHANGES))
+    except ValueError:
+        limit = settings.SYNC_MAX_CHANGES
+    
+    result = collect_changes(request, since, limit, after)
+    result['next'] = encode_sync_token(result['next'], result.pop('after'))
+    return Response(result)
+
 
-class ProjectViewSet(viewsets.ModelViewSet):
+class ProjectViewSet(EagerLoadingViewMixin, viewsets.ModelViewSet):
     """
     ViewSet for managing projects. 
     
@@ -235,11 +478,13 @@ class ProjectViewSet(viewsets.ModelViewSet):
     - Teacher: sees projects they're assigned to
     - Student: sees their own projects 
     """
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+    filter_backends = [DjangoFilterBackend, ProjectSearchFilter, RankedOrderingFilter]
     filterset_fields = ['year', 'field', 'status', 'type_of_work']
     search_fields = ['title', 'description', 'keywords']
     ordering_fields = ['title', 'year', 'created_at', 'updated_at']
     ordering = ['-year', 'title']
+    pagination_class = ProjectPagination
+    sparse_fieldset_actions = ('list', 'retrieve')
 
     def get_permissions(self):
         """
@@ -265,7 +510,7 @@ class ProjectViewSet(viewsets.ModelViewSet):
             queryset = Project.objects.filter(deleted=False)
         elif user_role == 'teacher':
             # Teachers see only projects where they're assigned
-            teacher_projects = ProjectTeacher.objects.filter(teacher=user).values_list('project_id', flat=True)
+            teacher_projects = get_project_access(self.request).teacher_project_ids
             queryset = Project.objects.filter(
                 id__in=teacher_projects,
                 deleted=False
@@ -286,9 +531,43 @@ class ProjectViewSet(viewsets.ModelViewSet):
         
         return queryset
 
+    @swagger_auto_schema(manual_parameters=SPARSE_FIELDSET_PARAMETERS)
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+
+        # Conditional GET - 304 without serialization when nothing changed
+        etag, last_modified = list_validators(request, queryset)
+        not_modified = not_modified_response(request, etag, last_modified)
+        if not_modified is not None:
+            return not_modified
+
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            serializer = self.get_serializer(page, many=True)
+            response = self.get_paginated_response(serializer.data)
+        else:
+            serializer = self.get_serializer(queryset, many=True)
+            response = Response(serializer.data)
+        return set_validators(response, etag, last_modified)
+
+    @swagger_auto_schema(manual_parameters=SPARSE_FIELDSET_PARAMETERS)
+    def retrieve(self, request, *args, **kwargs):
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        etag, last_modified = project_validators(request, self.get_queryset(), self.kwargs[lookup_url_kwarg])
+        if etag is not None:
+            not_modified = not_modified_response(request, etag, last_modified)
+            if not_modified is not None:
+                return not_modified
+
+        response = super().retrieve(request, *args, **kwargs)
+        return set_validators(response, etag, last_modified)
+
     def get_serializer_class(self):
         if self.action == 'list':
-            return ProjectListSerializer
+            # Schéma (drf-yasg) se generuje z původního serializéru
+            if getattr(self, 'swagger_fake_view', False):
+                return ProjectListSerializer
+            return list_serializer_class(ProjectListSerializer)
         elif self.action in ['create', 'update', 'partial_update']:
             return ProjectCreateUpdateSerializer
         return ProjectDetailSerializer
@@ -336,9 +615,7 @@ class ProjectViewSet(viewsets.ModelViewSet):
         
         # Check if user is admin or a teacher assigned to this project
         is_admin = user.role == 'admin'
-        is_project_teacher = user.role == 'teacher' and ProjectTeacher.objects.filter(
-            project=project, teacher=user
-        ).exists()
+        is_project_teacher = user.role == 'teacher' and get_project_access(request).is_teacher_of(project.pk)
         
         if not (is_admin or is_project_teacher):
             return Response(
@@ -391,9 +668,48 @@ class ProjectViewSet(viewsets.ModelViewSet):
         
         serializer = self.get_serializer(project)
         return Response(serializer.data)
+    
+    @swagger_auto_schema(
+        method='get',
+        operation_description="Download the project as a ZIP archive: project.json, project.md "
+                              "(milestones, consultations, evaluations) and the document, poster and video files",
+        operation_summary="Export project bundle",
+        responses={200: "ZIP archive (streamed)"}
+    )
+    @action(detail=True, methods=['get'], url_path='bundle')
+    def bundle(self, request, pk=None):
+        """Streamed ZIP export of a project and its attachments"""
+        project = self.get_object()
+        return project_bundle_response(project)
+    
+    @swagger_auto_schema(
+        method='get',
+        operation_description="Download all projects of a year as one ZIP archive (admin only)",
+        operation_summary="Export project bundles for a year",
+        manual_parameters=[
+            openapi.Parameter('year', openapi.IN_QUERY, description="Project year", type=openapi.TYPE_INTEGER, required=True),
+        ],
+        responses={200: "ZIP archive (streamed)", 400: "Missing or invalid 'year' parameter", 403: "Only administrators can export whole years"}
+    )
+    @action(detail=False, methods=['get'], url_path='bundle')
+    def bulk_bundle(self, request):
+        """Streamed ZIP export of all projects of a year"""
+        if not get_project_access(request).is_admin:
+            return Response({"detail": "Only administrators can export whole years."},
+                            status=status.HTTP_403_FORBIDDEN)
+        
+        try:
+            year = int(request.query_params.get('year', ''))
+        except ValueError:
+            return Response({"detail": "Missing or invalid 'year' parameter."},
+                            status=status.HTTP_400_BAD_REQUEST)
+        
+        projects = Project.objects.filter(deleted=False, year=year).order_by('title', 'id')
+        projects = ProjectDetailSerializer.setup_eager_loading(projects)
+        return projects_bundle_response(projects, f'projects-{year}.zip')
 
 
-class ProjectTeacherViewSet(viewsets.ModelViewSet):
+class ProjectTeacherViewSet(EagerLoadingViewMixin, viewsets.ModelViewSet):
     queryset = ProjectTeacher.objects.all()
     serializer_class = ProjectTeacherSerializer
     permission_classes = [permissions.IsAuthenticated, StudentCanAssignTeacherPermission]
@@ -409,7 +725,7 @@ class ProjectTeacherViewSet(viewsets.ModelViewSet):
             return ProjectTeacher.objects.filter(teacher=user)
         else:  # student
             # Students see only teachers on their projects
-            student_projects = Project.objects.filter(student=user).values_list('id', flat=True)
+            student_projects = get_project_access(self.request).student_project_ids
             return ProjectTeacher.objects.filter(project_id__in=student_projects)
     
     @action(detail=True, methods=['post'], permission_classes=[permissions.IsAuthenticated])
@@ -426,6 +742,7 @@ class ProjectTeacherViewSet(viewsets.ModelViewSet):
         project_teacher.save()
         
         serializer = self.get_serializer(project_teacher)
+        publish_event(project_teacher.project_id, 'teacher.accepted', serializer.data)
         return Response(serializer.data)
 
     @swagger_auto_schema(
@@ -460,13 +777,15 @@ class ProjectTeacherViewSet(viewsets.ModelViewSet):
                           status=status.HTTP_403_FORBIDDEN)
         
         # Delete the assignment instead of just marking it as declined
+        event_data = self.get_serializer(project_teacher).data
         project_teacher.delete()
+        publish_event(project_teacher.project_id, 'teacher.declined', event_data)
         
         return Response({"detail": "Assignment declined and removed."}, 
                       status=status.HTTP_200_OK)
 
 
-class MilestoneViewSet(viewsets.ModelViewSet):
+class MilestoneViewSet(EagerLoadingViewMixin, viewsets.ModelViewSet):
     queryset = Milestone.objects.all()
     serializer_class = MilestoneSerializer
     permission_classes = [permissions.IsAuthenticated, IsTeacherForProject]
@@ -474,6 +793,7 @@ class MilestoneViewSet(viewsets.ModelViewSet):
     filterset_fields = ['project', 'status']
     ordering_fields = ['deadline', 'created_at']
     ordering = ['deadline']
+    pagination_class = MilestonePagination
 
     def get_queryset(self):
         user = self.request.user
@@ -481,24 +801,22 @@ class MilestoneViewSet(viewsets.ModelViewSet):
             return Milestone.objects.all()
         elif user.role == 'teacher':
             # Učitelé vidí pouze milníky projektů, kde jsou vedoucí/konzultanti
-            teacher_projects = ProjectTeacher.objects.filter(teacher=user).values_list('project_id', flat=True)
+            teacher_projects = get_project_access(self.request).teacher_project_ids
             return Milestone.objects.filter(project_id__in=teacher_projects)
         else:  # student
             # Studenti vidí pouze milníky na svých projektech
-            student_projects = Project.objects.filter(student=user).values_list('id', flat=True)
+            student_projects = get_project_access(self.request).student_project_ids
             return Milestone.objects.filter(project_id__in=student_projects)
 
     @action(detail=True, methods=['post'], permission_classes=[permissions.IsAuthenticated])
     def update_completion(self, request, pk=None):
         """Akce pro aktualizaci stavu dokončení milníku"""
         milestone = self.get_object()
-        project = milestone.project
+        access = get_project_access(request)
         
         # Kontrola, zda je uživatel student, který vlastní projekt, nebo učitel projektu
-        is_owner = request.user.role == 'student' and project.student == request.user
-        is_teacher = request.user.role == 'teacher' and ProjectTeacher.objects.filter(
-            project=project, teacher=request.user
-        ).exists()
+        is_owner = request.user.role == 'student' and access.is_student_of(milestone.project_id)
+        is_teacher = request.user.role == 'teacher' and access.is_teacher_of(milestone.project_id)
         
         if not (is_owner or is_teacher or request.user.role == 'admin'):
             return Response({"detail": "Nemáte oprávnění aktualizovat tento milník."}, 
@@ -532,7 +850,7 @@ class MilestoneViewSet(viewsets.ModelViewSet):
                       status=status.HTTP_400_BAD_REQUEST)
 
 
-class CommentViewSet(viewsets.ModelViewSet):
+class CommentViewSet(EagerLoadingViewMixin, viewsets.ModelViewSet):
     queryset = Comment.objects.all()
     serializer_class = CommentSerializer
     permission_classes = [permissions.IsAuthenticated]
@@ -540,6 +858,7 @@ class CommentViewSet(viewsets.ModelViewSet):
     filterset_fields = ['project', 'user']
     ordering_fields = ['created_at']
     ordering = ['-created_at']
+    pagination_class = CommentPagination
 
     def get_queryset(self):
         user = self.request.user
@@ -547,25 +866,19 @@ class CommentViewSet(viewsets.ModelViewSet):
             return Comment.objects.all()
         
         # Získání projektů, ke kterým má uživatel přístup
+        access = get_project_access(self.request)
         if user.role == 'teacher':
-            teacher_projects = ProjectTeacher.objects.filter(teacher=user).values_list('project_id', flat=True)
-            visible_projects = Project.objects.filter(
-                id__in=teacher_projects,
-                deleted=False
-            ).values_list('id', flat=True)
+            visible_projects = access.teacher_project_ids
         else:  # student
-            visible_projects = Project.objects.filter(
-                student=user,
-                deleted=False
-            ).values_list('id', flat=True)
+            visible_projects = access.student_project_ids
         
-        return Comment.objects.filter(project_id__in=visible_projects)
+        return Comment.objects.filter(project_id__in=visible_projects, project__deleted=False)
 
     def perform_create(self, serializer):
         serializer.save(user=self.request.user)
 
 
-class ConsultationViewSet(viewsets.ModelViewSet):
+class ConsultationViewSet(EagerLoadingViewMixin, viewsets.ModelViewSet):
     queryset = Consultation.objects.all()
     serializer_class = ConsultationSerializer
     permission_classes = [permissions.IsAuthenticated, IsTeacherForProject]
@@ -580,14 +893,14 @@ class ConsultationViewSet(viewsets.ModelViewSet):
             return Consultation.objects.all()
         elif user.role == 'teacher':
             # Učitelé vidí konzultace, kde jsou vedoucími
-            teacher_projects = ProjectTeacher.objects.filter(teacher=user).values_list('project_id', flat=True)
+            teacher_projects = get_project_access(self.request).teacher_project_ids
             return Consultation.objects.filter(
                 Q(teacher=user) | 
                 Q(project_id__in=teacher_projects)
             )
         else:  # student
             # Studenti vidí konzultace pouze svých projektů
-            student_projects = Project.objects.filter(student=user).values_list('id', flat=True)
+            student_projects = get_project_access(self.request).student_project_ids
             return Consultation.objects.filter(project_id__in=student_projects)
 
     def perform_create(self, serializer):
@@ -597,7 +910,7 @@ class ConsultationViewSet(viewsets.ModelViewSet):
             serializer.save()
 
 
-class ProjectEvaluationViewSet(viewsets.ModelViewSet):
+class ProjectEvaluationViewSet(EagerLoadingViewMixin, viewsets.ModelViewSet):
     queryset = ProjectEvaluation.objects.all()
     serializer_class = ProjectEvaluationSerializer
     permission_classes = [permissions.IsAuthenticated, IsTeacherForProject]
@@ -610,14 +923,14 @@ class ProjectEvaluationViewSet(viewsets.ModelViewSet):
             return ProjectEvaluation.objects.all()
         elif user.role == 'teacher':
             # Učitelé vidí hodnocení projektů, kde jsou vedoucí/konzultanti/oponenti
-            teacher_projects = ProjectTeacher.objects.filter(teacher=user).values_list('project_id', flat=True)
+            teacher_projects = get_project_access(self.request).teacher_project_ids
             return ProjectEvaluation.objects.filter(
                 Q(teacher=user) | 
                 Q(project_id__in=teacher_projects)
             )
         else:  # student
             # Studenti vidí hodnocení pouze svých projektů
-            student_projects = Project.objects.filter(student=user).values_list('id', flat=True)
+            student_projects = get_project_access(self.request).student_project_ids
             return ProjectEvaluation.objects.filter(project_id__in=student_projects)
 
     def perform_create(self, serializer):